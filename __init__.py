@@ -17,6 +17,9 @@ from . import utilities_color
 from . import utilities_texel
 from . import utilities_bbox
 from . import utilities_uv
+from . import utilities_islands
+from . import utilities_cache
+from . import utilities_profile
 from . import utilities_meshtex
 
 from . import op_align
@@ -44,6 +47,7 @@ from . import op_island_mirror
 from . import op_island_rotate_90
 from . import op_island_straighten_edge_loops
 from . import op_island_centralize
+from . import op_island_unify
 from . import op_randomize
 from . import op_rectify
 from . import op_select_islands_identical
@@ -62,6 +66,10 @@ from . import op_texel_checker_map
 from . import op_texel_checker_map_cleanup
 from . import op_texel_density_get
 from . import op_texel_density_set
+from . import op_texel_density_batch
+from . import op_texel_density_report
+from . import op_texel_density_export
+from . import op_texel_density_select
 from . import op_texture_reload_all
 from . import op_texture_save
 from . import op_texture_open
@@ -214,6 +222,24 @@ class Panel_Preferences(AddonPreferences):
 		name="Show help buttons on panels", 
 		default=True
 	)
+	bool_profiling: BoolProperty(
+		name="Profile operators", 
+		description="Time every TexTools operator and its main phases, list the last runs here and append them to a JSONL log", 
+		default=False
+	)
+	profile_history: IntProperty(
+		name="Runs shown", 
+		description="Number of profiled runs listed in the preferences", 
+		default=10, 
+		min=1, 
+		max=100
+	)
+	profile_log_size: IntProperty(
+		name="Log size (KB)", 
+		description="Size of the profiling log before it is rotated", 
+		default=1024, 
+		min=16
+	)
 
 
 	def draw(self, context):
@@ -286,6 +312,15 @@ class Panel_Preferences(AddonPreferences):
 		col = box.column(align=True)
 		col.prop(self, "bool_help", icon='INFO')
 
+		box = layout.box()
+		col = box.column(align=True)
+		col.prop(self, "bool_profiling", icon='TIME')
+		if self.bool_profiling:
+			row = col.row(align=True)
+			row.prop(self, "profile_history")
+			row.prop(self, "profile_log_size")
+			utilities_profile.draw_history(box, self.profile_history)
+
 
 		if not hasattr(bpy.types,"ShaderNodeBevel"):
 			box.separator()
@@ -863,6 +898,14 @@ class UI_PT_Panel_Units(Panel):
 				row = col.row(align = True)
 				row.prop(context.active_object, "TT_CM_Scale", text="Tiling")
 
+		# Texel density analysis
+		col = layout.column(align=True)
+		row = col.row(align=True)
+		row.operator(op_texel_density_report.op.bl_idname, text="Analyze", icon_value = icon_get("texel_density"))
+		row.operator(op_texel_density_export.op.bl_idname, text="", icon = 'EXPORT')
+		row.operator(op_texel_density_select.op.bl_idname, text="", icon = 'RESTRICT_SELECT_OFF')
+		op_texel_density_report.draw_report(col, context.active_object)
+
 
 
 
@@ -975,6 +1018,7 @@ class UI_PT_Panel_Layout(Panel):
 		row = col.row(align=True)
 		row.operator(op_island_centralize.op.bl_idname, text="Centralize", icon_value = icon_get("op_island_centralize"))
 		row.operator(op_randomize.op.bl_idname, text="Randomize", icon_value = icon_get("op_randomize"))
+		row.operator(op_island_unify.op.bl_idname, text="", icon = 'DUPLICATE')
 
 		col.separator()
 
@@ -1016,6 +1060,7 @@ class UI_PT_Panel_Layout(Panel):
 		row = col.row(align=True)
 		row.operator(op_texel_density_set.op.bl_idname, text="Apply", icon = 'FACESEL')
 		row.prop(tt_settings(), "texel_set_mode", text = "", expand=False)
+		row.operator(op_texel_density_batch.op.bl_idname, text="", icon = 'OBJECT_DATA')
 
 		#---------- Selection ----------
 
@@ -1026,6 +1071,7 @@ class UI_PT_Panel_Layout(Panel):
 
 		row = col.row(align=True)
 		row.operator(op_select_islands_identical.op.bl_idname, text="Similar", icon_value = icon_get("op_select_islands_identical"))
+		row.operator(op_select_islands_identical.op.bl_idname, text="", icon = 'DUPLICATE').mode = 'DUPLICATES'
 		row.operator(op_select_islands_overlap.op.bl_idname, text="Overlap", icon_value = icon_get("op_select_islands_overlap"))
 
 		row = col.row(align=True)
@@ -1543,6 +1589,7 @@ def menu_IMAGE_uvs(self, context):
 	layout.separator()
 	layout.operator(op_island_centralize.op.bl_idname, text="Centralize Position", icon_value = icon_get("op_island_centralize"))
 	layout.operator(op_randomize.op.bl_idname, text="Randomize Position", icon_value = icon_get("op_randomize"))
+	layout.operator(op_island_unify.op.bl_idname, text="Unify Duplicates", icon = 'DUPLICATE')
 
 
 
@@ -1637,6 +1684,7 @@ classes = (
 			op_island_rotate_90.op,
 			op_island_straighten_edge_loops.op,
 			op_island_centralize.op,
+			op_island_unify.op,
 			op_randomize.op,
 			op_rectify.op,
 			op_select_islands_identical.op,
@@ -1655,6 +1703,10 @@ classes = (
 			op_texel_checker_map_cleanup.op,
 			op_texel_density_get.op,
 			op_texel_density_set.op,
+			op_texel_density_batch.op,
+			op_texel_density_report.op,
+			op_texel_density_export.op,
+			op_texel_density_select.op,
 			op_texture_reload_all.op,
 			op_texture_save.op,
 			op_texture_open.op,
@@ -1699,6 +1751,7 @@ def register():
 			globals()[name] = reload(module)
 
 	for c in classes:
+		utilities_profile.instrument(c)
 		bpy.utils.register_class(c)
 
 	# Register settings
@@ -1708,6 +1761,9 @@ def register():
 	# GUI Utilities
 	utilities_ui.register()
 
+	# UV island cache invalidation
+	utilities_cache.register()
+
 	# Register Icons
 	icons = [
 		"bake_anti_alias.bip", 
@@ -1798,6 +1854,9 @@ def unregister():
 		# GUI Utilities
 		utilities_ui.unregister()
 
+		# UV island cache invalidation
+		utilities_cache.unregister()
+
 		# Handle the keymap
 		for km, kmi in keymaps:
 			km.keymap_items.remove(kmi)
@@ -0,0 +1,342 @@
+"""Headless TexTools benchmarks.
+
+	blender -b --factory-startup --python benchmarks/run_benchmarks.py -- [options]
+
+Generates deterministic synthetic meshes, times the core function of TexTools operators on them and writes
+the results to a JSON file. With --baseline, every benchmark slower than the stored baseline by more than
+--threshold is reported as a regression and Blender exits with code 1. With --check, the output of the
+benchmarks that have a reference implementation is compared against it as well, and mismatches fail the same way.
+"""
+
+import argparse
+import importlib
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+import bpy
+import bmesh
+import numpy as np
+
+from mathutils import Vector
+
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name: (faces, islands, UDIM tiles)
+CASES = {
+	'1k_10': (1_000, 10, 1),
+	'10k_100': (10_000, 100, 1),
+	'10k_100_udim': (10_000, 100, 4),
+	'100k_1k': (100_000, 1_000, 1),
+	'100k_10k_udim': (100_000, 10_000, 4),
+	'1m_10k': (1_000_000, 10_000, 1),
+	'1m_50k_udim': (1_000_000, 50_000, 4),
+}
+
+
+class OperatorProxy:
+	"""Stand-in for the operator instance that the core functions receive as self"""
+	def __init__(self, **props):
+		self.__dict__.update(props)
+		self.reports = []
+
+	def report(self, type, message):
+		self.reports.append((sorted(type), message))
+
+
+
+def parse_args():
+	argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+	parser = argparse.ArgumentParser(prog='run_benchmarks.py', description="Headless TexTools benchmarks")
+	parser.add_argument('--output', default='benchmark_results.json', help="JSON file for the results")
+	parser.add_argument('--baseline', help="JSON file of a previous run to compare against")
+	parser.add_argument('--threshold', type=float, default=0.15, help="Allowed slowdown against the baseline, 0.15 = 15%%")
+	parser.add_argument('--repeat', type=int, default=3, help="Timed runs per benchmark, on freshly reset data")
+	parser.add_argument('--cases', default=','.join(CASES), help="Comma separated mesh cases: " + ', '.join(CASES))
+	parser.add_argument('--benchmarks', default=','.join(BENCHMARKS), help="Comma separated benchmarks: " + ', '.join(BENCHMARKS))
+	parser.add_argument('--max-faces', type=int, default=1_000_000, help="Skip the cases above this face count")
+	parser.add_argument('--bake-max-faces', type=int, default=10_000, help="Skip the bake benchmark above this face count")
+	parser.add_argument('--samples', type=int, default=4, help="Cycles samples for the bake benchmark")
+	parser.add_argument('--check', action='store_true', help="Compare the output against the reference implementations: " + ', '.join(CHECKS))
+	parser.add_argument('--check-tolerance', type=float, default=1e-6, help="Allowed UV difference for --check")
+	return parser.parse_args(argv)
+
+
+
+def load_addon():
+	sys.path.insert(0, os.path.dirname(ADDON_DIR))
+	addon = importlib.import_module(os.path.basename(ADDON_DIR))
+	if not hasattr(bpy.types.Scene, 'texToolsSettings'):
+		addon.register()
+	return importlib.import_module(addon.__name__)
+
+
+
+def build_mesh(name, n_faces, n_islands, n_tiles):
+	"""Quad grid on a wavy surface, its UVs cut into rectangular islands spread over n_tiles UDIM tiles"""
+	side = math.ceil(math.sqrt(n_faces))
+	blocks = min(side, math.ceil(math.sqrt(n_islands)))
+
+	ix, iy = np.meshgrid(np.arange(side + 1), np.arange(side + 1))
+	x = ix.ravel() / side
+	y = iy.ravel() / side
+	verts = np.column_stack((x, y, 0.05 * np.sin(x * 7.0) * np.cos(y * 5.0)))
+
+	fx, fy = np.meshgrid(np.arange(side), np.arange(side))
+	fx = fx.ravel()[:n_faces]
+	fy = fy.ravel()[:n_faces]
+	v0 = fy * (side + 1) + fx
+	faces = np.column_stack((v0, v0 + 1, v0 + side + 2, v0 + side + 1))
+
+	# Every corner keeps its grid position, shifted by a gap per block so that blocks become islands
+	corner_x = np.column_stack((fx, fx + 1, fx + 1, fx)).ravel()
+	corner_y = np.column_stack((fy, fy, fy + 1, fy + 1)).ravel()
+	block_x = np.repeat(fx * blocks // side, 4)
+	block_y = np.repeat(fy * blocks // side, 4)
+	gap = 0.5
+	span = side + blocks * gap
+	uv = np.column_stack(((corner_x + block_x * gap) / span, (corner_y + block_y * gap) / span))
+	uv[:, 0] += (block_y * blocks + block_x) % n_tiles
+
+	me = bpy.data.meshes.new(name)
+	used = np.unique(faces)
+	remap = np.zeros(len(verts), dtype=np.int64)
+	remap[used] = np.arange(len(used))
+	me.from_pydata(verts[used].tolist(), [], remap[faces].tolist())
+	me.uv_layers.new(name='UVMap').data.foreach_set('uv', uv.astype(np.float32).ravel())
+	me.update()
+	return me
+
+
+
+class Bench:
+	"""Mesh case in the scene, reset to its generated state before every timed run"""
+	def __init__(self, textools, name, n_faces, n_islands, n_tiles):
+		self.tt = textools
+		self.name = name
+		self.n_faces = n_faces
+		self.source = build_mesh(f"bench_{name}", n_faces, n_islands, n_tiles)
+		self.obj = bpy.data.objects.new(f"bench_{name}", self.source.copy())
+		bpy.context.scene.collection.objects.link(self.obj)
+
+	def reset(self, mode='EDIT'):
+		if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+			bpy.ops.object.mode_set(mode='OBJECT')
+		old = self.obj.data
+		self.obj.data = self.source.copy()
+		bpy.data.meshes.remove(old)
+
+		for obj in bpy.context.view_layer.objects:
+			obj.select_set(obj == self.obj)
+		bpy.context.view_layer.objects.active = self.obj
+		self.tt.utilities_cache.clear()
+
+		if mode == 'EDIT':
+			bpy.ops.object.mode_set(mode='EDIT')
+			bpy.context.scene.tool_settings.use_uv_select_sync = False
+			bm = bmesh.from_edit_mesh(self.obj.data)
+			uv_layer = bm.loops.layers.uv.verify()
+			for face in bm.faces:
+				face.select = True
+				for loop in face.loops:
+					loop[uv_layer].select = True
+			bmesh.update_edit_mesh(self.obj.data)
+
+	def remove(self):
+		if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+			bpy.ops.object.mode_set(mode='OBJECT')
+		me = self.obj.data
+		bpy.data.objects.remove(self.obj)
+		bpy.data.meshes.remove(me)
+		bpy.data.meshes.remove(self.source)
+
+
+
+def bench_get_selected_islands(bench):
+	bench.reset()
+	def run():
+		bm = bmesh.from_edit_mesh(bench.obj.data)
+		bench.tt.utilities_uv.get_selected_islands(bm, bm.loops.layers.uv.verify(), selected=False)
+	return run
+
+
+def bench_texel_density_set(bench):
+	bench.reset()
+	tt_settings = bpy.context.scene.texToolsSettings
+	tt_settings.texel_get_mode = 'SIZE'
+	tt_settings.texel_set_mode = 'ISLAND'
+	return lambda: bench.tt.op_texel_density_set.op.execute(OperatorProxy(), bpy.context)
+
+
+def bench_rectify(bench):
+	bench.reset()
+	return lambda: bench.tt.op_rectify.rectify(OperatorProxy(), bpy.context)
+
+
+def bench_randomize(bench):
+	bench.reset()
+	proxy = OperatorProxy(
+		bool_face=False, round_mode='OFF', steps=Vector((0, 0)), strength=Vector((1, 1)), rotation=math.pi, rotation_steps=0,
+		scale_factor=0.5, min_scale=0.5, max_scale=2, bool_bounds=False, bool_bounds_scaling=False, rand_seed=0)
+	return lambda: bench.tt.op_randomize.main(proxy, bpy.context)
+
+
+def bench_island_align_sort(bench):
+	bench.reset()
+	proxy = OperatorProxy(is_vertical=True, align=True, padding=0.05)
+	return lambda: bench.tt.op_island_align_sort.op.execute(proxy, bpy.context)
+
+
+def bench_bake(bench):
+	if bench.n_faces > ARGS.bake_max_faces:
+		return None
+	bench.reset(mode='OBJECT')
+	scene = bpy.context.scene
+	scene.TT_bake_mode = 'normal_tangent.bip'
+	scene.texToolsSettings.size = (256, 256)
+	scene.texToolsSettings.bake_sampling = '1'
+	scene.cycles.samples = ARGS.samples
+	bench.tt.settings.sets = bench.tt.utilities_bake.get_bake_sets()
+	return lambda: bench.tt.op_bake.op.execute(OperatorProxy(), bpy.context)
+
+
+def read_uvs(bench):
+	bm = bmesh.from_edit_mesh(bench.obj.data)
+	uv_layer = bm.loops.layers.uv.verify()
+	return np.array([loop[uv_layer].uv[:] for face in bm.faces for loop in face.loops])
+
+
+def check_rectify(bench):
+	"""Rectify of all islands in one pass against main() called island by island on the same mesh,
+	the way the operator used to run, with the faces of every island in index order"""
+	bench.reset()
+	me = bench.obj.data
+	bm = bmesh.from_edit_mesh(me)
+	uv_layer = bm.loops.layers.uv.verify()
+	bm.faces.index_update()
+	faces_loops = {face: list(face.loops) for face in bm.faces}
+	for island in bench.tt.utilities_uv.getSelectionIslands(bm, uv_layer):
+		bench.tt.op_rectify.main(me, bm, uv_layer, sorted(island, key=lambda face: face.index), faces_loops, update=False)
+	expected = read_uvs(bench)
+
+	bench.reset()
+	bench.tt.op_rectify.rectify(OperatorProxy(), bpy.context)
+	return float(np.abs(read_uvs(bench) - expected).max())
+
+
+CHECKS = {
+	'rectify': check_rectify,
+}
+
+
+BENCHMARKS = {
+	'get_selected_islands': bench_get_selected_islands,
+	'texel_density_set': bench_texel_density_set,
+	'rectify': bench_rectify,
+	'randomize': bench_randomize,
+	'island_align_sort': bench_island_align_sort,
+	'bake': bench_bake,
+}
+
+
+
+def run_benchmark(bench, setup):
+	"""Min and median time of ARGS.repeat runs, each one on freshly reset data"""
+	times = []
+	for _ in range(ARGS.repeat):
+		run = setup(bench)
+		if run is None:
+			return None
+		start = time.perf_counter()
+		run()
+		times.append(time.perf_counter() - start)
+	return {'min': min(times), 'median': statistics.median(times), 'runs': times}
+
+
+def compare(results, baseline, threshold):
+	regressions = []
+	for key, result in results.items():
+		base = baseline.get(key)
+		if not base or 'min' not in base or 'min' not in result or base['min'] <= 0:
+			continue
+		ratio = result['min'] / base['min']
+		result['baseline_min'] = base['min']
+		result['ratio'] = ratio
+		if ratio > 1 + threshold:
+			regressions.append((key, ratio))
+	return regressions
+
+
+def main():
+	textools = load_addon()
+	results = {}
+	mismatches = []
+
+	for case in ARGS.cases.split(','):
+		n_faces, n_islands, n_tiles = CASES[case]
+		if n_faces > ARGS.max_faces:
+			continue
+		bench = Bench(textools, case, n_faces, n_islands, n_tiles)
+		for name in ARGS.benchmarks.split(','):
+			key = f"{case}/{name}"
+			try:
+				result = run_benchmark(bench, BENCHMARKS[name])
+			except Exception as error:
+				result = {'error': f"{type(error).__name__}: {error}"}
+			if result is None:
+				continue
+			result.update(faces=n_faces, islands=n_islands, tiles=n_tiles)
+			results[key] = result
+			print(f"{key:40} " + (f"{result['min']:.4f}s" if 'min' in result else result['error']))
+
+			if ARGS.check and name in CHECKS:
+				try:
+					result['check'] = CHECKS[name](bench)
+				except Exception as error:
+					result['check'] = f"{type(error).__name__}: {error}"
+				print(f"{key + ' check':40} {result['check']}")
+				if isinstance(result['check'], str) or result['check'] > ARGS.check_tolerance:
+					mismatches.append(key)
+		bench.remove()
+
+	regressions = []
+	if ARGS.baseline:
+		with open(ARGS.baseline) as file:
+			regressions = compare(results, json.load(file)['results'], ARGS.threshold)
+
+	report = {
+		'meta': {
+			'blender': bpy.app.version_string,
+			'textools': '.'.join(map(str, textools.bl_info['version'])),
+			'platform': platform.platform(),
+			'python': platform.python_version(),
+			'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+			'repeat': ARGS.repeat,
+			'threshold': ARGS.threshold,
+		},
+		'results': results,
+		'regressions': [key for key, _ in regressions],
+		'mismatches': mismatches,
+	}
+	with open(ARGS.output, 'w') as file:
+		json.dump(report, file, indent=2)
+	print(f"Results written to {ARGS.output}")
+
+	for key, ratio in regressions:
+		print(f"REGRESSION {key}: {ratio:.2f}x the baseline time")
+	for key in mismatches:
+		print(f"MISMATCH {key}: output differs from the reference by {results[key]['check']}")
+	if regressions or mismatches:
+		sys.exit(1)
+
+
+
+ARGS = parse_args()
+
+if __name__ == '__main__':
+	main()
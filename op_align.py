@@ -38,11 +38,11 @@ class op(bpy.types.Operator):
 			bm = bmesh.from_edit_mesh(obj.data)
 			uv_layer = bm.loops.layers.uv.verify()
 			if _is_island_mode:
-				islands = utilities_uv.get_selected_islands(bm, uv_layer, selected=True)
+				islands = utilities_uv.get_selected_island_set(bm, uv_layer, selected=True)
 				if not islands:
 					continue
 				for island in islands:
-					bbox = BBox.calc_bbox_uv(island, uv_layer)
+					bbox = island.bbox
 					general_bbox.union(bbox)
 
 					all_groups.append((island, bbox, uv_layer))
@@ -739,6 +739,9 @@ def setup_image(color_report, mode, name, width, height, tiles, material_load=Fa
 			image.scale(width, height)
 
 	def set_image_as_background(image):
+		# No screen in background mode, e.g. the headless benchmarks
+		if not bpy.context.screen:
+			return
 		for area in bpy.context.screen.areas:
 			if area.ui_type == 'UV':
 				area.spaces[0].image = bpy.data.images[image.name]
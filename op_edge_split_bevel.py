@@ -52,8 +52,7 @@ def main(self, radius):
 
 
 	# Collect UV to Vert
-	vert_to_uv = utilities_uv.get_vert_to_uv(bm, uv_layers)
-	uv_to_vert = utilities_uv.get_uv_to_vert(bm, uv_layers)
+	vert_uv_index = utilities_uv.get_vert_uv_index(bm, uv_layers)
 
 	# Collect hard edges
 	edges = []
@@ -90,19 +89,19 @@ def main(self, radius):
 			# v0
 			if v0 not in vert_processed:
 				vert_processed.append(v0)
-				faces, origin, delta = slide_uvs(v0, edge, f0, edges, vert_rails, vert_to_uv)
+				faces, origin, delta = slide_uvs(v0, edge, f0, edges, vert_rails, vert_uv_index)
 				vert_uv_pos.append( {"v":v0, "f":f0, "origin":origin, "delta":delta, "faces":faces} )
 
-				faces, origin, delta = slide_uvs(v0, edge, f1, edges, vert_rails, vert_to_uv)
+				faces, origin, delta = slide_uvs(v0, edge, f1, edges, vert_rails, vert_uv_index)
 				vert_uv_pos.append( {"v":v0, "f":f1, "origin":origin, "delta":delta, "faces":faces} )
 
 			# V1
 			if v1 not in vert_processed:
 				vert_processed.append(v1)
-				faces, origin, delta = slide_uvs(v1, edge, f0, edges, vert_rails, vert_to_uv)
+				faces, origin, delta = slide_uvs(v1, edge, f0, edges, vert_rails, vert_uv_index)
 				vert_uv_pos.append( {"v":v1, "f":f0, "origin":origin, "delta":delta, "faces":faces} )
 				
-				faces, origin, delta = slide_uvs(v1, edge, f1, edges, vert_rails, vert_to_uv)
+				faces, origin, delta = slide_uvs(v1, edge, f1, edges, vert_rails, vert_uv_index)
 				vert_uv_pos.append( {"v":v1, "f":f1, "origin":origin, "delta":delta, "faces":faces} )
 	
 	# ...
@@ -135,7 +134,7 @@ def main(self, radius):
 
 
 
-def slide_uvs(vert, edge, face, edges, vert_rails, vert_to_uv):
+def slide_uvs(vert, edge, face, edges, vert_rails, vert_uv_index):
 	
 	def IS_DEBUG():
 		return vert.index == 64 and edge.verts[0].index == 64 and edge.verts[1].index == 63
@@ -223,8 +222,8 @@ def slide_uvs(vert, edge, face, edges, vert_rails, vert_to_uv):
 			elif e.verts[1] in verts_edges:
 				v0 = e.verts[1]
 				v1 = e.verts[0]
-			uv0 = vert_to_uv[v0][0].uv
-			uv1 = vert_to_uv[v1][0].uv
+			uv0 = Vector(vert_uv_index.first_uv(v0.index))
+			uv1 = Vector(vert_uv_index.first_uv(v1.index))
 			delta += (uv1-uv0).normalized()
 			count += 1.0
 
@@ -233,7 +232,7 @@ def slide_uvs(vert, edge, face, edges, vert_rails, vert_to_uv):
 	if IS_DEBUG():
 		print("\r")
 
-	return faces, vert_to_uv[vert][0].uv.copy(), delta.normalized()
+	return faces, Vector(vert_uv_index.first_uv(vert.index)), delta.normalized()
 	# print("	V{} = {}".format(v.index, avg_uv_delta))
 
 	# for loop in face.loops:
@@ -1,7 +1,7 @@
 import bpy
 import bmesh
+import numpy as np
 
-from mathutils import Vector
 from . import utilities_uv
 from .utilities_bbox import BBox
 
@@ -29,7 +29,7 @@ class op(bpy.types.Operator):
 		general_bbox = BBox()
 		all_groups = []
 		update_obj = []
-		bmeshes = []  # bmesh objects must be saved, otherwise they will be deallocated
+		island_sets = []  # island sets hold their bmesh, otherwise it would be deallocated
 		selected_objs = utilities_uv.selected_unique_objects_in_mode_with_uv()
 
 		if not selected_objs:
@@ -39,19 +39,20 @@ class op(bpy.types.Operator):
 		for obj in selected_objs:
 			bm = bmesh.from_edit_mesh(obj.data)
 			uv_layer = bm.loops.layers.uv.verify()
-			islands = utilities_uv.get_selected_islands(bm, uv_layer, selected=False, extend_selection_to_islands=True)
+			islands = utilities_uv.get_selected_island_set(bm, uv_layer, selected=False, extend_selection_to_islands=True)
 			if not islands:
 				continue
-			for i, island in enumerate(islands):
-				bbox_pre = BBox.calc_bbox_uv(island, uv_layer)
-				general_bbox.union(bbox_pre)
-				if self.align:
-					angle = utilities_uv.calc_min_align_angle(island, uv_layer)
-					utilities_uv.rotate_island(island, uv_layer, angle)
+			for island in islands:
+				general_bbox.union(island.bbox)
+			if self.align:
+				angles = np.array([utilities_uv.calc_min_align_angle_pt(island.uvs().tolist()) for island in islands])
+				rotated = np.flatnonzero(np.abs(angles) >= 1e-05)
+				if len(rotated):
+					islands.rotate(angles[rotated], indices=rotated, write=False)
 
-				bbox = BBox.calc_bbox_uv(island, uv_layer) if self.align else bbox_pre
-				all_groups.append((island, bbox, uv_layer))
-			bmeshes.append(bm)
+			for island in islands:
+				all_groups.append((island, island.bbox))
+			island_sets.append(islands)
 			update_obj.append(obj)
 
 		if not all_groups:
@@ -60,23 +61,20 @@ class op(bpy.types.Operator):
 		all_groups.sort(key=lambda x: x[1].max_lenght, reverse=True)
 
 		# transform
-		if self.is_vertical:
-			margin_x = general_bbox.xmin
-			margin_y = general_bbox.ymin
+		margin_x = general_bbox.xmin
+		margin_y = general_bbox.ymin
+		deltas = {islands: np.zeros((len(islands), 2)) for islands in island_sets}
 
-			for island, bbox, uv_layer in all_groups:
-				delta = Vector((margin_x, margin_y)) - bbox.left_bottom
-				utilities_uv.translate_island(island, uv_layer, delta)
+		for island, bbox in all_groups:
+			deltas[island.islands][island.index] = (margin_x - bbox.xmin, margin_y - bbox.ymin)
+			if self.is_vertical:
 				margin_y += self.padding + bbox.height
-		else:
-			margin_x = general_bbox.xmin
-			margin_y = general_bbox.ymin
-
-			for island, bbox, uv_layer in all_groups:
-				delta = Vector((margin_x, margin_y)) - bbox.min
-				utilities_uv.translate_island(island, uv_layer, delta)
+			else:
 				margin_x += self.padding + bbox.width
 
+		for islands, delta in deltas.items():
+			islands.translate(delta)
+
 		for obj in update_obj:
 			bmesh.update_edit_mesh(obj.data)
 
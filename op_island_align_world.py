@@ -4,9 +4,10 @@ import numpy as np
 
 from mathutils import Vector
 from . import utilities_uv
+from . import utilities_spatial
 
 
-precision = 5
+epsilon = 1e-5
 
 
 
@@ -38,17 +39,18 @@ class op(bpy.types.Operator):
 
 
 	def execute(self, context):
-		utilities_uv.multi_object_loop(main, self, context)
+		utilities_uv.multi_object_loop(main, self, context, edit_session=True)
+		utilities_uv.report_mode_switches_avoided(self)
 		return {'FINISHED'}
 
 
 
-def main(self, context):
+def main(self, context, me=None, bm=None, uv_layers=None):
 	selection_mode = bpy.context.scene.tool_settings.uv_select_mode
-	obj = bpy.context.active_object
-	me = obj.data
-	bm = bmesh.from_edit_mesh(me)
-	uv_layers = bm.loops.layers.uv.verify()
+	if bm is None:
+		me = bpy.context.active_object.data
+		bm = bmesh.from_edit_mesh(me)
+		uv_layers = bm.loops.layers.uv.verify()
 	sync = bpy.context.scene.tool_settings.use_uv_select_sync
 
 	if sync:
@@ -87,8 +89,9 @@ def main(self, context):
 				calc_edges = set()
 				island_edges = {edge for face in pre_calc_faces for edge in face.edges}
 				island_loops = {loop for face in pre_calc_faces for loop in face.loops}
+				uv_hash = utilities_spatial.UVHash.from_loops(island_loops, uv_layers, epsilon)
 				for edge in island_edges:
-					if len({loop[uv_layers].uv.to_tuple(precision) for vert in edge.verts for loop in vert.link_loops if loop in island_loops}) == 2:
+					if len({uv_hash.label(loop) for vert in edge.verts for loop in vert.link_loops if loop in island_loops}) == 2:
 						calc_edges.add(edge)
 						for loop in edge.link_loops:
 							if loop in island_loops:
@@ -121,7 +124,7 @@ def main(self, context):
 		else:	#(self.axis == '-1' and abs(avg_normal.x) == max_size) or self.axis == '0':
 			align_island(self, me, bm, uv_layers, faces, calc_loops, y, z, avg_normal.x < 0, False)
 
-	bmesh.update_edit_mesh(obj.data)
+	bmesh.update_edit_mesh(me)
 
 	# Workaround for selection not flushing properly from loops to EDGE Selection Mode, apparently since UV edge selection support was added to the UV space
 	if not sync:
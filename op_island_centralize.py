@@ -1,9 +1,8 @@
 import bpy
 import bmesh
+import numpy as np
 
 from . import utilities_uv
-from .utilities_bbox import BBox
-from mathutils import Vector
 
 
 
@@ -32,19 +31,15 @@ class op(bpy.types.Operator):
         for obj in selected_objs:
             bm = bmesh.from_edit_mesh(obj.data)
             uv_layer = bm.loops.layers.uv.verify()
-            islands = utilities_uv.get_selected_islands(bm, uv_layer)
+            islands = utilities_uv.get_selected_island_set(bm, uv_layer)
 
             if not islands:
                 continue
 
-            changed = False
-            for island in islands:
-                center = BBox.calc_bbox_uv(island, uv_layer).center
-                delta = Vector((round(-center.x + 0.5) + column, round(-center.y + 0.5) + row))
-                if delta != Vector((0, 0)):
-                    changed = True
-                    utilities_uv.translate_island(island, uv_layer, delta)
-            if changed:
+            deltas = np.column_stack((np.round(0.5 - islands.center[:, 0]) + column, np.round(0.5 - islands.center[:, 1]) + row))
+            moved = np.flatnonzero(deltas.any(axis=1))
+            if len(moved):
+                islands.translate(deltas[moved], indices=moved)
                 update_obj.append(obj)
                 
         if not update_obj:
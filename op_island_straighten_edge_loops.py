@@ -1,14 +1,18 @@
 import bpy
 import bmesh
+import numpy as np
 
 from math import copysign
 from mathutils import Vector
 from collections import defaultdict
 from itertools import chain
 from . import utilities_uv
+from . import utilities_spatial
+from . import utilities_islands
+from . import utilities_cache
 
 
-precision = 5
+epsilon = 1e-5
 
 
 
@@ -17,6 +21,12 @@ class op(bpy.types.Operator):
 	bl_label = "Straight edges chain"
 	bl_description = "Straighten selected edge-chain and relax the rest of the UV Island"
 	bl_options = {'REGISTER', 'UNDO'}
+
+	method : bpy.props.EnumProperty(items=
+		[('UNWRAP', 'Unwrap Island', 'Unwrap the whole island around the straightened edges'),
+		('LOCAL', 'Local', 'Keep the island layout and only relax a band of faces around the straightened edges')],
+		name = "Method", default = 'UNWRAP')
+	rings : bpy.props.IntProperty(name="Rings", description="Width of the relaxed band around the straightened edges, in edges", min=1, soft_max=10, default=3)
 	
 	@classmethod
 	def poll(cls, context):
@@ -56,20 +66,40 @@ def main(self, context):
 
 	islands = utilities_uv.getSelectionIslands(bm, uv_layers, extend_selection_to_islands=True, selected_faces=set(selected_faces_loops.keys()))
 
+	if self.method == 'LOCAL':
+		la = utilities_cache.get_loop_arrays(bm, uv_layers)
+		index = utilities_islands.VertUVIndex.from_loop_arrays(la)
+		changed = []
+
 	for island in islands:
 		selected_loops_island = {loop for face in island.intersection(selected_faces_loops.keys()) for loop in selected_faces_loops[face]}
 
-		openSegment = get_loops_segments(self, bm, uv_layers, selected_loops_island)
+		# Coincident UVs of the island and of the faces across its selected edges
+		island_loops = (loop for face in island for loop in face.loops)
+		radial_loops = (loop.link_loop_radial_next.link_loop_next for loop in selected_loops_island)
+		uv_hash = utilities_spatial.UVHash.from_loops(chain(island_loops, radial_loops), uv_layers, epsilon)
+
+		openSegment = get_loops_segments(self, bm, uv_layers, selected_loops_island, uv_hash)
 		if not openSegment:
 			continue
 
-		straighten(self, bm, uv_layers, island, openSegment)
+		if self.method == 'LOCAL':
+			node_loops = straighten_segment(uv_layers, openSegment, uv_hash)
+			changed.append(relax_band(la, index, island, node_loops, uv_layers, self.rings))
+		else:
+			straighten(self, bm, uv_layers, island, openSegment, uv_hash)
+
+	if self.method == 'LOCAL':
+		if changed:
+			la.write_uvs(np.concatenate(changed))
+		bmesh.update_edit_mesh(bpy.context.active_object.data, loop_triangles=False, destructive=False)
+		return
 
 	utilities_uv.selection_restore(bm, uv_layers, restore_seams=True)
 
 
 
-def straighten(self, bm, uv_layers, island, segment_loops):
+def straighten(self, bm, uv_layers, island, segment_loops, uv_hash):
 	bpy.ops.uv.select_all(action='DESELECT')
 	bpy.ops.mesh.select_all(action='DESELECT')
 	for face in island:
@@ -80,6 +110,27 @@ def straighten(self, bm, uv_layers, island, segment_loops):
 	# Make edges of the island bounds seams temporarily for a more predictable result
 	bpy.ops.uv.seams_from_islands(mark_seams=True, mark_sharp=False)
 
+	node_loops = straighten_segment(uv_layers, segment_loops, uv_hash)
+	newly_pinned = set()
+	for nodeLoop in chain.from_iterable(node_loops):
+		if not nodeLoop[uv_layers].pin_uv:
+			nodeLoop[uv_layers].pin_uv = True
+			newly_pinned.add(nodeLoop)
+	
+	try:	# Unwrapping may fail on certain mesh topologies
+		bpy.ops.uv.unwrap(method='ANGLE_BASED', fill_holes=True, correct_aspect=True, use_subsurf_data=False, margin=0)
+	except:
+		self.report({'ERROR_INVALID_INPUT'}, "Unwrapping failed, unsupported island topology." )
+		pass
+
+	for nodeLoop in newly_pinned:
+		nodeLoop[uv_layers].pin_uv = False
+
+
+
+def straighten_segment(uv_layers, segment_loops, uv_hash):
+	"""Lay the nodes of the segment on a horizontal or vertical line from its first node, keeping the edge lengths.
+	Returns the loops of every node, the first node staying in place."""
 	bbox = segment_loops[-1][uv_layers].uv - segment_loops[0][uv_layers].uv
 	straighten_in_x = True
 	sign = copysign(1, bbox.x)
@@ -87,51 +138,118 @@ def straighten(self, bm, uv_layers, island, segment_loops):
 		straighten_in_x = False
 		sign = copysign(1, bbox.y)
 
-	origin = segment_loops[0][uv_layers].uv
+	origin = segment_loops[0][uv_layers].uv.copy()
 	edge_lengths = []
 	length = 0
-	newly_pinned = set()
 
 	for i, loop in enumerate(segment_loops):
 		if i > 0:
 			vect = loop[uv_layers].uv - segment_loops[i-1][uv_layers].uv
 			edge_lengths.append(vect.length)
 
-	for i, loop in enumerate(segment_loops):
-		if i == 0:
-			if not loop[uv_layers].pin_uv:
-				loop[uv_layers].pin_uv = True
-				newly_pinned.add(loop)
-		else:
-			length += edge_lengths[i-1]
-			for nodeLoop in loop.vert.link_loops:
-				if nodeLoop[uv_layers].uv.to_tuple(precision) == loop[uv_layers].uv.to_tuple(precision):
-					if straighten_in_x:
-						nodeLoop[uv_layers].uv = origin + Vector((sign*length, 0))
-					else:
-						nodeLoop[uv_layers].uv = origin + Vector((0, sign*length))
-					if not nodeLoop[uv_layers].pin_uv:
-						nodeLoop[uv_layers].pin_uv = True
-						newly_pinned.add(nodeLoop)
-	
-	try:	# Unwrapping may fail on certain mesh topologies
-		bpy.ops.uv.unwrap(method='ANGLE_BASED', fill_holes=True, correct_aspect=True, use_subsurf_data=False, margin=0)
-	except:
-		self.report({'ERROR_INVALID_INPUT'}, "Unwrapping failed, unsupported island topology." )
-		pass
-
-	for nodeLoop in newly_pinned:
-		nodeLoop[uv_layers].pin_uv = False
-
+	# Loops of the same vertex sharing the UV of each node, looked up before anything moves
+	node_loops = [[nodeLoop for nodeLoop in uv_hash.query_items(loop[uv_layers].uv) if nodeLoop.vert == loop.vert] for loop in segment_loops]
 
-
-def get_loops_segments(self, bm, uv_layers, island_loops_dirty):
+	node_loops[0] = [segment_loops[0]]
+	for i in range(1, len(segment_loops)):
+		length += edge_lengths[i-1]
+		for nodeLoop in node_loops[i]:
+			if straighten_in_x:
+				nodeLoop[uv_layers].uv = origin + Vector((sign*length, 0))
+			else:
+				nodeLoop[uv_layers].uv = origin + Vector((0, sign*length))
+
+	return node_loops
+
+
+
+def relax_band(la, index, island, node_loops, uv_layers, rings):
+	"""Carry the moves of the straightened nodes over the UV vertices of the island up to rings edges away from them,
+	with a harmonic displacement solved by conjugate gradients; the rest of the island, pins and vertices shared
+	with other faces stay in place. Writes la.uv and returns the changed loops."""
+	node = index.loop_bucket
+	n_nodes = len(index.bucket_uv)
+	face_mask = la.faces_mask(island)
+	loop_mask = face_mask[la.face]
+	loops = np.flatnonzero(loop_mask)
+
+	# Displacement of the straightened nodes, known from their new UVs
+	moved = [loop_index(la, loop) for loop in chain.from_iterable(node_loops)]
+	new_uv = np.array([loop[uv_layers].uv for loop in chain.from_iterable(node_loops)], dtype=np.float64).reshape(-1, 2)
+	displacement = np.zeros((n_nodes, 2))
+	displacement[node[moved]] = new_uv - la.uv[moved]
+	segment = np.zeros(n_nodes, dtype=bool)
+	segment[node[moved]] = True
+
+	pins = np.fromiter((luv.pin_uv for luv in la.luvs), dtype=bool, count=len(la.luvs))
+	fixed = segment.copy()
+	fixed[node[~loop_mask | pins]] = True
+
+	nxt = la.loop_next[loops]
+	edges = np.unique(np.sort(np.column_stack((node[loops], node[nxt])), axis=1), axis=0)
+	edges = edges[edges[:, 0] != edges[:, 1]]
+	a, b = edges[:, 0], edges[:, 1]
+
+	# The band: vertices reached from the segment in at most rings steps
+	band = segment.copy()
+	for _ in range(rings):
+		reached = band.copy()
+		reached[b[band[a]]] = True
+		reached[a[band[b]]] = True
+		band = reached
+	band &= ~fixed
+	if not band.any():
+		return np.zeros(0, dtype=np.int64)
+
+	# Uniform Laplacian over the band, the other vertices giving its boundary conditions
+	degree = (np.bincount(a, minlength=n_nodes) + np.bincount(b, minlength=n_nodes)).astype(np.float64)
+	def laplacian(d):
+		neighbours = np.column_stack([np.bincount(a, d[b, i], minlength=n_nodes) + np.bincount(b, d[a, i], minlength=n_nodes) for i in range(2)])
+		return degree[:, None] * d - neighbours
+
+	rhs = -laplacian(np.where(band[:, None], 0.0, displacement))
+	rhs[~band] = 0
+	x = np.zeros((n_nodes, 2))
+	r = rhs.copy()
+	p = r.copy()
+	rr = (r * r).sum(axis=0)
+	tolerance = max(rr.max(), 1e-30) * 1e-20
+	for _ in range(max(int(band.sum()), 1) * 2):
+		if rr.max() <= tolerance:
+			break
+		ap = laplacian(p)
+		ap[~band] = 0
+		pap = (p * ap).sum(axis=0)
+		alpha = np.divide(rr, pap, out=np.zeros(2), where=pap > 0)
+		x += alpha * p
+		r -= alpha * ap
+		rr_new = (r * r).sum(axis=0)
+		beta = np.divide(rr_new, rr, out=np.zeros(2), where=rr > 0)
+		p = r + beta * p
+		rr = rr_new
+
+	changed = loops[band[node[loops]]]
+	la.uv[changed] = index.bucket_uv[node[changed]] + x[node[changed]]
+	return changed
+
+
+
+def loop_index(la, loop):
+	"""Index of a BMLoop in the loop arrays"""
+	face = loop.face
+	for i, other in enumerate(face.loops, int(la.face_start[face.index])):
+		if other == loop:
+			return i
+
+
+
+def get_loops_segments(self, bm, uv_layers, island_loops_dirty, uv_hash):
 	island_loops = set()
 	island_loops_nexts = set()
 	processed_edges = set()
 	processed_coords = defaultdict(list)
 	start_loops = []
-	boundary_splitted_edges = {loop.edge for loop in island_loops_dirty if (not loop.edge.is_boundary) and loop[uv_layers].uv.to_tuple(precision) != loop.link_loop_radial_next.link_loop_next[uv_layers].uv.to_tuple(precision)}
+	boundary_splitted_edges = {loop.edge for loop in island_loops_dirty if (not loop.edge.is_boundary) and not uv_hash.same(loop, loop.link_loop_radial_next.link_loop_next)}
 
 	for loop in island_loops_dirty:
 		if loop.link_loop_next in island_loops_dirty and (loop.edge in boundary_splitted_edges or loop.edge not in processed_edges):
@@ -144,7 +262,7 @@ def get_loops_segments(self, bm, uv_layers, island_loops_dirty):
 		return None
 
 	for loop in chain(island_loops, island_loops_nexts):
-		processed_coords[loop[uv_layers].uv.to_tuple(precision)].append(loop)
+		processed_coords[uv_hash.label(loop)].append(loop)
 
 	for node_loops in processed_coords.values():
 		if len(node_loops) > 2:
@@ -193,20 +311,20 @@ def get_loops_segments(self, bm, uv_layers, island_loops_dirty):
 			def get_prev(found_prev):
 				if found_prev:
 					for foundLoop in found_prev:
-						if foundLoop[uv_layers].uv.to_tuple(precision) == loop.link_loop_prev[uv_layers].uv.to_tuple(precision):
+						if uv_hash.same(foundLoop, loop.link_loop_prev):
 							segment.append(foundLoop)
 							for anyLoop in found_prev:
-								if anyLoop[uv_layers].uv.to_tuple(precision) == loop.link_loop_prev[uv_layers].uv.to_tuple(precision):
+								if uv_hash.same(anyLoop, loop.link_loop_prev):
 									island_nodal_loops.remove(anyLoop)
 							return foundLoop, False
 				return None, True
 
 			def get_next(found_next):
 				for foundLoop in found_next:
-					if foundLoop[uv_layers].uv.to_tuple(precision) == loop.link_loop_next[uv_layers].uv.to_tuple(precision):
+					if uv_hash.same(foundLoop, loop.link_loop_next):
 						segment.append(foundLoop)
 						for anyLoop in found_next:
-							if anyLoop[uv_layers].uv.to_tuple(precision) == loop.link_loop_next[uv_layers].uv.to_tuple(precision):
+							if uv_hash.same(anyLoop, loop.link_loop_next):
 								island_nodal_loops.remove(anyLoop)
 						return foundLoop, False
 				get_prev(set(island_nodal_loops).intersection(loop.link_loop_prev.vert.link_loops))
@@ -0,0 +1,97 @@
+import bpy
+import bmesh
+import numpy as np
+
+from . import utilities_uv
+from . import utilities_islands
+from . import utilities_cache
+
+
+
+class op(bpy.types.Operator):
+	bl_idname = "uv.textools_island_unify"
+	bl_label = "Unify Duplicates"
+	bl_description = "Copy the UV layout of the first island of every set of identical islands to the other ones"
+	bl_options = {'REGISTER', 'UNDO'}
+
+	placement : bpy.props.EnumProperty(items=
+		[('STACK', 'Stack', 'Place the copies onto the source island'),
+		('IN_PLACE', 'In Place', 'Keep every copy at the center of its previous layout')],
+		name = "Placement", default = 'STACK')
+
+	@classmethod
+	def poll(cls, context):
+		if bpy.context.area.ui_type != 'UV':
+			return False
+		if not bpy.context.active_object:
+			return False
+		if bpy.context.active_object.type != 'MESH':
+			return False
+		if bpy.context.active_object.mode != 'EDIT':
+			return False
+		if not bpy.context.object.data.uv_layers:
+			return False
+		return True
+
+
+	def execute(self, context):
+		return unify(self, self.placement)
+
+
+
+def unify(self, placement):
+	"""Group the islands touched by the selection with a fingerprint index and transfer the layout of every group source"""
+	objs = utilities_uv.selected_unique_objects_in_mode_with_uv()
+	las = []
+	island_lists = []
+	matchers = []
+	for obj in objs:
+		bm = bmesh.from_edit_mesh(obj.data)
+		la = utilities_cache.get_loop_arrays(bm, bm.loops.layers.uv.verify())
+		islands = utilities_uv.get_selected_islands_indices(la, selected=False, extend_selection_to_islands=True)
+		las.append(la)
+		island_lists.append(islands)
+		mask = np.zeros(len(la.faces), dtype=bool)
+		if islands:
+			mask[np.concatenate(islands)] = True
+		matchers.append(utilities_islands.IslandMatcher(la, mask))
+
+	index = utilities_islands.IslandFingerprints(las, island_lists)
+	groups = index.groups()
+	if not groups:
+		self.report({'INFO'}, "No identical islands found")
+		return {'CANCELLED'}
+
+	written = [[] for _ in las]
+	n_copies = 0
+	n_failed = 0
+	for group in groups:
+		group = np.sort(group)
+		source_obj, source_faces = index.islands[group[0]]
+		source = matchers[source_obj]
+		source_uv = las[source_obj].uv
+		for island in group[1:].tolist():
+			obj_index, faces = index.islands[island]
+			loops = source.match(source_faces, matchers[obj_index], faces)
+			if loops is None:
+				n_failed += 1
+				continue
+			src, dst = loops
+			uv = las[obj_index].uv
+			layout = source_uv[src].astype(np.float64)
+			if placement == 'IN_PLACE':
+				layout += uv[dst].mean(axis=0) - layout.mean(axis=0)
+			uv[dst] = layout
+			written[obj_index].append(dst)
+			n_copies += 1
+
+	for obj, la, loops in zip(objs, las, written):
+		if loops:
+			la.write_uvs(np.concatenate(loops))
+			bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
+
+	message = f"{n_copies} islands unified in {len(groups)} sets"
+	if n_failed:
+		message += f", {n_failed} islands without a matching loop order"
+	self.report({'INFO'}, message)
+	return {'FINISHED'}
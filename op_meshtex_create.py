@@ -1,8 +1,11 @@
 import bpy
 import bmesh
+import numpy as np
 
-from . import utilities_uv
-from . import op_select_islands_outline
+from itertools import chain
+from . import settings
+from . import utilities_islands
+from . import utilities_cache
 
 
 class op(bpy.types.Operator):
@@ -29,146 +32,117 @@ class op(bpy.types.Operator):
 
 
 
-def create_uv_mesh(self, context, obj, sk_create=True, bool_scale=True, delete_unselected=True, restore_selected=False):
-	# New object management
-	mode = bpy.context.active_object.mode
-	bpy.ops.object.mode_set(mode='OBJECT')
-	bpy.ops.object.select_all(action='DESELECT')
+def create_uv_mesh(self, context, obj, sk_create=True, bool_scale=True):
+	"""New object with a mesh laid out like the selected UVs of obj, built straight from the loop buffers:
+	one vertex per (vertex, UV) pair. With sk_create its basis 'model' keeps the 3D shape and the 'uv' shape key
+	holds the layout; with bool_scale the layout is scaled to the size of the model."""
+	mode = obj.mode
+	me_source = obj.data
 
+	if mode == 'EDIT':
+		bm = bmesh.from_edit_mesh(me_source)
+		la = utilities_cache.get_loop_arrays(bm, bm.loops.layers.uv.verify())
+		face_mask = ~la.face_hide & la.face_select
+		if not bpy.context.scene.tool_settings.use_uv_select_sync:
+			face_mask &= la.face_all(la.uv_select)
+		material_index = np.fromiter((f.material_index for f in la.faces), dtype=np.int32, count=len(la.faces))
+	else:
+		bm = None
+		la = utilities_islands.LoopArrays.from_mesh(me_source)
+		face_mask = ~la.face_hide
+		material_index = np.empty(len(la.faces), dtype=np.int32)
+		me_source.polygons.foreach_get('material_index', material_index)
+
+	if not face_mask.any():
+		return {'CANCELLED'}
+
+	# One vertex per distinct (vertex, UV) pair of the kept faces
+	loops = np.flatnonzero(face_mask[la.face])
+	keys = np.column_stack((la.vert[loops], la.uv[loops].view(np.int32)))
+	nodes, loop_vert = np.unique(keys, axis=0, return_inverse=True)
+	loop_vert = loop_vert.ravel()
+	first_loop = np.zeros(len(nodes), dtype=np.int64)
+	first_loop[loop_vert] = loops
+
+	co_model = la.co[la.vert[first_loop]]
+	co_uv = np.zeros((len(nodes), 3))
+	co_uv[:, :2] = la.uv[first_loop]
+
+	faces = np.flatnonzero(face_mask)
+	face_size = la.face_size[faces]
+	face_start = np.zeros(len(faces), dtype=np.int32)
+	np.cumsum(face_size[:-1], out=face_start[1:])
+
+	if bool_scale:
+		# Ratio of the first edge of every face, in the model and in UV space
+		first = la.face_start[faces]
+		second = la.loop_next[first]
+		length_uv = np.linalg.norm(la.uv[second].astype(np.float64) - la.uv[first], axis=1).sum()
+		length_view = np.linalg.norm(la.co[la.vert[second]] - la.co[la.vert[first]], axis=1).sum()
+		if length_uv > 0 and length_view > 0:
+			co_uv *= length_view / length_uv
+
+	# Every UV map of the source
+	uv_maps = []
+	for layer in (me_source.uv_layers if bm is None else bm.loops.layers.uv.values()):
+		if layer.name == la.uv_name:
+			uv = la.uv
+		elif bm is None:
+			uv = np.empty(len(la.face) * 2, dtype=np.float32)
+			layer.data.foreach_get('uv', uv)
+		else:
+			uv = np.fromiter(chain.from_iterable(l[layer].uv for f in la.faces for l in f.loops), dtype=np.float32, count=len(la.face)*2)
+		uv_maps.append((layer.name, uv.reshape(-1, 2)[loops]))
+
+	# Mesh data can be added in any mode, so the source keeps its mode and edit session
+	me = bpy.data.meshes.new(obj.name + "_UV_Mesh")
+	me.vertices.add(len(nodes))
+	me.loops.add(len(loops))
+	me.polygons.add(len(faces))
+	me.vertices.foreach_set('co', (co_model if sk_create else co_uv).astype(np.float32).ravel())
+	me.loops.foreach_set('vertex_index', loop_vert.astype(np.int32))
+	me.polygons.foreach_set('loop_start', face_start)
+	if settings.bversion < 3.6:
+		me.polygons.foreach_set('loop_total', face_size)
+	me.polygons.foreach_set('material_index', material_index[faces])
+	for material in me_source.materials:
+		me.materials.append(material)
+
+	for name, uv in uv_maps:
+		me.uv_layers.new(name=name).data.foreach_set('uv', uv.ravel())
+	me.uv_layers.active = me.uv_layers[la.uv_name]
+	me.update(calc_edges=True)
+	if mode == 'EDIT':
+		for elements in (me.vertices, me.edges, me.polygons):
+			elements.foreach_set('select', np.ones(len(elements), dtype=bool))
+
+	# The source object is only read; the copy keeps its transforms, modifiers and material slots
 	mesh_obj = obj.copy()
-	mesh_obj.data = obj.data.copy()
+	mesh_obj.data = me
+	mesh_obj.name = obj.name + "_UV_Mesh"
 	obj.users_collection[0].objects.link(mesh_obj)
-
-	mesh_obj.select_set( state = True, view_layer = None)
-	bpy.context.view_layer.objects.active = mesh_obj
-	
-	obj_name = mesh_obj.name = obj.name + "_UV_Mesh"
-
-	# Shape Keys management
-	if mesh_obj.data.shape_keys:
-		if len(mesh_obj.data.shape_keys.key_blocks) > 1:
-			for i in range(len(mesh_obj.data.shape_keys.key_blocks)):
-				bpy.context.object.active_shape_key_index = 0
-				bpy.ops.object.shape_key_remove(all=False)
 	if sk_create:
-		mesh_obj.shape_key_add(name="model", from_mix=True)
-		mesh_obj.shape_key_add(name="uv", from_mix=True)
+		mesh_obj.shape_key_add(name="model", from_mix=False)
+		key_uv = mesh_obj.shape_key_add(name="uv", from_mix=False)
+		key_uv.data.foreach_set('co', co_uv.astype(np.float32).ravel())
+		key_uv.value = 1
 		mesh_obj.active_shape_key_index = 1
-		bpy.context.active_object.active_shape_key.value = 1
-
-	bpy.ops.object.mode_set(mode='EDIT')
 
-	selection_mode = bpy.context.scene.tool_settings.uv_select_mode
-	pre_sync = bpy.context.scene.tool_settings.use_uv_select_sync
-	if pre_sync == True:
-		bpy.context.scene.tool_settings.use_uv_select_sync = False
-		bpy.ops.uv.select_all(action='SELECT')
-
-	# Select all if OBJECT mode
 	if mode == 'OBJECT':
-		bpy.ops.mesh.select_all(action='SELECT')
-		bpy.ops.uv.select_all(action='SELECT')
-
-	# Select only UV faces
-	bpy.ops.uv.select_split()
-
-	bm = bmesh.from_edit_mesh(mesh_obj.data)
-	uv_layers = bm.loops.layers.uv.verify()
-
-	faces_by_island = utilities_uv.getSelectionIslands(bm, uv_layers, need_faces_selected=False)
-
-	if not faces_by_island:
-		bpy.data.objects.remove(bpy.data.objects[obj_name], do_unlink=True)
-		obj.select_set( state = True, view_layer = None)
-		bpy.context.view_layer.objects.active = obj
-		bpy.context.scene.tool_settings.use_uv_select_sync = pre_sync
-		bpy.ops.object.mode_set(mode=mode)
-		if not restore_selected:
-			return {'CANCELLED'}
-		else:	# For the Relax operator
-			return {'CANCELLED'}, None, None
-
-	if delete_unselected:
-		if mode != 'OBJECT':
-			delete_faces = list({face for faces in faces_by_island for face in faces}.symmetric_difference(bm.faces))
-			if delete_faces:
-				bmesh.ops.delete(bm, geom=delete_faces, context='FACES')
-	else:	# Needed for the Relax operator
-	 	#for face in {face for faces in faces_by_island for face in faces}.symmetric_difference(bm.faces):
-		#	if face.select:
-		#		face.select_set(False)
-		#bpy.ops.mesh.split()
-		bpy.ops.mesh.select_all(action='DESELECT')
-		selection_loops = {loop for faces in faces_by_island for face in faces for loop in face.loops}
-		for faces in faces_by_island:
-			for face in faces:
-				for edge in face.edges:
-					if not set(edge.link_loops).issubset(selection_loops):
-						edge.select_set(True)
-		bpy.ops.mesh.edge_split(type='EDGE')
-		bmesh.update_edit_mesh(mesh_obj.data)
-		bpy.ops.mesh.select_all(action='SELECT')	#TODO REFINE
-
-	bpy.context.scene.tool_settings.use_uv_select_sync = True
-	op_select_islands_outline.select_outline(self, context, bm, uv_layers)
-	bpy.ops.mesh.edge_split(type='EDGE')
-	bmesh.update_edit_mesh(mesh_obj.data)
-
-	bpy.context.scene.tool_settings.use_uv_select_sync = False
-	bpy.ops.mesh.select_all(action='SELECT')	#TODO REFINE
-	if pre_sync == True:
-		bpy.ops.uv.select_all(action='SELECT')
-
-	if bool_scale:
-		length_view = 0
-		length_uv = 0
-		for faces in faces_by_island:
-			for face in faces:
-				length_uv += (face.loops[0].link_loop_next[uv_layers].uv - face.loops[0][uv_layers].uv).length
-				length_view += face.loops[0].edge.calc_length()
-
-	# Reshape mesh to mimic UVs
-	for faces in faces_by_island:
-		for face in faces:
-			for loop in face.loops:
-				loop.vert.co = (loop[uv_layers].uv.x, loop[uv_layers].uv.y, 0)
-
-	#Scale
-	if bool_scale:
-		if length_uv > 0 and length_view > 0:
-			scale = length_view / length_uv
-		else:
-			scale = 1
-
-		scaled_verts = set()
-		for faces in faces_by_island:
-			for face in faces:
-				for loop in face.loops:
-					if loop.vert not in scaled_verts:
-						loop.vert.co *= scale
-						scaled_verts.add(loop.vert)
-
-	#bm.select_flush(True)
-	bpy.context.scene.tool_settings.use_uv_select_sync = pre_sync
-
-	if restore_selected:	# For the Relax operator
-		bpy.ops.uv.select_all(action='DESELECT')
-		for faces in faces_by_island:
-			for face in faces:
-				for loop in face.loops:
-					loop[uv_layers].select = True
-
-	if mode == 'EDIT' and not restore_selected:
-		# Workaround for selection not flushing properly from loops to EDGE Selection Mode, apparently since UV edge selection support was added to the UV space
-		bpy.ops.uv.select_mode(type='VERTEX')
-		bpy.context.scene.tool_settings.uv_select_mode = selection_mode
-		bpy.ops.object.mode_set(mode='OBJECT')
-		bpy.ops.object.mode_set(mode=mode)
+		for selected in bpy.context.selected_objects:
+			selected.select_set(False)
+		mesh_obj.select_set(True)
+		bpy.context.view_layer.objects.active = mesh_obj
+	elif mode == 'EDIT':
+		# The UV mesh joins the edit session next to the source, which keeps its unsaved edits;
+		# only the new object is selected while entering, so no other object is toggled
+		for selected in bpy.context.selected_objects:
+			selected.select_set(False)
+		mesh_obj.select_set(True)
+		bpy.context.view_layer.objects.active = mesh_obj
+		bpy.ops.object.mode_set(mode='EDIT')
+		obj.select_set(True)
 	else:
-		bpy.ops.object.mode_set(mode=mode)
-
+		mesh_obj.select_set(True)
 
-	if not restore_selected:
-		return {'FINISHED'}
-	else:	# For the Relax operator
-		return bm, uv_layers, faces_by_island
+	return {'FINISHED'}
@@ -3,9 +3,10 @@ import random
 import bpy
 import bmesh
 import bl_math
+import numpy as np
 
 from . import utilities_uv
-from .utilities_bbox import BBox
+from . import utilities_islands
 from mathutils import Vector
 
 
@@ -81,20 +82,22 @@ def main(self, context, udim_tile=1001, column=0, row=0):
 		me = obj.data
 		bm = bmesh.from_edit_mesh(me)
 		uv_layers = bm.loops.layers.uv.verify()
-		sync = bpy.context.scene.tool_settings.use_uv_select_sync
 
 		if self.bool_face:
-			if sync:
-				group = {f for f in bm.faces if f.select}
-			else:
-				group = utilities_uv.get_selected_uv_faces(bm, uv_layers)
+			group = utilities_uv.get_selected_face_set(bm, uv_layers)
 		else:
-			group = utilities_uv.get_selected_islands(bm, uv_layers)
+			group = utilities_uv.get_selected_island_set(bm, uv_layers)
 
 		if not group:
 			continue
 
 		counter += 1
+		# Transforms are gathered per island and applied to all of them in one batch
+		angles = np.zeros(len(group))
+		scales = np.ones((len(group), 2))
+		pivots = np.zeros((len(group), 2))
+		deltas = np.zeros((len(group), 2))
+
 		for e2, f in enumerate(group, start=100):
 			seed = e1*e2+self.rand_seed+id(obj)
 			random.seed(seed)
@@ -102,15 +105,14 @@ def main(self, context, udim_tile=1001, column=0, row=0):
 			random.seed(seed+2)
 			rand_scale = random.uniform(self.min_scale, self.max_scale)
 
-			f = (f,) if self.bool_face else f
-
 			if self.bool_bounds or self.rotation or self.scale_factor != 0:
-				bb = BBox.calc_bbox_uv(f, uv_layers)
+				bb = f.bbox
 				if not bb.is_valid:
 					self.report({'WARNING'}, f"The {obj.name} object have UV-Island with zero area")
 					continue
 
 				vec_origin = bb.center
+				pivots[f.index] = vec_origin
 
 				if self.rotation:
 					angle = rand_rotation
@@ -121,7 +123,8 @@ def main(self, context, udim_tile=1001, column=0, row=0):
 							angle -= self.rotation_steps
 						elif angle < -self.rotation:
 							angle += self.rotation_steps
-					if utilities_uv.rotate_island(f, uv_layers, angle, vec_origin):
+					if abs(angle) >= 1e-05:
+						angles[f.index] = angle
 						bb.rotate_expand(angle)
 
 				scale = bl_math.lerp(1.0, rand_scale, self.scale_factor)
@@ -137,12 +140,12 @@ def main(self, context, udim_tile=1001, column=0, row=0):
 					# If the scale from random is smaller, we choose it
 					scale = min(scale, new_scale)
 					scale = Vector((scale, scale))
-					utilities_uv.scale_island(f, uv_layers, scale, pivot=vec_origin)
+					scales[f.index] = scale
 					bb.scale(scale)
 
 				if self.bool_bounds:
 					to_center_delta = Vector((0.5, 0.5)) - vec_origin
-					utilities_uv.translate_island(f, uv_layers, delta=to_center_delta)
+					deltas[f.index] += to_center_delta
 					bb.translate(to_center_delta)
 
 			if self.bool_bounds:
@@ -176,9 +179,12 @@ def main(self, context, udim_tile=1001, column=0, row=0):
 				# 	pass
 
 			if (not self.bool_bounds) or udim_tile == 1001:
-				utilities_uv.translate_island(f, uv_layers, randmove)
+				deltas[f.index] += randmove
 			else:
-				utilities_uv.translate_island(f, uv_layers, delta=randmove + Vector((column, row)))
+				deltas[f.index] += randmove + Vector((column, row))
+
+		# Rotation is clockwise around the pivot, like utilities_uv.rotate_island
+		group.transform(utilities_islands.affine_matrices(translation=deltas, angle=-angles, scale=scales, pivot=pivots))
 
 		bmesh.update_edit_mesh(me, loop_triangles=False, destructive=False)
 
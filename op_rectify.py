@@ -1,12 +1,15 @@
 import bpy
 import bmesh
+import numpy as np
 
 from math import hypot
-from collections import defaultdict
 from . import utilities_uv
+from . import utilities_spatial
+from . import utilities_islands
+from . import utilities_cache
 
 
-precision = 3
+epsilon = 1e-3
 
 
 
@@ -34,7 +37,8 @@ class op(bpy.types.Operator):
 
 
 	def execute(self, context):
-		utilities_uv.multi_object_loop(rectify, self, context)
+		utilities_uv.multi_object_loop(rectify, self, context, edit_session=True)
+		utilities_uv.report_mode_switches_avoided(self)
 		return {'FINISHED'}
 
 
@@ -45,25 +49,33 @@ def rectify(self, context, me=None, bm=None, uv_layers=None):
 		bm = bmesh.from_edit_mesh(me)
 		uv_layers = bm.loops.layers.uv.verify()
 
-	# Store selection
-	faces_loops = utilities_uv.selection_store(bm, uv_layers, return_selected_faces_loops=True)
+	# Selected loops of the faces with any selected UV, grouped by UV island
+	la = utilities_cache.get_loop_arrays(bm, uv_layers)
+	_, roots = utilities_uv.get_linked_roots(la)
+	selected = la.face_select & la.face_any(la.uv_select)
+	islands = utilities_islands.split_islands(roots, selected)
+	if not islands:
+		return
 
-	# Find selection islands
-	islands = utilities_uv.getSelectionIslands(bm, uv_layers, selected_faces=set(faces_loops.keys()))
+	faces = la.faces
+	uv_select = la.uv_select.tolist()
+	starts = la.face_start.tolist()
+	faces_loops = {}
+	for index in np.flatnonzero(selected).tolist():
+		face = faces[index]
+		start = starts[index]
+		faces_loops[face] = [loop for i, loop in enumerate(face.loops, start) if uv_select[i]]
 
 	for island in islands:
-		bpy.ops.uv.select_all(action='DESELECT')
-		utilities_uv.set_selected_faces(island, bm, uv_layers)
-		main(me, bm, uv_layers, island, faces_loops)
-	
-	# Restore selection
-	utilities_uv.selection_restore(bm, uv_layers)
+		main(me, bm, uv_layers, [faces[index] for index in island.tolist()], faces_loops, update=False)
 
+	bmesh.update_edit_mesh(me, loop_triangles=False)
 
 
-def main(me, bm, uv_layers, selFacesMix, faces_loops, return_discarded_faces=False):
 
-	filteredVerts, selFaces, vertsDict, discarded_faces = ListsOfVerts(bm, uv_layers, selFacesMix, faces_loops)   
+def main(me, bm, uv_layers, selFacesMix, faces_loops, return_discarded_faces=False, update=True):
+
+	filteredVerts, selFaces, quadVerts, discarded_faces = ListsOfVerts(bm, uv_layers, selFacesMix, faces_loops)   
 
 	if len(filteredVerts) < 2:
 		if return_discarded_faces:
@@ -76,11 +88,7 @@ def main(me, bm, uv_layers, selFacesMix, faces_loops, return_discarded_faces=Fal
 				return discarded_faces
 		else:
 			# Line is selected -> align on axis
-			for luv in filteredVerts:
-				x = round(luv.uv.x, precision)
-				y = round(luv.uv.y, precision)
-				if luv not in vertsDict[(x, y)]:
-					vertsDict[(x, y)].append(luv)
+			uv_hash = utilities_spatial.UVHash.from_luvs(filteredVerts, epsilon)
 
 			areLinedX = True
 			areLinedY = True
@@ -110,9 +118,7 @@ def main(me, bm, uv_layers, selFacesMix, faces_loops, return_discarded_faces=Fal
 				if horizontal == True:
 					#scale to 0 on Y
 					for v in verts:
-						x = round(v.uv.x, precision)
-						y = round(v.uv.y, precision)
-						for luv in vertsDict[(x, y)]:
+						for luv in uv_hash.query_items(v.uv):
 							luv.uv.y = first.uv.y
 				else:
 					#scale to 0 on X
@@ -122,9 +128,7 @@ def main(me, bm, uv_layers, selFacesMix, faces_loops, return_discarded_faces=Fal
 					last = verts[len(verts)-1]
 
 					for v in verts:
-						x = round(v.uv.x, precision)
-						y = round(v.uv.y, precision)
-						for luv in vertsDict[(x, y)]:
+						for luv in uv_hash.query_items(v.uv):
 							luv.uv.x = first.uv.x
 
 	else:
@@ -134,11 +138,12 @@ def main(me, bm, uv_layers, selFacesMix, faces_loops, return_discarded_faces=Fal
 		if targetFace is None or len({loop for loop in targetFace.loops}.intersection(filteredVerts)) != len(targetFace.verts) or targetFace.select == False or len(targetFace.verts) != 4:
 			targetFace = selFaces[0]
 		
-		ShapeFace(uv_layers, targetFace, vertsDict)
+		ShapeFace(uv_layers, targetFace, utilities_spatial.UVHash.from_luvs(quadVerts, epsilon))
 		
 		FollowActiveUV(me, targetFace, selFaces)
 
-		bmesh.update_edit_mesh(me, loop_triangles=False)
+		if update:
+			bmesh.update_edit_mesh(me, loop_triangles=False)
 
 		if return_discarded_faces:
 			return discarded_faces
@@ -150,7 +155,7 @@ def ListsOfVerts(bm, uv_layers, selFacesMix, faces_loops):
 	filteredVerts = []
 	selFaces = []
 	discarded_faces = set()
-	vertsDict = defaultdict(list)
+	quadVerts = []
 	
 	for f in selFacesMix:
 		isFaceSel = True
@@ -165,21 +170,18 @@ def ListsOfVerts(bm, uv_layers, selFacesMix, faces_loops):
 				discarded_faces.add(f)
 			else: 
 				selFaces.append(f)
-				for luv in facesEdgeVerts:
-					x = round(luv.uv.x, precision)
-					y = round(luv.uv.y, precision)
-					vertsDict[(x, y)].append(luv)
+				quadVerts.extend(facesEdgeVerts)
 		else:
 			filteredVerts.extend(facesEdgeVerts)
 
 	if len(filteredVerts) == 0:
 		filteredVerts.extend(allEdgeVerts)
 
-	return filteredVerts, selFaces, vertsDict, discarded_faces
+	return filteredVerts, selFaces, quadVerts, discarded_faces
 
 
 
-def ShapeFace(uv_layers, targetFace, vertsDict):
+def ShapeFace(uv_layers, targetFace, uv_hash):
 	corners = []
 	for l in targetFace.loops:
 		luv = l[uv_layers]
@@ -226,7 +228,7 @@ def ShapeFace(uv_layers, targetFace, vertsDict):
 	for v in verts:
 		if v is None:
 			continue
-		for area in bpy.context.screen.areas:
+		for area in ScreenAreas():
 			if area.ui_type == 'UV':
 				loc = area.spaces[0].cursor_location
 				hyp = hypot(loc.x/ratioX -v.uv.x, loc.y/ratioY -v.uv.y)
@@ -234,11 +236,11 @@ def ShapeFace(uv_layers, targetFace, vertsDict):
 					min = hyp
 					minV = v
 
-	MakeUvFaceEqualRectangle(vertsDict, leftUp, rightUp, rightDown, leftDown, minV)
+	MakeUvFaceEqualRectangle(uv_hash, leftUp, rightUp, rightDown, leftDown, minV)
 
 
 
-def MakeUvFaceEqualRectangle(vertsDict, leftUp, rightUp, rightDown, leftDown, startv):
+def MakeUvFaceEqualRectangle(uv_hash, leftUp, rightUp, rightDown, leftDown, startv):
 	ratioX, ratioY = ImageRatio()
 	ratio = ratioX/ratioY
 	
@@ -278,28 +280,20 @@ def MakeUvFaceEqualRectangle(vertsDict, leftUp, rightUp, rightDown, leftDown, st
 		currRowY = leftDown.y +finalScaleY
 	
 	#leftUp, rightUp
-	x = round(leftUp.x, precision)
-	y = round(leftUp.y, precision)
-	for v in vertsDict[(x,y)]:
+	for v in uv_hash.query_items(leftUp):
 		v.uv.x = currRowX
 		v.uv.y = currRowY
   
-	x = round(rightUp.x, precision)
-	y = round(rightUp.y, precision)
-	for v in vertsDict[(x,y)]:
+	for v in uv_hash.query_items(rightUp):
 		v.uv.x = currRowX + finalScaleX
 		v.uv.y = currRowY
 	
 	#rightDown, leftDown
-	x = round(rightDown.x, precision)
-	y = round(rightDown.y, precision)    
-	for v in vertsDict[(x,y)]:
+	for v in uv_hash.query_items(rightDown):
 		v.uv.x = currRowX + finalScaleX
 		v.uv.y = currRowY - finalScaleY
 		
-	x = round(leftDown.x, precision)
-	y = round(leftDown.y, precision)    
-	for v in vertsDict[(x,y)]:
+	for v in uv_hash.query_items(leftDown):
 		v.uv.x = currRowX
 		v.uv.y = currRowY - finalScaleY
 
@@ -309,20 +303,10 @@ def FollowActiveUV(me, f_act, faces):
 	bm = bmesh.from_edit_mesh(me)
 	uv_act = bm.loops.layers.uv.active
 	
-	# our own local walker
-	def walk_face_init(faces, f_act):
-		# first tag all faces True (so we dont uvmap them)
-		for f in bm.faces:
-			f.tag = True
-		# then tag faces arg False
-		for f in faces:
-			f.tag = False
-		# tag the active face True since we begin there
-		f_act.tag = True
-
+	# our own local walker, over the faces arg only, beginning at the active face
 	def walk_face(f):
-		# all faces in this list must be tagged
-		f.tag = True
+		pending = set(faces)
+		pending.discard(f)
 		faces_a = [f]
 		faces_b = []
 
@@ -333,9 +317,9 @@ def FollowActiveUV(me, f_act, faces):
 					if l_edge.is_manifold == True and l_edge.seam == False:
 						l_other = l.link_loop_radial_next
 						f_other = l_other.face
-						if not f_other.tag:
+						if f_other in pending:
 							yield (f, l, f_other)
-							f_other.tag = True
+							pending.discard(f_other)
 							faces_b.append(f_other)
 			# swap
 			faces_a, faces_b = faces_b, faces_a
@@ -411,7 +395,7 @@ def FollowActiveUV(me, f_act, faces):
 		l_b_uv = [l[uv_act].uv for l in l_b]
 
 		try:
-			fac = edge_lengths[l_b[2].edge.index][0] / edge_lengths[l_a[1].edge.index][0]
+			fac = edge_lengths[l_b[2].edge][0] / edge_lengths[l_a[1].edge][0]
 		except ZeroDivisionError:
 			fac = 1.0
 
@@ -424,9 +408,8 @@ def FollowActiveUV(me, f_act, faces):
 					   l_b_uv[2], l_b_uv[1])
 
 
-	# Calculate average length per loop if needed
-	bm.edges.index_update()
-	edge_lengths = [None]*len(bm.edges)
+	# Calculate average length per loop if needed, by edge, only for the rings of these faces
+	edge_lengths = {}
 	
 	for f in faces:
 		# we know its a quad
@@ -435,32 +418,38 @@ def FollowActiveUV(me, f_act, faces):
 		l_pair_b = (l_quad[1], l_quad[3])
 
 		for l_pair in (l_pair_a, l_pair_b):
-			if edge_lengths[l_pair[0].edge.index] is None:
+			if l_pair[0].edge not in edge_lengths:
 
 				edge_length_store = [-1.0]
 				edge_length_accum = 0.0
 				edge_length_total = 0
 
 				for l in l_pair:
-					if edge_lengths[l.edge.index] is None:
+					if l.edge not in edge_lengths:
 						for e in walk_edgeloop(l):
-							if edge_lengths[e.index] is None:
-								edge_lengths[e.index] = edge_length_store
+							if e not in edge_lengths:
+								edge_lengths[e] = edge_length_store
 								edge_length_accum += e.calc_length()
 								edge_length_total += 1
 
 				edge_length_store[0] = edge_length_accum / edge_length_total
 
 
-	walk_face_init(faces, f_act)
 	for f_triple in walk_face(f_act):
 		apply_uv(*f_triple)
 
 
 
+def ScreenAreas():
+	# No screen in background mode, e.g. the headless benchmarks
+	screen = bpy.context.screen
+	return screen.areas if screen else ()
+
+
+
 def ImageRatio():
 	ratioX, ratioY = 256,256
-	for a in bpy.context.screen.areas:
+	for a in ScreenAreas():
 		if a.type == 'IMAGE_EDITOR':
 			img = a.spaces[0].image
 			if img and img.size[0] != 0:
@@ -1,11 +1,10 @@
 import bpy
 import bmesh
+import numpy as np
 
-from mathutils import Vector
-from itertools import chain
-from collections import defaultdict
-from . import op_meshtex_create
 from . import utilities_uv
+from . import utilities_islands
+from . import utilities_cache
 
 
 
@@ -34,89 +33,87 @@ class op(bpy.types.Operator):
 
 
 	def execute(self, context):
-		utilities_uv.multi_object_loop(relax, self, context)	
+		utilities_uv.multi_object_loop(relax, self, context, edit_session=True)
+		utilities_uv.report_mode_switches_avoided(self)
 		return {'FINISHED'}
 
 
 
-def relax(self, context):
-	# UV to temporary mesh
-	pre_selection_mode = tuple(bpy.context.scene.tool_settings.mesh_select_mode)
-	obj = bpy.context.active_object
-	obj_name = bpy.context.active_object.name
+def relax(self, context, me=None, bm=None, uv_layers=None):
+	"""Smooth the UV vertices of the selected faces in place, island by island"""
+	if bm is None:
+		me = bpy.context.active_object.data
+		bm = bmesh.from_edit_mesh(me)
+		uv_layers = bm.loops.layers.uv.verify()
 
-	bm, uv_layers, faces_by_island = op_meshtex_create.create_uv_mesh(self, context, obj, sk_create=False, bool_scale=False, delete_unselected=False, restore_selected=True)
-	if bm == {'CANCELLED'}:
+	la = utilities_cache.get_loop_arrays(bm, uv_layers)
+	face_mask = ~la.face_hide & la.face_select & la.face_all(la.uv_select)
+	if not face_mask.any():
 		return
-
-	temp_obj = bpy.context.active_object
-	temp_obj_data_name = temp_obj.data.name
-
-	bpy.ops.mesh.select_all(action='DESELECT')
-	for face in chain.from_iterable(faces_by_island):
-		face.select_set(True)
-
-	# Smooth mesh
-	bpy.ops.mesh.vertices_smooth(factor=0.5, repeat=self.iterations)
-
-
-	# Mesh to UV
-	for faces in faces_by_island:
-		if self.area_preservation > 0:
-			edge_length = 0
-			edge_uv_length = 0
-			pre_center = Vector((0.0, 0.0))
-			n_loops = 0
-
-		for face in faces:
-			face.select = True
-			for loop in face.loops:
-				if self.area_preservation > 0:
-					edge_length += (loop.link_loop_next.vert.co - loop.vert.co).length
-					edge_uv_length += (loop.link_loop_next[uv_layers].uv - loop[uv_layers].uv).length
-					pre_center += loop[uv_layers].uv
-					n_loops += 1
-				# Move UVs making sure future UV edges measures will be real
-				if loop != face.loops[0]:
-					if loop != face.loops[-1]:
-						loop[uv_layers].uv = (loop.vert.co.x, loop.vert.co.y)
-					else:
-						loop[uv_layers].uv = (loop.vert.co.x, loop.vert.co.y)
-						face.loops[0][uv_layers].uv = (face.loops[0].vert.co.x, face.loops[0].vert.co.y)
-
-		scale = 1
-		if self.area_preservation > 0 and edge_length > 0 and edge_uv_length > 0:
-			pre_center /= n_loops
-			scale = 1 + (edge_uv_length / edge_length - 1)*self.area_preservation
-
-		if scale != 1:
-			for face in faces:
-				for loop in face.loops:
-					loop[uv_layers].uv = pre_center + (loop[uv_layers].uv - pre_center)*scale
-
-
-	# Copy and Paste UVs between temporary and original meshes
-	copied_uvs = defaultdict(list)
-	for face in bm.faces:
-		if face.select:
-			for loop in face.loops:
-				copied_uvs[face.index].append(loop[uv_layers].uv.to_tuple())
-
-	bpy.ops.object.mode_set(mode='OBJECT', toggle=False)
-	bpy.ops.object.select_all(action='DESELECT')
-	bpy.context.view_layer.objects.active = bpy.data.objects[obj_name]
-	bpy.ops.object.mode_set(mode='EDIT', toggle=False)
-
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
-	bm.faces.ensure_lookup_table()
-	bm.verts.ensure_lookup_table()
-	uv_layers = bm.loops.layers.uv.verify()
-
-	for face_index in copied_uvs:
-		for i, loop in enumerate(bm.faces[face_index].loops):
-			if loop[uv_layers].select:
-				loop[uv_layers].uv = copied_uvs[face_index][i]
-
-	# Remove temporary mesh and restore selection mode altered by meshtex_create
-	bpy.data.meshes.remove(bpy.data.meshes[temp_obj_data_name], do_unlink=True)
-	bpy.context.scene.tool_settings.mesh_select_mode = pre_selection_mode
+	pins = np.fromiter((luv.pin_uv for luv in la.luvs), dtype=bool, count=len(la.luvs))
+
+	loops = relax_uvs(la, face_mask, pins, self.iterations, self.area_preservation)
+	if len(loops):
+		la.write_uvs(loops)
+		bmesh.update_edit_mesh(me, loop_triangles=False, destructive=False)
+
+
+def relax_uvs(la, face_mask, pins, iterations, area_preservation):
+	"""Uniform Laplacian smoothing of the UV vertices of the faces of the mask, in the arrays of la.
+	Every step moves each vertex halfway to the average of its UV edge neighbours, like Smooth Vertices did on the UV mesh.
+	Pinned vertices and vertices shared with faces outside of the mask stay in place.
+	Returns the loops whose UVs changed."""
+	index = utilities_islands.VertUVIndex.from_loop_arrays(la)
+	node = index.loop_bucket
+	n_nodes = len(index.bucket_uv)
+	loop_mask = face_mask[la.face]
+	loops = np.flatnonzero(loop_mask)
+
+	fixed = np.zeros(n_nodes, dtype=bool)
+	fixed[node[~loop_mask | pins]] = True
+	free = np.zeros(n_nodes, dtype=bool)
+	free[node[loops]] = True
+	free &= ~fixed
+	if not free.any():
+		return np.zeros(0, dtype=np.int64)
+
+	# UV edges, each one counted once even when both of its faces are in the mask
+	nxt = la.loop_next[loops]
+	edges = np.unique(np.sort(np.column_stack((node[loops], node[nxt])), axis=1), axis=0)
+	edges = edges[edges[:, 0] != edges[:, 1]]
+	a, b = edges[:, 0], edges[:, 1]
+	degree = np.bincount(a, minlength=n_nodes) + np.bincount(b, minlength=n_nodes)
+	free &= degree > 0
+
+	co = index.bucket_uv.astype(np.float64)
+	for _ in range(iterations):
+		average = np.column_stack([(np.bincount(a, co[b, i], minlength=n_nodes) + np.bincount(b, co[a, i], minlength=n_nodes)) for i in range(2)])
+		average[free] /= degree[free, None]
+		co[free] += (average[free] - co[free]) * 0.5
+
+	if area_preservation > 0:
+		# Scale every island back towards its previous edge length, around its previous center.
+		# Fixed vertices stay where they are, only the free ones are scaled.
+		roots = utilities_cache.get_island_roots(la, face_mask, connectivity='VERT')
+		island = roots[la.face[loops]]
+		uv = la.uv.astype(np.float64)
+		n_faces = len(roots)
+		length_uv = np.bincount(island, np.linalg.norm(uv[nxt] - uv[loops], axis=1), minlength=n_faces)
+		length = np.bincount(island, np.linalg.norm(co[node[nxt]] - co[node[loops]], axis=1), minlength=n_faces)
+		n_loops = np.bincount(island, minlength=n_faces)
+		center = np.column_stack([np.bincount(island, uv[loops, i], minlength=n_faces) for i in range(2)])
+		center[n_loops > 0] /= n_loops[n_loops > 0, None]
+
+		scale = np.ones(n_faces)
+		valid = (length > 0) & (length_uv > 0)
+		scale[valid] = 1 + (length_uv[valid] / length[valid] - 1) * area_preservation
+
+		node_island = np.zeros(n_nodes, dtype=np.int64)
+		node_island[node[loops]] = island
+		moved = np.flatnonzero(free & (scale[node_island] != 1))
+		pivot = center[node_island[moved]]
+		co[moved] = pivot + (co[moved] - pivot) * scale[node_island[moved], None]
+
+	changed = loops[free[node[loops]]]
+	la.uv[changed] = co[node[changed]]
+	return changed
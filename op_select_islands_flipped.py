@@ -1,7 +1,7 @@
 import bpy
-import bmesh
 
 from . import utilities_uv
+from . import utilities_validate
 
 
 class op(bpy.types.Operator):
@@ -35,23 +35,8 @@ def select_flipped(self):
 	if not sync and premode == 'VERTEX':
 		bpy.ops.uv.select_mode(type='FACE')
 
-	selected_objs = utilities_uv.selected_unique_objects_in_mode_with_uv()
-	counter = 0
-	for obj in selected_objs:
-		bm = bmesh.from_edit_mesh(obj.data)
-		uv_layer = bm.loops.layers.uv.verify()
-		for f in bm.faces:
-			area = 0.0
-			uvs = [l[uv_layer].uv for l in f.loops]
-			for i in range(len(uvs)):
-				area += uvs[i - 1].cross(uvs[i])
-			if area < 0:
-				counter += 1
-				if sync:
-					f.select_set(True)
-				else:
-					for l in f.loops:
-						l[uv_layer].select = True
+	checks = utilities_validate.check_objects(utilities_uv.selected_unique_objects_in_mode_with_uv())
+	counter = utilities_validate.select_checked(checks, 'flipped', sync)
 
 	if not counter:
 		self.report({'INFO'}, 'Flipped faces not found')
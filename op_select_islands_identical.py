@@ -1,7 +1,11 @@
 import bpy
 import bmesh
+import numpy as np
 
 from . import utilities_uv
+from . import utilities_islands
+from . import utilities_cache
+from . import utilities_validate
 
 
 
@@ -11,6 +15,11 @@ class op(bpy.types.Operator):
 	bl_description = "Select UV islands with similar topology with respect to the selected UVs"
 	bl_options = {'REGISTER', 'UNDO'}
 
+	mode : bpy.props.EnumProperty(items=
+		[('SELECTED', 'Selected', 'Select the islands identical to the selected one'),
+		('DUPLICATES', 'All Duplicates', 'Select every island that repeats another one, all but one of each set of identical islands')],
+		name = "Mode", default = 'SELECTED')
+
 	@classmethod
 	def poll(cls, context):
 		if bpy.context.area.ui_type != 'UV':
@@ -27,122 +36,65 @@ class op(bpy.types.Operator):
 
 
 	def execute(self, context):
-		island_stats_source_list = utilities_uv.multi_object_loop(island_find, self, context, need_results = True)
-
-		if not island_stats_source_list:
-			return {'CANCELLED'}
-		elif {'CANCELLED'} in island_stats_source_list:
-			return {'CANCELLED'}
-		elif len(list(filter(bool, island_stats_source_list))) > 1:
-			self.report({'ERROR_INVALID_INPUT'}, "Please select only 1 UV Island")
-			return {'CANCELLED'}
-
-		island = None
-		for island_stats_source in island_stats_source_list:
-			if island_stats_source:
-				island = island_stats_source
-				break
-		if island:
-			utilities_uv.multi_object_loop(swap, self, context, island)
-
-		return {'FINISHED'}
-
-
+		return select_identical(self, self.mode)
 
-def island_find(self, context):
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
-	uv_layers = bm.loops.layers.uv.verify()
 
-	islands = utilities_uv.get_selected_islands(bm, uv_layers, selected=False, extend_selection_to_islands=True)
-	if not islands:
-		return {}
-	if len(islands) > 1:
-		self.report({'ERROR_INVALID_INPUT'}, "Please select only 1 UV Island")
-		return {'CANCELLED'}
 
-	island_stats_source = Island_stats(bm, islands[0])
-	return island_stats_source
-
-
-
-def swap(self, context, island_stats_source):
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
-	uv_layers = bm.loops.layers.uv.verify()
+def select_identical(self, mode):
 	sync = bpy.context.scene.tool_settings.use_uv_select_sync
-	if sync:
-		selection_mode = tuple(bpy.context.scene.tool_settings.mesh_select_mode)
-	else:
-		selection_mode = bpy.context.scene.tool_settings.uv_select_mode
-
-	if sync:
-		bpy.ops.mesh.select_all(action='SELECT')
+	premode = bpy.context.scene.tool_settings.uv_select_mode
+
+	objs = utilities_uv.selected_unique_objects_in_mode_with_uv()
+	las = []
+	island_lists = []
+	for obj in objs:
+		bm = bmesh.from_edit_mesh(obj.data)
+		la = utilities_cache.get_loop_arrays(bm, bm.loops.layers.uv.verify())
+		las.append(la)
+		island_lists.append(utilities_uv.get_selected_islands_indices(la, selected=False))
+	index = utilities_islands.IslandFingerprints(las, island_lists)
+
+	if mode == 'SELECTED':
+		faces_selected = [selected_faces(la, sync) for la in las]
+		sources = [i for i, (obj_index, faces) in enumerate(index.islands) if faces_selected[obj_index][faces].any()]
+		if not sources:
+			return {'CANCELLED'}
+		if len(sources) > 1:
+			self.report({'ERROR_INVALID_INPUT'}, "Please select only 1 UV Island")
+			return {'CANCELLED'}
+		selected = index.matches(index.key(sources[0]), index.area[sources[0]])
 	else:
-		bpy.ops.uv.select_all(action='SELECT')
-	islands_all = utilities_uv.get_selected_islands(bm, uv_layers)
-
-	islands_equal = []
-	for island in islands_all:
-		island_stats = Island_stats(bm, island)
-
-		if island_stats_source.isEqual(island_stats):
-			islands_equal.append(island)
+		# Every copy but the first island of each set of identical ones
+		groups = index.groups()
+		selected = np.concatenate([np.sort(group)[1:] for group in groups]) if groups else np.zeros(0, dtype=np.int64)
 
 	if sync:
+		selection_mode = tuple(bpy.context.scene.tool_settings.mesh_select_mode)
 		bpy.ops.mesh.select_all(action='DESELECT')
 		bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='FACE')
-		for island in islands_equal:
-			for face in island:
-				face.select_set(True)
 	else:
 		bpy.ops.uv.select_all(action='DESELECT')
-		for island in islands_equal:
-			for face in island:
-				for loop in face.loops:
-					loop[uv_layers].select = True
 
+	for obj_index, (obj, la) in enumerate(zip(objs, las)):
+		face_mask = np.zeros(len(la.faces), dtype=bool)
+		face_mask[index.object_faces(selected, obj_index)] = True
+		if face_mask.any():
+			utilities_validate.select_faces(la, face_mask, sync)
+			bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
 
 	if sync:
 		bpy.context.scene.tool_settings.mesh_select_mode = selection_mode
 	else:
 		# Workaround for selection not flushing properly from loops to EDGE Selection Mode, apparently since UV edge selection support was added to the UV space
 		bpy.ops.uv.select_mode(type='VERTEX')
-		bpy.context.scene.tool_settings.uv_select_mode = selection_mode
-
-
-
-class Island_stats:
-	countFaces = 0
-	countVerts = 0
-	area = 0
-	countLinkedEdges = 0
-	countLinkedFaces = 0
-
+		bpy.context.scene.tool_settings.uv_select_mode = premode
 
-	def __init__(self, bm, faces):
-		# Collect topology stats
-		self.countFaces = len(faces)
+	if mode == 'DUPLICATES':
+		self.report({'INFO'}, f"{len(selected)} duplicate islands in {len(groups)} sets")
+	return {'FINISHED'}
 
-		verts = {v for f in faces for v in f.verts}
-		self.countVerts = len(verts)
-		for vert in verts:
-			self.countLinkedEdges += len(vert.link_edges)
-			self.countLinkedFaces += len(vert.link_faces)
 
-		for face in faces:
-			self.area += face.calc_area()
-
-	
-	def isEqual(self, other):
-		if self.countVerts != other.countVerts:
-			return False
-		if self.countFaces != other.countFaces:
-			return False
-		if self.countLinkedEdges != other.countLinkedEdges:
-			return False
-		if self.countLinkedFaces != other.countLinkedFaces:
-			return False
-
-		# area needs to be 90%+ identical
-		if min(self.area, other.area)/max(self.area, other.area) < 0.7:
-			return False
-		return True
+def selected_faces(la, sync):
+	if sync:
+		return la.face_select
+	return la.face_select & la.face_all(la.uv_select)
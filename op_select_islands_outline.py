@@ -1,7 +1,10 @@
 import bpy
 import bmesh
+import numpy as np
 
 from . import utilities_uv
+from . import utilities_islands
+from . import utilities_cache
 
 
 
@@ -32,54 +35,41 @@ class op(bpy.types.Operator):
 
 
 
-def select_outline(self, context, bm=None, uv_layers=None): #, linkloops=True added just for stitch to work, may slow down the script
+def select_outline(self, context, bm=None, uv_layers=None):
 	if bm is None:
 		bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
 		uv_layers = bm.loops.layers.uv.verify()
 
 	sync = bpy.context.scene.tool_settings.use_uv_select_sync
 
+	la = utilities_cache.get_loop_arrays(bm, uv_layers)
+	edges = bm.edges
+	edge_select = np.fromiter((e.select for e in edges), dtype=bool, count=len(edges))[la.edge]
 	if sync:
-		selected_loops = {l for e in bm.edges for l in e.link_loops if e.select}
+		selected_loops = edge_select
+		visible = ~la.face_hide
 	else:
-		selected_loops = {l for f in bm.faces for l in f.loops if l[uv_layers].select_edge and l.edge.select}
+		luvs = la.luvs
+		selected_loops = edge_select & np.fromiter((luv.select_edge for luv in luvs), dtype=bool, count=len(luvs))
+		visible = ~la.face_hide & la.face_select
 
-	# Store previous edge seams
-	edges_seam = {l.edge for l in selected_loops if l.edge.seam}
-	
-	# Clear original seams
-	for edge in edges_seam:
-		edge.seam = False
-
-	bpy.ops.uv.seams_from_islands(mark_seams=True, mark_sharp=False)
+	# Island borders of the faces shown in the UV editor, straight from the UVs; the mesh seams stay untouched
+	boundary = np.flatnonzero(selected_loops & utilities_islands.boundary_loops(la, visible))
 
-	if sync:
-		boundary_edges = {l.edge for l in selected_loops if l.edge.seam or l.edge.is_boundary}
-	else:
-		boundary_loops = {l for l in selected_loops if l.edge.seam or l.edge.is_boundary}
-		boundary_edges = {l.edge for l in boundary_loops}
-
-	# Select bound edges from edges marked as seams and edge boundaries
+	# Select bound edges
 	if sync:
 		bpy.ops.mesh.select_all(action='DESELECT')
 		bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='EDGE')
-		for edge in boundary_edges:
-			edge.select_set(True)
+		edges.ensure_lookup_table()
+		for index in np.unique(la.edge[boundary]).tolist():
+			edges[index].select_set(True)
 	else:
 		bpy.ops.uv.select_all(action='DESELECT')
 		bpy.ops.uv.select_mode(type='EDGE')
-		for loop in boundary_loops:
-			loop[uv_layers].select = True
-			loop[uv_layers].select_edge = True
-			# if linkloops:
-			# 	loop.link_loop_next[uv_layers].select = True
+		for index in boundary.tolist():
+			luvs[index].select = True
+			luvs[index].select_edge = True
 		# Workaround for selection not flushing properly from loops to EDGE Selection Mode, apparently since UV edge selection support was added to the UV space
 		# Not fully working though
 		# bpy.ops.uv.select_mode(type='VERTEX')
 		# bpy.ops.uv.select_mode(type='EDGE')
-
-	# Restore seam selection
-	for edge in boundary_edges:
-		edge.seam = False
-	for edge in edges_seam:
-		edge.seam = True
@@ -1,7 +1,12 @@
 import bpy
 import bmesh
+import numpy as np
 
 from . import utilities_uv
+from . import utilities_islands
+from . import utilities_cache
+from . import utilities_overlap
+from . import utilities_validate
 
 
 
@@ -27,33 +32,46 @@ class op(bpy.types.Operator):
 
 
 	def execute(self, context):
-		bpy.ops.uv.select_overlap()
-		bpy.ops.uv.select_linked()
-		utilities_uv.multi_object_loop(deselect, self, context)
-		return {'FINISHED'}
+		return select_overlap(self)
 
 
 
-def deselect(self, context):
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
-	uv_layers = bm.loops.layers.uv.verify()
+def select_overlap(self):
 	sync = bpy.context.scene.tool_settings.use_uv_select_sync
-	if sync:
-		selection_mode = tuple(bpy.context.scene.tool_settings.mesh_select_mode)
+	premode = bpy.context.scene.tool_settings.uv_select_mode
 
-	islands = utilities_uv.get_selected_islands(bm, uv_layers)
+	objs = utilities_uv.selected_unique_objects_in_mode_with_uv()
+	las = []
+	island_lists = []
+	for obj in objs:
+		bm = bmesh.from_edit_mesh(obj.data)
+		la = utilities_cache.get_loop_arrays(bm, bm.loops.layers.uv.verify())
+		visible, roots = utilities_uv.get_linked_roots(la)
+		las.append(la)
+		island_lists.append(utilities_islands.split_islands(roots, visible))
 
-	if len(islands) > 1:
-		if sync:
-			bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='FACE')
-			for face in islands[0]:
-				face.select_set(False)
-		else:
-			for face in islands[0]:
-				for loop in face.loops:
-					loop[uv_layers].select = False
+	graph = utilities_overlap.find_overlaps(las, island_lists)
+	if not len(graph):
+		self.report({'INFO'}, "No overlapping islands found")
+		return {'CANCELLED'}
 
-		utilities_uv.multi_object_loop_stop = True
+	bpy.ops.uv.select_all(action='DESELECT')
+	if not sync and premode == 'VERTEX':
+		bpy.ops.uv.select_mode(type='FACE')
 
-	if sync:
-		bpy.context.scene.tool_settings.mesh_select_mode = selection_mode
+	# Every group of islands stacked onto each other keeps its first island unselected
+	selected = graph.all_but_one()
+	for index, (obj, la) in enumerate(zip(objs, las)):
+		face_mask = np.zeros(len(la.faces), dtype=bool)
+		face_mask[graph.object_faces(selected, index)] = True
+		if face_mask.any():
+			utilities_validate.select_faces(la, face_mask, sync)
+			bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
+
+	# Workaround to flush the selected UVs from loops to faces
+	if not sync:
+		bpy.ops.uv.select_mode(type='VERTEX')
+		bpy.ops.uv.select_mode(type='FACE' if premode == 'ISLAND' else premode)
+
+	self.report({'INFO'}, f"{int(graph.overlapping().sum())} overlapping islands in {len(graph)} pairs, {graph.area.sum():.4f} UV area shared")
+	return {'FINISHED'}
@@ -1,8 +1,7 @@
 import bpy
-import bmesh
-import mathutils
 
 from . import utilities_uv
+from . import utilities_validate
 
 
 class op(bpy.types.Operator):
@@ -36,27 +35,8 @@ def select_zero(self):
 	sync = bpy.context.scene.tool_settings.use_uv_select_sync
 	premode = bpy.context.scene.tool_settings.uv_select_mode
 
-	counter = 0
-	for obj in utilities_uv.selected_unique_objects_in_mode_with_uv():
-		bm = bmesh.from_edit_mesh(obj.data)
-		uv_layer = bm.loops.layers.uv.verify()
-		for f in bm.faces:
-			for l in f.loops:
-				l1 = l[uv_layer].uv
-				l2 = l.link_loop_next[uv_layer].uv
-				l3 = l.link_loop_prev[uv_layer].uv
-				area = mathutils.geometry.area_tri(l1, l2, l3)
-				thres = max((l1-l2).length, (l2-l3).length, (l1-l3).length)**2 * self.precision
-				if area < thres:
-					if sync:
-						f.select_set(True)
-					else:
-						for i in f.loops:
-							i[uv_layer].select = True
-					counter += 1
-					break
-				elif len(f.loops) == 3:
-					break
+	checks = utilities_validate.check_objects(utilities_uv.selected_unique_objects_in_mode_with_uv(), self.precision)
+	counter = utilities_validate.select_checked(checks, 'degenerate', sync)
 
 	if not counter:
 		self.report({'INFO'}, f'Degenerate triangles not found')
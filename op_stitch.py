@@ -1,9 +1,12 @@
 import bpy
 import bmesh
 import math
+import numpy as np
 
 from . import op_select_islands_outline
 from . import utilities_uv
+from . import utilities_islands
+from . import utilities_cache
 
 
 class op(bpy.types.Operator):
@@ -12,6 +15,8 @@ class op(bpy.types.Operator):
 	bl_description = "Stitch other Islands to the selection"
 	bl_options = {'REGISTER', 'UNDO'}
 
+	use_operator : bpy.props.BoolProperty(name="Use Blender Stitch", description="Stitch island by island with Blender's Stitch operator, slower but its exact behaviour", default=False)
+
 	@classmethod
 	def poll(cls, context):
 		if bpy.context.area.ui_type != 'UV':
@@ -29,10 +34,139 @@ class op(bpy.types.Operator):
 		return True
 
 	def execute(self, context):
-		utilities_uv.multi_object_loop(main, self, context)
+		if self.use_operator:
+			utilities_uv.multi_object_loop(main, self, context)
+		else:
+			utilities_uv.multi_object_loop(stitch, self, context, edit_session=True)
+			utilities_uv.report_mode_switches_avoided(self)
 		return {'FINISHED'}
 
 
+
+def stitch(self, context, me=None, bm=None, uv_layers=None):
+	"""Stitch the islands across the selected island border edges without operators: the islands and the edges
+	between them form a graph, a breadth first spanning tree from the selected islands decides the order and every
+	island is moved rigidly onto its parent island, then welded to it along their shared edges"""
+	if bm is None:
+		me = bpy.context.active_object.data
+		bm = bmesh.from_edit_mesh(me)
+		uv_layers = bm.loops.layers.uv.verify()
+
+	la = utilities_cache.get_loop_arrays(bm, uv_layers)
+	visible, roots = utilities_uv.get_linked_roots(la)
+	edges = bm.edges
+	edge_select = np.fromiter((e.select for e in edges), dtype=bool, count=len(edges))[la.edge]
+	luvs = la.luvs
+	select_edge = np.fromiter((luv.select_edge for luv in luvs), dtype=bool, count=len(luvs))
+	boundary = utilities_islands.boundary_loops(la, visible)
+	stitch_loops = np.flatnonzero(select_edge & edge_select & boundary & la.face_select[la.face])
+	if not len(stitch_loops):
+		return
+
+	# Loop pairs along the stitch edges between different islands, in both directions
+	twin = utilities_islands.loop_twins(la, visible)
+	stitch_loops = stitch_loops[twin[stitch_loops] >= 0]
+	island = roots[la.face]
+	pairs = np.column_stack((stitch_loops, twin[stitch_loops]))
+	pairs = pairs[island[pairs[:, 0]] != island[pairs[:, 1]]]
+	if not len(pairs):
+		return
+	pairs = np.unique(np.concatenate((pairs, pairs[:, ::-1])), axis=0)
+
+	changed, welded = stitch_pairs(la, island, pairs, island[stitch_loops])
+	if not len(changed):
+		return
+
+	la.write_uvs(changed)
+	# Only the welded edges are joined, the others of a cycle of islands stay split
+	edges.ensure_lookup_table()
+	for index in np.unique(la.edge[welded]).tolist():
+		edges[index].seam = False
+	bmesh.update_edit_mesh(me, loop_triangles=False, destructive=False)
+
+
+def stitch_pairs(la, island, pairs, seeds):
+	"""Move and weld the islands joined by the (loop, twin loop) pairs, the island of the first seed staying in place.
+	Returns the loops whose UVs changed and the parent loops of the welded edges."""
+	nxt = la.loop_next
+	uv = la.uv
+	placed = np.zeros(len(la.faces), dtype=bool)
+	pending_roots = np.unique(seeds).tolist()
+	changed = []
+	welded = []
+
+	while pending_roots:
+		root = pending_roots.pop(0)
+		if placed[root]:
+			continue
+		placed[root] = True
+		while True:
+			parent = island[pairs[:, 0]]
+			child = island[pairs[:, 1]]
+			front = placed[parent] & ~placed[child]
+			if not front.any():
+				break
+			level = pairs[front]
+			parent = parent[front]
+			child = child[front]
+			# Every child is moved onto a single parent, the lowest placed one
+			best = np.full(len(placed), np.iinfo(np.int64).max, dtype=np.int64)
+			np.minimum.at(best, child, parent)
+			keep = parent == best[child]
+			level = level[keep]
+			child = child[keep]
+
+			# The child loop runs along the edge the other way: it starts where the parent loop ends
+			a, b = level[:, 0], level[:, 1]
+			src = np.concatenate((uv[b], uv[nxt[b]])).astype(np.float64)
+			dst = np.concatenate((uv[nxt[a]], uv[a])).astype(np.float64)
+			owner = np.concatenate((child, child))
+			children, owner = np.unique(owner, return_inverse=True)
+			matrices = rigid_matrices(src, dst, owner, len(children))
+
+			position = np.full(len(placed), -1, dtype=np.int64)
+			position[children] = np.arange(len(children))
+			loops = np.flatnonzero(position[island] >= 0)
+			# Weld targets, looked up by vertex and UV before the move
+			keys = np.column_stack((la.vert[loops], uv[loops].view(np.int32)))
+			target_keys = np.column_stack((la.vert[np.concatenate((b, nxt[b]))], src.astype(np.float32).view(np.int32)))
+			utilities_islands.apply_affine(uv, loops, matrices, position[island[loops]])
+			weld(uv, loops, keys, target_keys, dst)
+
+			placed[children] = True
+			changed.append(loops)
+			welded.append(a)
+
+	if not changed:
+		return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+	return np.unique(np.concatenate(changed)), np.concatenate(welded)
+
+
+def rigid_matrices(src, dst, owner, n):
+	"""Per owner, the 2x3 rotation and translation that best maps its src points onto its dst points"""
+	counts = np.bincount(owner, minlength=n)
+	src_center = np.column_stack([np.bincount(owner, src[:, i], minlength=n) for i in range(2)]) / counts[:, None]
+	dst_center = np.column_stack([np.bincount(owner, dst[:, i], minlength=n) for i in range(2)]) / counts[:, None]
+	p = src - src_center[owner]
+	q = dst - dst_center[owner]
+	dot = np.bincount(owner, p[:, 0] * q[:, 0] + p[:, 1] * q[:, 1], minlength=n)
+	cross = np.bincount(owner, p[:, 0] * q[:, 1] - p[:, 1] * q[:, 0], minlength=n)
+	angle = np.arctan2(cross, dot)
+	return utilities_islands.affine_matrices(translation=dst_center - src_center, angle=angle, pivot=src_center)
+
+
+def weld(uv, loops, keys, target_keys, targets):
+	"""Set the loops whose (vertex, UV) key equals a target key to the UV of that target"""
+	rows, inverse = np.unique(np.concatenate((target_keys, keys)), axis=0, return_inverse=True)
+	inverse = inverse.ravel()
+	target_of_row = np.full(len(rows), -1, dtype=np.int64)
+	target_of_row[inverse[:len(target_keys)]] = np.arange(len(target_keys))
+	target = target_of_row[inverse[len(target_keys):]]
+	hit = target >= 0
+	uv[loops[hit]] = targets[target[hit]]
+
+
+
 def main(self, context):
 	bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
 	uv_layers = bm.loops.layers.uv.verify()
@@ -0,0 +1,127 @@
+import bpy
+import numpy as np
+
+from . import utilities_texel
+from . import utilities_uv
+from . import utilities_islands
+from . import utilities_cache
+
+
+
+class op(bpy.types.Operator):
+	bl_idname = "uv.textools_texel_density_batch"
+	bl_label = "Batch Texel size"
+	bl_description = "Apply the texel density to all the selected objects at once in Object Mode, writing their UV maps directly"
+	bl_options = {'REGISTER', 'UNDO'}
+
+	mode : bpy.props.EnumProperty(items=
+		[('ISLAND', 'Islands', 'Scale every island separately'),
+		('ALL', 'Object', 'Scale all the UVs of each object together')],
+		name = "Mode", default = 'ISLAND')
+	use_property : bpy.props.BoolProperty(name="Per Object Target", description="Read the target density of each object from its custom property, when set", default=True)
+	property_name : bpy.props.StringProperty(name="Property", description="Name of the object custom property holding the target density", default="texel_density")
+
+	@classmethod
+	def poll(cls, context):
+		if bpy.context.mode != 'OBJECT':
+			return False
+		return any(obj.type == 'MESH' and obj.data.uv_layers for obj in bpy.context.selected_objects)
+
+
+	def invoke(self, context, event):
+		self.mode = bpy.context.scene.texToolsSettings.texel_set_mode
+		return self.execute(context)
+
+
+	def execute(self, context):
+		getmode = bpy.context.scene.texToolsSettings.texel_get_mode
+		density = bpy.context.scene.texToolsSettings.texel_density
+		density_scale = bpy.context.preferences.addons[__package__].preferences.texel_density_scale
+
+		before = []
+		after = []
+		n_objects = 0
+		# Instances share their mesh, scale it only once
+		done = set()
+		for obj in bpy.context.selected_objects:
+			if obj.type != 'MESH' or not obj.data.uv_layers or obj.data in done:
+				continue
+			done.add(obj.data)
+
+			target = density
+			if self.use_property and self.property_name in obj:
+				try:
+					target = float(obj[self.property_name])
+				except (TypeError, ValueError):
+					self.report({'WARNING'}, f"{obj.name}: custom property '{self.property_name}' is not a number, using the scene density")
+
+			size = utilities_texel.get_texture_size(self, obj, getmode)
+			if not size:
+				continue
+
+			densities = batch_texel_density(obj, self.mode, target, size, density_scale)
+			if densities is None:
+				continue
+			before.append(densities[0])
+			after.append(densities[1])
+			n_objects += 1
+
+		if not n_objects:
+			self.report({'WARNING'}, "No UVs with a measurable texel density in the selected objects")
+			return {'CANCELLED'}
+
+		before = np.concatenate(before)
+		after = np.concatenate(after)
+		unit = "islands" if self.mode == 'ISLAND' else "objects"
+		self.report({'INFO'}, f"{len(before)} {unit} in {n_objects} objects. Before: min {before.min():.2f}, median {np.median(before):.2f}, max {before.max():.2f}. "
+						f"After: min {after.min():.2f}, median {np.median(after):.2f}, max {after.max():.2f}")
+
+		return {'FINISHED'}
+
+
+
+def batch_texel_density(obj, mode, density, size, density_scale):
+	"""Scale the UVs of an object mesh to the texel density, returns the densities of its groups before and after"""
+	me = obj.data
+	la = utilities_islands.LoopArrays.from_mesh(me)
+	if not len(la.faces):
+		return None
+
+	if mode == 'ISLAND':
+		visible = ~la.face_hide
+		roots = utilities_cache.get_island_roots(la, visible, connectivity='VERT')
+		group_faces = utilities_islands.split_islands(roots, visible)
+	else:
+		group_faces = [np.flatnonzero(~la.face_hide)]
+	group_faces = [faces for faces in group_faces if len(faces)]
+	if not group_faces:
+		return None
+
+	groups = utilities_islands.IslandSet(la, group_faces)
+	face_group = np.full(len(la.faces), -1, dtype=np.int64)
+	face_group[np.concatenate(group_faces)] = np.repeat(np.arange(len(group_faces)), [len(faces) for faces in group_faces])
+
+	sum_area_uv, sum_area_vt = utilities_texel.group_texel_sums(la, face_group, len(groups), size)
+	valid = (sum_area_uv > 0) & (sum_area_vt > 0)
+	if not valid.any():
+		return None
+
+	current = sum_area_uv[valid] / sum_area_vt[valid]
+	before = current * density_scale
+	after = before.copy()
+
+	if density > 0:
+		scale = np.ones(len(groups))
+		scale[valid] = (density / current) / density_scale
+		after = before * scale[valid]
+
+		scaled = np.flatnonzero(scale != 1)
+		if len(scaled):
+			if mode == 'ISLAND':
+				pivots = groups.centroid[scaled]
+			else:
+				udim_tile, column, row = utilities_uv.get_UDIM_tile_coords(obj)
+				pivots = (column, row)
+			groups.scale(np.repeat(scale[scaled], 2), pivots, indices=scaled)
+
+	return before, after
@@ -0,0 +1,87 @@
+import bpy
+import csv
+import json
+import os
+import numpy as np
+
+from bpy_extras.io_utils import ExportHelper
+from . import utilities_texel
+from . import op_texel_density_report
+
+
+
+class op(bpy.types.Operator, ExportHelper):
+	bl_idname = "uv.textools_texel_density_export"
+	bl_label = "Export Texel Density"
+	bl_description = "Write the texel density of every island or face of the selected objects to a CSV or JSON file"
+
+	filename_ext = ".csv"
+	filter_glob : bpy.props.StringProperty(default="*.csv;*.json", options={'HIDDEN'})
+	file_format : bpy.props.EnumProperty(items=
+		[('CSV', 'CSV', 'One row per island or face'),
+		('JSON', 'JSON', 'Statistics and densities of every object')],
+		name = "Format", default = 'CSV')
+	per : bpy.props.EnumProperty(items=
+		[('ISLAND', 'Islands', 'One density per UV island'),
+		('FACE', 'Faces', 'One density per face')],
+		name = "Per", default = 'ISLAND')
+
+	@classmethod
+	def poll(cls, context):
+		return op_texel_density_report.op.poll(context)
+
+
+	def check(self, context):
+		# Keep the extension in sync with the format
+		self.filename_ext = '.json' if self.file_format == 'JSON' else '.csv'
+		return super().check(context)
+
+
+	def execute(self, context):
+		reports = [report for report in (utilities_texel.analyze_texel_density(self, obj, self.per) for obj in op_texel_density_report.analyzed_objects()) if report]
+		if not reports:
+			self.report({'WARNING'}, "No UVs with a measurable texel density")
+			return {'CANCELLED'}
+
+		try:
+			if self.file_format == 'JSON':
+				write_json(self.filepath, reports)
+			else:
+				write_csv(self.filepath, reports)
+		except OSError as error:
+			self.report({'ERROR'}, f"Texel density export failed: {error}")
+			return {'CANCELLED'}
+
+		self.report({'INFO'}, f"Texel density of {sum(report['count'] for report in reports)} {self.per.lower()}s written to {os.path.basename(self.filepath)}")
+		return {'FINISHED'}
+
+
+
+def write_csv(filepath, reports):
+	with open(filepath, 'w', newline='') as file:
+		writer = csv.writer(file)
+		writer.writerow(('object', 'per', 'index', 'faces', 'density'))
+		for report in reports:
+			faces = face_counts(report)
+			for index, (count, density) in enumerate(zip(faces, report['densities'].tolist())):
+				writer.writerow((report['object'], report['per'].lower(), index, count, f"{density:.6g}"))
+
+
+def write_json(filepath, reports):
+	data = []
+	for report in reports:
+		entry = {name: report[name] for name in ('object', 'per', 'size', 'count', 'skipped')}
+		if report['count']:
+			entry.update({name: report[name] for name in ('min', 'p5', 'median', 'p95', 'max')})
+			entry['histogram'] = {'counts': report['histogram'].tolist(), 'edges': report['edges'].tolist()}
+		entry['faces'] = face_counts(report)
+		entry['densities'] = report['densities'].tolist()
+		data.append(entry)
+	with open(filepath, 'w') as file:
+		json.dump(data, file, indent=1)
+
+
+def face_counts(report):
+	"""Number of faces of every row of a report"""
+	face_row = report['face_row']
+	return np.bincount(face_row[face_row >= 0], minlength=report['count']).tolist()
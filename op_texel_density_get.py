@@ -1,11 +1,11 @@
 import bpy
 import bmesh
-import mathutils
-from mathutils import Vector
-import math
+import numpy as np
 
 from . import utilities_texel
 from . import utilities_uv
+from . import utilities_islands
+from . import utilities_cache
 
 
 class op(bpy.types.Operator):
@@ -63,75 +63,24 @@ def get_texel_density(self, context, edit_mode, getmode):
 	bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
 	uv_layers = bm.loops.layers.uv.verify()
 
+	la = utilities_cache.get_loop_arrays(bm, uv_layers)
 	if edit_mode:
 		if is_sync:
-			object_faces = [face for face in bm.faces if face.select]
+			faces_mask = la.face_select
 		else:
-			object_faces = utilities_uv.get_selected_uv_faces(bm, uv_layers)
+			faces_mask = la.face_select & la.face_all(la.uv_select)
 	else:
-		object_faces = bm.faces
+		faces_mask = np.ones(len(la.faces), dtype=bool)
 
-	if not object_faces:
+	if not faces_mask.any():
 		#self.report({'INFO'}, "No UV maps or meshes selected" )
 		return [0, 0]
 
-	if getmode == 'IMAGE':
-		# Collect image/texture
-		image = utilities_texel.get_object_texture_image(obj)
-		if not image:
-			self.report({'INFO'}, "No Texture found, assign Checker map or texture first" )
-			return [0, 0]
-		if image.source =='TILED':
-			udim_tile, column, row = utilities_uv.get_UDIM_tile_coords(obj)
-			if udim_tile != 1001:
-				size = utilities_texel.get_tile_size(self, image, udim_tile)
-				if not size:
-					return [0, 0]
-			else:
-				size = min(image.size[0], image.size[1])
-		else:
-			size = min(image.size[0], image.size[1])
-
-	elif getmode == 'SIZE':
-		size = min(bpy.context.scene.texToolsSettings.size[0], bpy.context.scene.texToolsSettings.size[1])
-	else:
-		size = int(getmode)
-
-
-	area_uv_sq = 0
-	area_vt_sq = 0
+	size = utilities_texel.get_texture_size(self, obj, getmode)
+	if not size:
+		return [0, 0]
 
 	# Get area for each face in UV space and 3D View
-	if getmode != 'IMAGE' or (image and getmode == 'IMAGE'):
-		for face in object_faces:
-			# Decomposed face into triagles to calculate area
-			tris = len(face.loops)-2
-			if tris <=0:
-				continue
-
-			index = None
-			area_uv = 0
-			area_vt = 0
-
-			for _ in range(tris):
-				vA = face.loops[0][uv_layers].uv
-				if index is None:
-					origin = face.loops[0].link_loop_next
-				else:
-					for loop in face.loops:
-						if loop.vert.index == index:
-							origin = loop.link_loop_next
-							break
-				vB = origin[uv_layers].uv
-				vC = origin.link_loop_next[uv_layers].uv
-
-				area_uv += mathutils.geometry.area_tri(Vector(vA), Vector(vB), Vector(vC))
-
-				index = origin.vert.index
-
-			area_vt += face.calc_area()
-
-			area_uv_sq += math.sqrt( area_uv ) * size
-			area_vt_sq += math.sqrt( area_vt )
-
-	return [area_uv_sq, area_vt_sq]
+	sum_area_uv, sum_area_vt = utilities_texel.group_texel_sums(la, np.where(faces_mask, 0, -1), 1, size)
+
+	return [float(sum_area_uv[0]), float(sum_area_vt[0])]
@@ -0,0 +1,79 @@
+import bpy
+import numpy as np
+
+from . import utilities_texel
+from . import utilities_uv
+
+
+
+class op(bpy.types.Operator):
+	bl_idname = "uv.textools_texel_density_report"
+	bl_label = "Analyze Texel Density"
+	bl_description = "Measure the texel density of every island or face of the selected objects and show its distribution"
+	bl_options = {'REGISTER'}
+
+	per : bpy.props.EnumProperty(items=
+		[('ISLAND', 'Islands', 'One density per UV island'),
+		('FACE', 'Faces', 'One density per face')],
+		name = "Per", default = 'ISLAND')
+
+	@classmethod
+	def poll(cls, context):
+		if not bpy.context.active_object:
+			return False
+		if bpy.context.active_object.type != 'MESH':
+			return False
+		if bpy.context.object.mode != 'EDIT' and bpy.context.object.mode != 'OBJECT':
+			return False
+		if not bpy.context.object.data.uv_layers:
+			return False
+		return True
+
+
+	def execute(self, context):
+		reports = [report for report in (utilities_texel.analyze_texel_density(self, obj, self.per) for obj in analyzed_objects()) if report]
+		densities = [report['densities'] for report in reports if report['count']]
+		if not densities:
+			self.report({'WARNING'}, "No UVs with a measurable texel density")
+			return {'CANCELLED'}
+
+		densities = np.concatenate(densities)
+		p5, median, p95 = np.percentile(densities, (5, 50, 95)).tolist()
+		unit = "islands" if self.per == 'ISLAND' else "faces"
+		self.report({'INFO'}, f"{len(densities)} {unit}: min {densities.min():.2f}, p5 {p5:.2f}, median {median:.2f}, p95 {p95:.2f}, max {densities.max():.2f}")
+		return {'FINISHED'}
+
+
+
+def analyzed_objects():
+	"""Objects with unique mesh data the texel density tools measure: the edit session, or the selected meshes"""
+	if bpy.context.mode == 'EDIT_MESH':
+		return utilities_uv.selected_unique_objects_in_mode_with_uv()
+	objs = {}
+	for obj in bpy.context.selected_objects:
+		if obj.type == 'MESH' and obj.data.uv_layers:
+			objs.setdefault(obj.data, obj)
+	return list(objs.values())
+
+
+
+def draw_report(layout, obj, bar_width=20):
+	"""Stored analysis of an object mesh, drawn without measuring again"""
+	report = utilities_texel.get_texel_report(obj)
+	if report is None:
+		return
+	box = layout.box()
+	col = box.column(align=True)
+	unit = "islands" if report['per'] == 'ISLAND' else "faces"
+	col.label(text=f"{report['object']}: {report['count']} {unit}, {report['size']}px", icon='INFO')
+	if not report['count']:
+		return
+	col.label(text=f"Min {report['min']:.2f}   Median {report['median']:.2f}   Max {report['max']:.2f}")
+	col.label(text=f"P5 {report['p5']:.2f}   P95 {report['p95']:.2f}")
+
+	col = box.column(align=True)
+	col.scale_y = 0.6
+	edges = report['edges'].tolist()
+	peak = max(1, int(report['histogram'].max()))
+	for i, count in enumerate(report['histogram'].tolist()):
+		col.label(text=f"{edges[i]:8.2f}  {'|' * round(bar_width * count / peak)}  {count}")
@@ -0,0 +1,97 @@
+import bpy
+import bmesh
+import numpy as np
+
+from . import utilities_texel
+from . import utilities_uv
+
+
+
+class op(bpy.types.Operator):
+	bl_idname = "uv.textools_texel_density_select"
+	bl_label = "Select Texel Outliers"
+	bl_description = "Select the islands or faces whose texel density is outside a tolerance band around the target density"
+	bl_options = {'REGISTER', 'UNDO'}
+
+	per : bpy.props.EnumProperty(items=
+		[('ISLAND', 'Islands', 'One density per UV island'),
+		('FACE', 'Faces', 'One density per face')],
+		name = "Per", default = 'ISLAND')
+	target : bpy.props.EnumProperty(items=
+		[('DENSITY', 'Texel Density', 'The Texel Density value of the scene'),
+		('MEDIAN', 'Median', 'The median density of the selected objects')],
+		name = "Target", default = 'DENSITY')
+	tolerance : bpy.props.FloatProperty(name="Tolerance", description="Allowed deviation from the target density", default=0.2, min=0.0, soft_max=1.0, subtype='FACTOR')
+
+	@classmethod
+	def poll(cls, context):
+		if bpy.context.area.ui_type != 'UV':
+			return False
+		if not bpy.context.active_object:
+			return False
+		if bpy.context.active_object.type != 'MESH':
+			return False
+		if bpy.context.active_object.mode != 'EDIT':
+			return False
+		if not bpy.context.object.data.uv_layers:
+			return False
+		return True
+
+
+	def execute(self, context):
+		objs = utilities_uv.selected_unique_objects_in_mode_with_uv()
+		reports = [(obj, report) for obj, report in ((obj, utilities_texel.analyze_texel_density(self, obj, self.per)) for obj in objs) if report and report['count']]
+		if not reports:
+			self.report({'WARNING'}, "No UVs with a measurable texel density")
+			return {'CANCELLED'}
+
+		if self.target == 'MEDIAN':
+			target = float(np.median(np.concatenate([report['densities'] for _, report in reports])))
+		else:
+			target = bpy.context.scene.texToolsSettings.texel_density
+		low = target * (1 - self.tolerance)
+		high = target * (1 + self.tolerance)
+
+		# Outliers first, the selection is only replaced when there is something to select
+		counter = 0
+		selections = []
+		for obj, report in reports:
+			densities = report['densities']
+			outliers = (densities < low) | (densities > high)
+			counter += int(outliers.sum())
+			face_row = report['face_row']
+			faces = np.flatnonzero(outliers[face_row] & (face_row >= 0)).tolist()
+			if faces:
+				selections.append((obj, faces))
+
+		unit = "islands" if self.per == 'ISLAND' else "faces"
+		if not counter:
+			self.report({'INFO'}, f"All {unit} are within {self.tolerance:.0%} of {target:.2f}")
+			return {'CANCELLED'}
+
+		sync = bpy.context.scene.tool_settings.use_uv_select_sync
+		premode = bpy.context.scene.tool_settings.uv_select_mode
+		bpy.ops.uv.select_all(action='DESELECT')
+		if not sync and premode == 'VERTEX':
+			bpy.ops.uv.select_mode(type='FACE')
+
+		for obj, faces in selections:
+			bm = bmesh.from_edit_mesh(obj.data)
+			uv_layer = bm.loops.layers.uv.verify()
+			bm.faces.ensure_lookup_table()
+			for index in faces:
+				face = bm.faces[index]
+				if sync:
+					face.select_set(True)
+				else:
+					for loop in face.loops:
+						loop[uv_layer].select = True
+			bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
+
+		# Workaround to flush the selected UVs from loops to faces
+		if not sync:
+			bpy.ops.uv.select_mode(type='VERTEX')
+			bpy.context.scene.tool_settings.uv_select_mode = premode
+
+		self.report({'INFO'}, f"{counter} {unit} outside {low:.2f} - {high:.2f}")
+		return {'FINISHED'}
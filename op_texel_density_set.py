@@ -1,11 +1,11 @@
 import bpy
 import bmesh
-import mathutils
-from mathutils import Vector
-import math
+import numpy as np
 
 from . import utilities_texel
 from . import utilities_uv
+from . import utilities_islands
+from . import utilities_cache
 
 
 
@@ -61,122 +61,67 @@ def set_texel_density(self, context, edit_mode, getmode, setmode, density, udim_
 	bm = bmesh.from_edit_mesh(me)
 	uv_layers = bm.loops.layers.uv.verify()
 
+	la = utilities_cache.get_loop_arrays(bm, uv_layers)
+	if is_sync:
+		selected = la.face_select
+	else:
+		selected = la.face_select & la.face_all(la.uv_select)
+
 	if edit_mode:
-		object_faces = utilities_uv.get_selected_uv_faces(bm, uv_layers)
+		faces_mask = selected
 	else:
-		object_faces = bm.faces
+		faces_mask = np.ones(len(la.faces), dtype=bool)
 
 	# Warning: No valid input objects
-	if not object_faces:
+	if not faces_mask.any():
 		#self.report({'INFO'}, "No valid meshes or UV maps" )
 		return
 
-	if getmode == 'IMAGE':
-		# Collect image/texture
-		image = utilities_texel.get_object_texture_image(obj)
-		if not image:
-			self.report({'INFO'}, "No Texture found, assign Checker map or texture first" )
-			return
-		if image.source =='TILED':
-			udim_tile, column, row = utilities_uv.get_UDIM_tile_coords(obj)
-			if udim_tile != 1001:
-				size = utilities_texel.get_tile_size(self, image, udim_tile)
-				if not size:
-					return
-			else:
-				size = min(image.size[0], image.size[1])
-		else:
-			size = min(image.size[0], image.size[1])
-
-	elif getmode == 'SIZE':
-		size = min(bpy.context.scene.texToolsSettings.size[0], bpy.context.scene.texToolsSettings.size[1])
-	else:
-		size = int(getmode)
-
-	if getmode != 'IMAGE' or (image and getmode == 'IMAGE'):
+	size = utilities_texel.get_texture_size(self, obj, getmode)
+	if size:
 		if is_sync:
 			bpy.context.scene.tool_settings.use_uv_select_sync = False
 			bpy.ops.uv.select_all(action='DESELECT')
-			for face in object_faces:
-				for loop in face.loops:
-					loop[uv_layers].select = True
+			luvs = la.luvs
+			for index in np.flatnonzero(faces_mask[la.face]).tolist():
+				luvs[index].select = True
 
 		# Collect groups of faces to scale together
 		if setmode == 'ISLAND':
-			if edit_mode:
-				group_faces = utilities_uv.getSelectionIslands(bm, uv_layers)
-			else:
-				group_faces = utilities_uv.getAllIslands(bm, uv_layers)
+			seeds = selected if edit_mode else la.face_select
+			visible = (~la.face_hide & la.face_select) | seeds
+			roots = utilities_cache.get_island_roots(la, visible, connectivity='VERT')
+			group_faces = utilities_islands.split_islands(roots, seeds)
 		else:	
 			# setmode == 'ALL' Scale all faces together
 			if edit_mode:
-				group_faces = [utilities_uv.get_selected_uv_faces(bm, uv_layers)]
+				group_faces = [np.flatnonzero(selected)]
 			else:
-				group_faces = [bm.faces]
+				group_faces = [np.arange(len(la.faces))]
+		group_faces = [faces for faces in group_faces if len(faces)]
+
+		groups = utilities_islands.IslandSet(la, group_faces)
+		face_group = np.full(len(la.faces), -1, dtype=np.int64)
+		if group_faces:
+			face_group[np.concatenate(group_faces)] = np.repeat(np.arange(len(group_faces)), [len(faces) for faces in group_faces])
 
-		for group in group_faces:
-			sum_area_vt = 0
-			sum_area_uv = 0
+		sum_area_uv, sum_area_vt = utilities_texel.group_texel_sums(la, face_group, len(groups), size)
+
+		# Apply scale to groups
+		scale = np.ones(len(groups))
+		if density > 0:
+			valid = (sum_area_uv > 0) & (sum_area_vt > 0)
+			scale[valid] = (density / (sum_area_uv[valid] / sum_area_vt[valid])) / bpy.context.preferences.addons[__package__].preferences.texel_density_scale
+
+		scaled = np.flatnonzero(scale != 1)
+		if len(scaled):
 			if setmode == 'ISLAND':
-				pre_center = Vector((0.0, 0.0))
-				n_loops = 0
-
-			for face in group:
-				# Decomposed face into triagles to calculate area
-				tris = len(face.loops)-2
-				if tris <= 0:
-					continue
-				if setmode == 'ISLAND':
-					for loop in face.loops:
-						pre_center += loop[uv_layers].uv
-						n_loops += 1
-
-				index = None
-				area_uv = 0
-				area_vt = 0
-
-				for _ in range(tris):
-					vA = face.loops[0][uv_layers].uv
-					if index is None:
-						origin = face.loops[0].link_loop_next
-					else:
-						for loop in face.loops:
-							if loop.vert.index == index:
-								origin = loop.link_loop_next
-								break
-					vB = origin[uv_layers].uv
-					vC = origin.link_loop_next[uv_layers].uv
-
-					area_uv += mathutils.geometry.area_tri(Vector(vA), Vector(vB), Vector(vC))
-
-					index = origin.vert.index
-
-				area_vt += face.calc_area()
-
-				sum_area_uv += math.sqrt(area_uv) * size
-				sum_area_vt += math.sqrt(area_vt)
-
-
-			# Apply scale to group
-			scale = 1
-			if density > 0 and sum_area_uv > 0 and sum_area_vt > 0:
-				if setmode == 'ISLAND':
-					pre_center /= n_loops
-					#pre_center = Vector((0.5, 0.5))
-				else:
-					if udim_tile != 1001:
-						pre_center = Vector((column, row))
-				scale = (density / (sum_area_uv / sum_area_vt)) / bpy.context.preferences.addons[__package__].preferences.texel_density_scale
-
-			if scale != 1:
-				if setmode == 'ISLAND' or udim_tile != 1001:
-					for face in group:
-						for loop in face.loops:
-							loop[uv_layers].uv = pre_center + (loop[uv_layers].uv - pre_center)*scale
-				else:
-					for face in group:
-						for loop in face.loops:
-							loop[uv_layers].uv = loop[uv_layers].uv * scale
+				pivots = groups.centroid[scaled]
+			elif udim_tile != 1001:
+				pivots = (column, row)
+			else:
+				pivots = (0.0, 0.0)
+			groups.scale(np.repeat(scale[scaled], 2), pivots, indices=scaled)
 
 	bmesh.update_edit_mesh(me, loop_triangles=False)
 
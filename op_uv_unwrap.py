@@ -3,6 +3,7 @@ import bmesh
 
 from . import utilities_uv
 from . import utilities_ui
+from . import utilities_selection
 from mathutils import Vector
 from .utilities_bbox import BBox
 
@@ -41,8 +42,8 @@ def main(self, axis):
 	for obj in selected_obj:
 		bm = bmesh.from_edit_mesh(obj.data)
 		uv_layer = bm.loops.layers.uv.verify()
-		# selection_store
-		sel_states = [(loop[uv_layer].select, loop[uv_layer].select_edge) for face in bm.faces for loop in face.loops]
+		# store selection, pins and edge seams
+		snapshot = utilities_selection.SelectionSnapshot(bm, uv_layer)
 
 		# analyze if a full uv-island has been selected.
 		full_islands = []
@@ -50,19 +51,14 @@ def main(self, axis):
 			if all(loop[uv_layer].select for face in island for loop in face.loops):
 				full_islands.append(list(island))
 
-		# store pins and edge seams
-		edge_seam = []
 		for edge in bm.edges:
-			edge_seam.append(edge.seam)
 			edge.seam = False
 
 		# Pin the inverse of the current selection, and cache the uv coords
-		pin_state = []
 		uv_coords = []
 		for face in bm.faces:
 			for loop in face.loops:
 				uv = loop[uv_layer]
-				pin_state.append(uv.pin_uv)
 				uv.pin_uv = not uv.select
 				if axis:
 					uv_coords.append(uv.uv.copy())
@@ -90,7 +86,7 @@ def main(self, axis):
 
 				orient_uvs.append((x_min, x_max, y_min, y_max, x_min.uv.copy(), x_max.uv.copy(), y_min.uv.copy(), y_max.uv.copy()))
 
-		groups.append((bm, uv_layer, sel_states, full_islands, edge_seam, pin_state, uv_coords, orient_uvs))
+		groups.append((bm, uv_layer, snapshot, full_islands, uv_coords, orient_uvs))
 
 	# apply unwrap
 	bpy.ops.uv.select_all(action='SELECT')
@@ -101,7 +97,7 @@ def main(self, axis):
 
 	# try to reconstruct the original orientation of the uv island
 	up = Vector((0, 1.0))
-	for bm, uv_layer, sel_states, full_islands, edge_seam, pin_state, uv_coords, orient_uvs in groups:
+	for bm, uv_layer, snapshot, full_islands, uv_coords, orient_uvs in groups:
 		for bbox, island in zip(orient_uvs, full_islands):
 			x_min, x_max, y_min, y_max, x_min_coord, x_max_coord, y_min_coord, y_max_coord = bbox
 			prev_bbox = BBox(x_min_coord.x, x_max_coord.x, y_min_coord.y, y_max_coord.y)
@@ -178,27 +174,16 @@ def main(self, axis):
 			utilities_uv.translate_island(island, uv_layer, delta)
 
 		# restore selections, pins & edge seams
-		index = 0
-		for face in bm.faces:
-			for loop in face.loops:
-				uv = loop[uv_layer]
-				uv.pin_uv = pin_state[index]
-
-				# apply axis constraint
-				if axis:
-					if axis == "x":
-						uv.uv.y = uv_coords[index].y
-					else:
-						uv.uv.x = uv_coords[index].x
-				index += 1
-
-		for edge, seam in zip(bm.edges, edge_seam):
-			edge.seam = seam
-
-		# restore selection
-		luvs = (loop[uv_layer] for face in bm.faces for loop in face.loops)
-		for luv, sel_state in zip(luvs, sel_states):
-			luv.select, luv.select_edge = sel_state
+		snapshot.restore(bm, uv_layer, mesh=False)
+
+		# apply axis constraint
+		if axis:
+			luvs = (loop[uv_layer] for face in bm.faces for loop in face.loops)
+			for uv, coord in zip(luvs, uv_coords):
+				if axis == "x":
+					uv.uv.y = coord.y
+				else:
+					uv.uv.x = coord.x
 
 	for obj in selected_obj:
 		bmesh.update_edit_mesh(obj.data)
@@ -6,16 +6,12 @@ bversion_reg = re.match("^(\d\.\d?\d)", bversion_string)
 bversion = float(bversion_reg.group(0))
 
 selection_uv_mode = ''
-selection_uv_loops = set()
 selection_uv_pivot = ''
 selection_uv_pivot_pos = (0,0)
 
 use_uv_sync = False
 selection_mode = [False, False, True]
-selection_vert_indexies = set()
-selection_edge_indexies = set()
-selection_face_indexies = set()
-seam_edges = set()
+selection_snapshot = None
 
 bake_error = ''
 bake_render_engine = ''
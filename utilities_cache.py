@@ -0,0 +1,160 @@
+import bpy
+import numpy as np
+
+from collections import OrderedDict
+from bpy.app.handlers import persistent
+from . import utilities_islands
+from . import utilities_profile
+
+
+# Island partitions of recently seen (topology, UVs, face mask) states, so a redo of the same
+# operator or a panel redraw on unchanged UVs reuses them instead of labeling the faces again
+max_entries = 32
+max_faces = 4_000_000
+
+_islands = OrderedDict()
+_n_faces = 0
+
+# LoopArrays of every edit BMesh and UV layer, with its loops. While the BMesh keeps the same faces
+# and loops the topology buffers stay valid, so only selection, hiding and UVs are read again.
+# Cleared on every mesh geometry update, which topology edits and sorts always send.
+max_loops = 4_000_000
+
+_arrays = OrderedDict()
+_n_loops = 0
+
+# Last texel density analysis of every mesh, by mesh name, see utilities_texel.analyze_texel_density
+texel_reports = {}
+
+
+def fingerprint(la, face_mask, connectivity):
+	"""Cheap key of everything an island partition depends on"""
+	return (
+		la.uv_name,
+		connectivity,
+		len(la.faces),
+		len(la.face),
+		hash(la.face_size.tobytes()),
+		hash(la.vert.tobytes()),
+		hash(la.edge.tobytes()),
+		hash(la.uv.tobytes()),
+		hash(np.packbits(face_mask).tobytes())
+	)
+
+
+@utilities_profile.timed('islands')
+def get_island_roots(la, face_mask, connectivity='EDGE'):
+	"""utilities_islands.label_islands through the cache"""
+	global _n_faces
+
+	key = fingerprint(la, face_mask, connectivity)
+	roots = _islands.get(key)
+	if roots is not None:
+		_islands.move_to_end(key)
+		return roots
+
+	roots = utilities_islands.label_islands(la, face_mask, connectivity)
+	roots.setflags(write=False)
+	_islands[key] = roots
+	_n_faces += len(roots)
+
+	# Bounded LRU eviction
+	while len(_islands) > max_entries or (_n_faces > max_faces and len(_islands) > 1):
+		_, old_roots = _islands.popitem(last=False)
+		_n_faces -= len(old_roots)
+
+	return roots
+
+
+@utilities_profile.timed('loop arrays')
+def _reuse_loop_arrays(la, n_verts, n_edges, bm, uv_layer):
+	"""New LoopArrays sharing the topology of a stored one, None when the BMesh elements changed"""
+	if len(bm.faces) != len(la.faces) or len(bm.verts) != n_verts or len(bm.edges) != n_edges:
+		return None
+	# Python wrappers of BMesh elements are unique while referenced, so removed or added faces and loops show up here
+	if list(bm.faces) != la.faces or [l for f in la.faces for l in f.loops] != la.loops:
+		return None
+	return la.reread(uv_layer)
+
+
+def get_loop_arrays(bm, uv_layer):
+	"""utilities_islands.LoopArrays through the cache"""
+	global _n_loops
+
+	key = (id(bm), uv_layer.name)
+	entry = _arrays.get(key)
+	if entry is not None:
+		la = _reuse_loop_arrays(*entry, bm, uv_layer)
+		if la is not None:
+			_arrays[key] = (la,) + entry[1:]
+			_arrays.move_to_end(key)
+			return la
+		del _arrays[key]
+		_n_loops -= len(entry[0].loops)
+
+	la = utilities_islands.LoopArrays(bm, uv_layer)
+	# Shared by every LoopArrays reread from it
+	for buffer in (la.face_size, la.face_start, la.face, la.vert, la.edge):
+		buffer.setflags(write=False)
+	_arrays[key] = (la, len(bm.verts), len(bm.edges))
+	_n_loops += len(la.loops)
+
+	# Bounded LRU eviction
+	while len(_arrays) > max_entries or (_n_loops > max_loops and len(_arrays) > 1):
+		_, (old_la, _, _) = _arrays.popitem(last=False)
+		_n_loops -= len(old_la.loops)
+
+	return la
+
+
+def get_islands(la, face_mask, connectivity='EDGE'):
+	"""utilities_islands.calc_islands through the cache"""
+	return utilities_islands.split_islands(get_island_roots(la, face_mask, connectivity), face_mask)
+
+
+def clear():
+	global _n_faces
+	_islands.clear()
+	_n_faces = 0
+	clear_loop_arrays()
+
+
+def clear_loop_arrays():
+	global _n_loops
+	_arrays.clear()
+	_n_loops = 0
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph):
+	# Edit Mode changes are caught by the fingerprint, but meshes rebuilt outside of it
+	# (modifiers applied, joins, scripts) make the stored partitions useless.
+	# Stored LoopArrays go on every geometry update, Edit Mode ones included.
+	if not _islands and not _arrays:
+		return
+	for update in depsgraph.updates:
+		if update.is_updated_geometry and isinstance(update.id, bpy.types.Mesh):
+			clear_loop_arrays()
+			if not update.id.original.is_editmode:
+				clear()
+				return
+
+
+@persistent
+def on_load(_):
+	clear()
+	texel_reports.clear()
+
+
+def register():
+	bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+	bpy.app.handlers.load_post.append(on_load)
+
+
+def unregister():
+	if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+		bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+	if on_load in bpy.app.handlers.load_post:
+		bpy.app.handlers.load_post.remove(on_load)
+	clear()
+	texel_reports.clear()
@@ -0,0 +1,832 @@
+import numpy as np
+
+from itertools import chain
+from .utilities_bbox import BBox
+from . import utilities_profile
+
+
+class LoopArrays:
+	"""Flat per-loop buffers of a BMesh, gathered in a single pass over its faces.
+	Edit-mode BMesh data has no foreach_get, so everything the array kernels need is read here once.
+	from_mesh() fills the same buffers from Object Mode mesh data with foreach_get."""
+	__slots__ = ('bm', 'me', 'faces', 'loops', 'luvs', 'uv_name', 'uv', 'vert', 'edge', 'face', 'face_start', 'face_size', 'uv_select', 'face_select', 'face_hide', '_next', '_co')
+
+	@utilities_profile.timed('loop arrays')
+	def __init__(self, bm, uv_layer):
+		bm.verts.index_update()
+		bm.edges.index_update()
+		bm.faces.index_update()
+
+		self.bm = bm
+		self.me = None
+		self.uv_name = uv_layer.name
+		faces = self.faces = list(bm.faces)
+		loops = self.loops = [l for f in faces for l in f.loops]
+		n_faces = len(faces)
+		n_loops = len(loops)
+
+		self.face_size = np.fromiter((len(f.loops) for f in faces), dtype=np.int32, count=n_faces)
+		self.face_start = np.zeros(n_faces, dtype=np.int32)
+		np.cumsum(self.face_size[:-1], out=self.face_start[1:])
+		self.face = np.repeat(np.arange(n_faces, dtype=np.int32), self.face_size)
+		self.vert = np.fromiter((l.vert.index for l in loops), dtype=np.int32, count=n_loops)
+		self.edge = np.fromiter((l.edge.index for l in loops), dtype=np.int32, count=n_loops)
+		self._next = None
+		self._read_state(uv_layer)
+
+	def _read_state(self, uv_layer):
+		"""Selection, hiding and UVs, which change without the topology changing"""
+		faces = self.faces
+		self.face_select = np.fromiter((f.select for f in faces), dtype=bool, count=len(faces))
+		self.face_hide = np.fromiter((f.hide for f in faces), dtype=bool, count=len(faces))
+
+		luvs = self.luvs = [l[uv_layer] for l in self.loops]
+		self.uv = np.fromiter(chain.from_iterable(luv.uv for luv in luvs), dtype=np.float32, count=len(luvs)*2).reshape(-1, 2)
+		# Turn -0.0 into 0.0, so that equal coordinates also have equal bits
+		self.uv += 0.0
+		self.uv_select = np.fromiter((luv.select for luv in luvs), dtype=bool, count=len(luvs))
+		self._co = None
+
+	def reread(self, uv_layer):
+		"""New buffers of the same, unchanged BMesh faces and loops:
+		the topology buffers are shared, selection, hiding and UVs are read again"""
+		bm = self.bm
+		bm.verts.index_update()
+		bm.edges.index_update()
+		bm.faces.index_update()
+
+		la = LoopArrays.__new__(LoopArrays)
+		la.bm = bm
+		la.me = None
+		la.uv_name = uv_layer.name
+		la.faces = self.faces
+		la.loops = self.loops
+		la.face_size = self.face_size
+		la.face_start = self.face_start
+		la.face = self.face
+		la.vert = self.vert
+		la.edge = self.edge
+		la._next = self._next
+		la._read_state(uv_layer)
+		return la
+
+	@classmethod
+	def from_mesh(cls, me, uv_name=None):
+		"""Buffers of a mesh outside of Edit Mode, for the active UV map by default; every loop counts as UV selected"""
+		la = cls.__new__(cls)
+		uv_layer = me.uv_layers[uv_name] if uv_name else me.uv_layers.active
+		n_faces = len(me.polygons)
+		n_loops = len(me.loops)
+
+		la.bm = None
+		la.me = me
+		la.loops = None
+		la.luvs = None
+		la.uv_name = uv_layer.name
+		la.faces = me.polygons
+		la.face_start = np.empty(n_faces, dtype=np.int32)
+		me.polygons.foreach_get('loop_start', la.face_start)
+		la.face_size = np.empty(n_faces, dtype=np.int32)
+		me.polygons.foreach_get('loop_total', la.face_size)
+		la.face = np.repeat(np.arange(n_faces, dtype=np.int32), la.face_size)
+		la.face_select = np.empty(n_faces, dtype=bool)
+		me.polygons.foreach_get('select', la.face_select)
+		la.face_hide = np.empty(n_faces, dtype=bool)
+		me.polygons.foreach_get('hide', la.face_hide)
+
+		la.uv = np.empty(n_loops * 2, dtype=np.float32)
+		uv_layer.data.foreach_get('uv', la.uv)
+		la.uv = la.uv.reshape(-1, 2)
+		la.uv += 0.0
+		la.vert = np.empty(n_loops, dtype=np.int32)
+		me.loops.foreach_get('vertex_index', la.vert)
+		la.edge = np.empty(n_loops, dtype=np.int32)
+		me.loops.foreach_get('edge_index', la.edge)
+		la.uv_select = np.ones(n_loops, dtype=bool)
+		la._next = None
+		co = np.empty(len(me.vertices) * 3, dtype=np.float32)
+		me.vertices.foreach_get('co', co)
+		la._co = co.reshape(-1, 3).astype(np.float64)
+		return la
+
+	@property
+	def loop_next(self):
+		"""Index of the next loop inside the same face, like BMLoop.link_loop_next"""
+		if self._next is None:
+			nxt = np.arange(1, len(self.face) + 1, dtype=np.int32)
+			nxt[self.face_start + self.face_size - 1] = self.face_start
+			self._next = nxt
+		return self._next
+
+	@property
+	def co(self):
+		"""Vertex coordinates, read on first use"""
+		if self._co is None:
+			verts = self.bm.verts
+			self._co = np.fromiter(chain.from_iterable(v.co for v in verts), dtype=np.float64, count=len(verts)*3).reshape(-1, 3)
+		return self._co
+
+	def face_uv_signed_areas(self):
+		"""Signed UV area of every face with the shoelace formula, negative for flipped faces"""
+		if not len(self.faces):
+			return np.zeros(0)
+		uv = self.uv.astype(np.float64)
+		nxt = uv[self.loop_next]
+		cross = uv[:, 0] * nxt[:, 1] - nxt[:, 0] * uv[:, 1]
+		return np.add.reduceat(cross, self.face_start) * 0.5
+
+	def face_uv_areas(self):
+		"""Unsigned UV area of every face, with the shoelace formula"""
+		return np.abs(self.face_uv_signed_areas())
+
+	def face_uv_fan_areas(self):
+		"""UV area of every face as the sum of the unsigned triangles fanned from its first loop,
+		which is how texel density has always measured faces, concave or flipped ones included"""
+		uv = self.uv.astype(np.float64)
+		first = uv[np.repeat(self.face_start, self.face_size)]
+		a = uv - first
+		b = uv[self.loop_next] - first
+		# The triangles of the first and last loop of every face are empty, so all loops can be summed
+		tri = np.abs(a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]) * 0.5
+		return np.bincount(self.face, tri, minlength=len(self.faces))
+
+	def face_areas(self):
+		"""3D area of every face, like BMFace.calc_area(). Mesh data gives Blender's own single precision areas;
+		BMesh faces have no bulk read, so their Newell sum runs in double precision, within float32 rounding of calc_area()"""
+		if self.me is not None:
+			area = np.empty(len(self.faces), dtype=np.float32)
+			self.faces.foreach_get('area', area)
+			return area.astype(np.float64)
+		co = self.co[self.vert]
+		normal = np.add.reduceat(np.cross(co, co[self.loop_next]), self.face_start)
+		return np.sqrt(np.einsum('ij,ij->i', normal, normal)) * 0.5
+
+	def vert_edge_counts(self):
+		"""Number of edges of every vertex, like len(BMVert.link_edges)"""
+		if self.bm is not None:
+			edges = self.bm.edges
+			ends = np.fromiter(chain.from_iterable((e.verts[0].index, e.verts[1].index) for e in edges), dtype=np.int64, count=len(edges)*2)
+			n_verts = len(self.bm.verts)
+		else:
+			ends = np.empty(len(self.me.edges) * 2, dtype=np.int64)
+			self.me.edges.foreach_get('vertices', ends)
+			n_verts = len(self.me.vertices)
+		return np.bincount(ends, minlength=n_verts)
+
+	@utilities_profile.timed('uv write')
+	def write_uvs(self, loops):
+		"""Copy the array UVs of the given loop indices back to the BMesh, or all of them to the mesh"""
+		if self.luvs is None:
+			self.me.uv_layers[self.uv_name].data.foreach_set('uv', self.uv.ravel())
+			self.me.update()
+			return
+		luvs = self.luvs
+		for i, co in zip(loops.tolist(), self.uv[loops].tolist()):
+			luvs[i].uv = co
+
+	def face_all(self, loop_mask):
+		"""Per face, True when the mask is set for all of its loops"""
+		if not len(self.faces):
+			return np.zeros(0, dtype=bool)
+		return np.logical_and.reduceat(loop_mask, self.face_start)
+
+	def face_any(self, loop_mask):
+		"""Per face, True when the mask is set for any of its loops"""
+		if not len(self.faces):
+			return np.zeros(0, dtype=bool)
+		return np.logical_or.reduceat(loop_mask, self.face_start)
+
+	def faces_mask(self, faces):
+		mask = np.zeros(len(self.faces), dtype=bool)
+		mask[[f.index for f in faces]] = True
+		return mask
+
+	def to_faces(self, indices):
+		faces = self.faces
+		return {faces[i] for i in indices.tolist()}
+
+
+def connected_components(n, a, b):
+	"""Union-find over n nodes joined by the pairs (a[i], b[i]).
+	Returns for each node the smallest node index of its component."""
+	parent = np.arange(n, dtype=np.int64)
+	if not len(a):
+		return parent
+	a = np.asarray(a, dtype=np.int64)
+	b = np.asarray(b, dtype=np.int64)
+	while True:
+		pa = parent[a]
+		pb = parent[b]
+		pending = pa != pb
+		if not pending.any():
+			return parent
+		pa = pa[pending]
+		pb = pb[pending]
+		# Hook the larger root under the smaller one, then compress the paths
+		np.minimum.at(parent, np.maximum(pa, pb), np.minimum(pa, pb))
+		while True:
+			grand = parent[parent]
+			if np.array_equal(grand, parent):
+				break
+			parent = grand
+
+
+def equal_runs(keys):
+	"""Sort the rows of an (n, k) integer array and return (order, same),
+	where same[i] is True when the sorted rows i and i+1 are identical."""
+	if not len(keys):
+		return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+	order = np.lexsort(keys.T[::-1])
+	sorted_keys = keys[order]
+	same = np.all(sorted_keys[1:] == sorted_keys[:-1], axis=1)
+	return order, same
+
+
+def _uv_bits(uv):
+	return uv.view(np.int32).astype(np.int64)
+
+
+def face_links(la, face_mask, connectivity='EDGE'):
+	"""Pairs of faces in face_mask that are connected in UV space.
+	EDGE links faces whose shared mesh edge has the same UVs on both sides, like get_selected_islands always did;
+	VERT links faces that share a mesh vertex with the same UV, like bpy.ops.uv.select_linked."""
+	loop_mask = face_mask[la.face]
+	loops = np.flatnonzero(loop_mask)
+	bits = _uv_bits(la.uv)
+
+	if connectivity == 'EDGE':
+		nxt = la.loop_next[loops]
+		flip = la.vert[loops] > la.vert[nxt]
+		lo = np.where(flip, nxt, loops)
+		hi = np.where(flip, loops, nxt)
+		keys = np.column_stack((la.edge[loops], bits[lo], bits[hi]))
+	elif connectivity == 'VERT':
+		keys = np.column_stack((la.vert[loops], bits[loops]))
+	else:
+		raise NotImplementedError(f'{connectivity} is an invalid connectivity, expect: EDGE, VERT')
+
+	order, same = equal_runs(keys)
+	faces = la.face[loops][order]
+	return faces[:-1][same], faces[1:][same]
+
+
+def boundary_loops(la, face_mask):
+	"""Loops of the faces in face_mask that lie on an island border: no other loop of the mask runs along
+	the same mesh edge with the same UVs at both ends, which covers mesh boundaries and UV seams alike"""
+	loops = np.flatnonzero(face_mask[la.face])
+	bits = _uv_bits(la.uv)
+	nxt = la.loop_next[loops]
+	flip = la.vert[loops] > la.vert[nxt]
+	lo = np.where(flip, nxt, loops)
+	hi = np.where(flip, loops, nxt)
+	order, same = equal_runs(np.column_stack((la.edge[loops], bits[lo], bits[hi])))
+	inner = np.zeros(len(loops), dtype=bool)
+	inner[order[:-1][same]] = True
+	inner[order[1:][same]] = True
+	mask = np.zeros(len(la.face), dtype=bool)
+	mask[loops[~inner]] = True
+	return mask
+
+
+def label_islands(la, face_mask, connectivity='EDGE'):
+	"""Component root for every face; faces outside face_mask are left as their own root"""
+	a, b = face_links(la, face_mask, connectivity)
+	return connected_components(len(la.faces), a, b)
+
+
+def split_islands(roots, face_mask):
+	"""Group the faces of face_mask by root into a list of face index arrays, ordered by their first face"""
+	indices = np.flatnonzero(face_mask)
+	if not len(indices):
+		return []
+	island_roots = roots[indices]
+	order = np.argsort(island_roots, kind='stable')
+	indices = indices[order]
+	island_roots = island_roots[order]
+	bounds = np.flatnonzero(island_roots[1:] != island_roots[:-1]) + 1
+	return np.split(indices, bounds)
+
+
+def calc_islands(la, face_mask, connectivity='EDGE'):
+	"""Per-island face index arrays of the faces in face_mask"""
+	return split_islands(label_islands(la, face_mask, connectivity), face_mask)
+
+
+def affine_matrices(translation=None, angle=None, scale=None, pivot=None):
+	"""(N, 2, 3) matrices that scale, then rotate counterclockwise around the pivot and finally translate:
+	uv' = R @ S @ (uv - pivot) + pivot + translation. Every argument may be per island or a single value."""
+	n = max((len(np.asarray(a, dtype=np.float64).reshape(-1, w)) for a, w in ((translation, 2), (angle, 1), (scale, 2), (pivot, 2)) if a is not None), default=1)
+	linear = np.zeros((n, 2, 2))
+	linear[:, 0, 0] = linear[:, 1, 1] = 1.0
+	if scale is not None:
+		scale = np.asarray(scale, dtype=np.float64).reshape(-1, 2)
+		linear[:, 0, 0] = scale[:, 0]
+		linear[:, 1, 1] = scale[:, 1]
+	if angle is not None:
+		angle = np.asarray(angle, dtype=np.float64).reshape(-1)
+		cos = np.cos(angle)
+		sin = np.sin(angle)
+		rotation = np.empty((len(angle), 2, 2))
+		rotation[:, 0, 0] = cos
+		rotation[:, 0, 1] = -sin
+		rotation[:, 1, 0] = sin
+		rotation[:, 1, 1] = cos
+		linear = rotation @ linear
+
+	matrices = np.zeros((n, 2, 3))
+	matrices[:, :, :2] = linear
+	if pivot is not None:
+		pivot = np.asarray(pivot, dtype=np.float64).reshape(-1, 2)
+		matrices[:, :, 2] = pivot - np.einsum('nij,nj->ni', linear, np.broadcast_to(pivot, (n, 2)))
+	if translation is not None:
+		matrices[:, :, 2] += np.asarray(translation, dtype=np.float64).reshape(-1, 2)
+	return matrices
+
+
+def compose_affine(second, first):
+	"""Matrices that apply first and then second"""
+	second = np.asarray(second, dtype=np.float64).reshape(-1, 2, 3)
+	first = np.asarray(first, dtype=np.float64).reshape(-1, 2, 3)
+	matrices = np.empty(np.broadcast_shapes(second.shape, first.shape))
+	matrices[:, :, :2] = second[:, :, :2] @ first[:, :, :2]
+	matrices[:, :, 2] = np.einsum('nij,nj->ni', second[:, :, :2], first[:, :, 2]) + second[:, :, 2]
+	return matrices
+
+
+@utilities_profile.timed('transform')
+def apply_affine(uv, loops, matrices, owner=None):
+	"""In-place uv[loops] = M[:, :2] @ uv + M[:, 2], with the matrix of each loop picked by owner"""
+	matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 2, 3)
+	co = uv[loops].astype(np.float64)
+	if len(matrices) == 1:
+		uv[loops] = co @ matrices[0, :, :2].T + matrices[0, :, 2]
+	else:
+		m = matrices[owner]
+		uv[loops] = np.einsum('lij,lj->li', m[:, :, :2], co) + m[:, :, 2]
+
+
+class IslandSet:
+	"""Islands of a LoopArrays, stored as one loop index array grouped by island.
+	Bounds, centers, areas and loop counts are computed for all islands at once and kept until UVs are transformed."""
+	__slots__ = ('la', 'face_islands', 'loops', 'offsets', 'loop_island', '_stats', '_area_3d')
+
+	def __init__(self, la, face_islands):
+		self.la = la
+		self.face_islands = face_islands
+		n = len(face_islands)
+
+		face_island = np.full(len(la.faces), -1, dtype=np.int32)
+		if n:
+			face_island[np.concatenate(face_islands)] = np.repeat(np.arange(n, dtype=np.int32), [len(faces) for faces in face_islands])
+		loop_island = face_island[la.face]
+		loops = np.argsort(loop_island, kind='stable')
+		self.loops = loops[loop_island[loops] >= 0]
+		self.loop_island = loop_island[self.loops]
+		self.offsets = np.zeros(n + 1, dtype=np.int64)
+		np.cumsum(np.bincount(self.loop_island, minlength=n), out=self.offsets[1:])
+		self._stats = None
+		self._area_3d = None
+
+	def __len__(self):
+		return len(self.face_islands)
+
+	def __iter__(self):
+		return (Island(self, i) for i in range(len(self.face_islands)))
+
+	def __getitem__(self, index):
+		return Island(self, index)
+
+	@property
+	def stats(self):
+		if self._stats is None:
+			la = self.la
+			starts = self.offsets[:-1]
+			uv = la.uv[self.loops].astype(np.float64)
+			n_loops = np.diff(self.offsets)
+			face_island = np.full(len(la.faces), -1, dtype=np.int64)
+			face_island[la.face[self.loops]] = self.loop_island
+			in_island = face_island >= 0
+			self._stats = {
+				'min': np.minimum.reduceat(uv, starts, axis=0) if len(uv) else np.zeros((0, 2)),
+				'max': np.maximum.reduceat(uv, starts, axis=0) if len(uv) else np.zeros((0, 2)),
+				'centroid': (np.add.reduceat(uv, starts, axis=0) / n_loops[:, None]) if len(uv) else np.zeros((0, 2)),
+				'n_loops': n_loops,
+				'area_uv': np.bincount(face_island[in_island], la.face_uv_areas()[in_island], minlength=len(self)),
+			}
+		return self._stats
+
+	@property
+	def min(self):
+		return self.stats['min']
+
+	@property
+	def max(self):
+		return self.stats['max']
+
+	@property
+	def center(self):
+		"""Bounding box centers"""
+		return (self.stats['min'] + self.stats['max']) * 0.5
+
+	@property
+	def centroid(self):
+		"""Average of the loop UVs, like utilities_uv.get_center"""
+		return self.stats['centroid']
+
+	@property
+	def n_loops(self):
+		return self.stats['n_loops']
+
+	@property
+	def area_uv(self):
+		return self.stats['area_uv']
+
+	@property
+	def area_3d(self):
+		if self._area_3d is None:
+			la = self.la
+			face_island = np.full(len(la.faces), -1, dtype=np.int64)
+			face_island[la.face[self.loops]] = self.loop_island
+			in_island = face_island >= 0
+			self._area_3d = np.bincount(face_island[in_island], la.face_areas()[in_island], minlength=len(self))
+		return self._area_3d
+
+	def bbox(self, index):
+		(xmin, ymin), (xmax, ymax) = self.min[index].tolist(), self.max[index].tolist()
+		return BBox(xmin, xmax, ymin, ymax)
+
+	def island_loops(self, index):
+		return self.loops[self.offsets[index]:self.offsets[index+1]]
+
+	def _selection(self, indices):
+		"""Loops of the given islands, and for each loop the position of its island in indices"""
+		if indices is None:
+			return self.loops, self.loop_island
+		position = np.full(len(self), -1, dtype=np.int64)
+		position[indices] = np.arange(len(indices))
+		owner = position[self.loop_island]
+		selected = owner >= 0
+		return self.loops[selected], owner[selected]
+
+	def transform(self, matrices, indices=None, write=True):
+		"""Apply one 2x3 affine matrix per island (or one for all of them) to the island UVs.
+		With write=False only the arrays change, until write_uvs() is called."""
+		loops, owner = self._selection(indices)
+		apply_affine(self.la.uv, loops, matrices, owner)
+		if write:
+			self.la.write_uvs(loops)
+		self._stats = None
+
+	def write_uvs(self):
+		self.la.write_uvs(self.loops)
+
+	def translate(self, deltas, indices=None, write=True):
+		"""Move every island by its (x, y) delta; deltas is indexed by island"""
+		self.transform(affine_matrices(translation=deltas), indices, write)
+
+	def rotate(self, angles, pivots=None, indices=None, write=True):
+		"""Rotate every island by its angle in radians, like utilities_uv.rotate_island:
+		clockwise around a pivot, counterclockwise around the origin without one"""
+		if pivots is None:
+			self.transform(affine_matrices(angle=angles), indices, write)
+		else:
+			self.transform(affine_matrices(angle=-np.asarray(angles, dtype=np.float64), pivot=pivots), indices, write)
+
+	def scale(self, scales, pivots, indices=None, write=True):
+		"""Scale every island by its (x, y) factors around its pivot"""
+		self.transform(affine_matrices(scale=scales, pivot=pivots), indices, write)
+
+
+class Island:
+	"""One island of an IslandSet"""
+	__slots__ = ('islands', 'index')
+
+	def __init__(self, islands, index):
+		self.islands = islands
+		self.index = index
+
+	@property
+	def faces(self):
+		return self.islands.la.to_faces(self.islands.face_islands[self.index])
+
+	@property
+	def loops(self):
+		return self.islands.island_loops(self.index)
+
+	@property
+	def bbox(self):
+		return self.islands.bbox(self.index)
+
+	@property
+	def centroid(self):
+		return self.islands.centroid[self.index]
+
+	@property
+	def n_loops(self):
+		return int(self.islands.n_loops[self.index])
+
+	@property
+	def area_uv(self):
+		return float(self.islands.area_uv[self.index])
+
+	@property
+	def area_3d(self):
+		return float(self.islands.area_3d[self.index])
+
+	def uvs(self):
+		return self.islands.la.uv[self.loops]
+
+	def translate(self, delta):
+		self.islands.translate(delta, indices=[self.index])
+
+	def rotate(self, angle, pivot=None):
+		self.islands.rotate(angle, pivot, indices=[self.index])
+
+	def scale(self, scale, pivot):
+		self.islands.scale(scale, pivot, indices=[self.index])
+
+
+class VertUVIndex:
+	"""Compressed sparse rows from every vertex to the loops around it and to its distinct UV coordinates.
+	vert_offsets[v]:vert_offsets[v+1] slices loops (grouped by UV) and bucket_offsets[v]:bucket_offsets[v+1] slices bucket_uv;
+	loop_bucket gives the bucket of every loop, so two loops of a vertex are split in UV space when their buckets differ."""
+	__slots__ = ('uv', 'vert_offsets', 'loops', 'first_loop', 'bucket_offsets', 'bucket_uv', 'loop_bucket')
+
+	def __init__(self, n_verts, vert, uv):
+		vert = np.asarray(vert, dtype=np.int64)
+		# Both float32 coordinates of a loop as a single integer key, with -0.0 turned into 0.0
+		self.uv = uv = np.ascontiguousarray(uv, dtype=np.float32) + np.float32(0.0)
+		key = uv.view(np.int64).ravel()
+
+		loops = self.loops = np.lexsort((key, vert))
+		sorted_vert = vert[loops]
+		sorted_key = key[loops]
+		self.vert_offsets = np.searchsorted(sorted_vert, np.arange(n_verts + 1))
+
+		first = np.ones(len(loops), dtype=bool)
+		first[1:] = (sorted_vert[1:] != sorted_vert[:-1]) | (sorted_key[1:] != sorted_key[:-1])
+		self.loop_bucket = np.empty(len(loops), dtype=np.int64)
+		self.loop_bucket[loops] = np.cumsum(first) - 1
+		self.bucket_uv = uv[loops[first]]
+		self.bucket_offsets = np.searchsorted(sorted_vert[first], np.arange(n_verts + 1))
+
+		# Lowest loop index per vertex, the first one met when walking the faces
+		self.first_loop = np.full(n_verts, -1, dtype=np.int64)
+		used = np.flatnonzero(np.diff(self.vert_offsets))
+		if len(used):
+			self.first_loop[used] = np.minimum.reduceat(loops, self.vert_offsets[used])
+
+	@classmethod
+	def from_loop_arrays(cls, la):
+		n_verts = len(la.bm.verts) if la.bm is not None else len(la.me.vertices)
+		return cls(n_verts, la.vert, la.uv)
+
+	@classmethod
+	def from_mesh(cls, me, uv_name):
+		"""Object Mode mesh data, read with foreach_get"""
+		n_loops = len(me.loops)
+		vert = np.empty(n_loops, dtype=np.int32)
+		me.loops.foreach_get('vertex_index', vert)
+		uv = np.empty(n_loops * 2, dtype=np.float32)
+		me.uv_layers[uv_name].data.foreach_get('uv', uv)
+		return cls(len(me.vertices), vert, uv.reshape(-1, 2))
+
+	def vert_loops(self, vert):
+		"""Loop indices around a vertex, grouped by UV coordinate"""
+		return self.loops[self.vert_offsets[vert]:self.vert_offsets[vert + 1]]
+
+	def vert_uvs(self, vert):
+		"""Distinct UV coordinates of a vertex"""
+		return self.bucket_uv[self.bucket_offsets[vert]:self.bucket_offsets[vert + 1]]
+
+	def first_uv(self, vert):
+		"""UV of the first loop around a vertex, in face order"""
+		return self.uv[self.first_loop[vert]]
+
+	@property
+	def n_uvs(self):
+		"""Number of distinct UV coordinates per vertex; more than one means the vertex is split in UV space"""
+		return np.diff(self.bucket_offsets)
+
+
+def _mix(values):
+	"""splitmix64 of every value, so that sums of them hash multisets"""
+	with np.errstate(over='ignore'):
+		z = values.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+		z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+		z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+		return z ^ (z >> np.uint64(31))
+
+
+class IslandFingerprints:
+	"""Topology signatures of the islands of one or more LoopArrays, bucketed in a dict for identical island lookups.
+	The signature holds the face and vertex counts, the summed vertex edge and face counts like TexTools always compared,
+	and order independent hashes of the vertex degree and face size multisets. 3D areas are verified inside a bucket."""
+	__slots__ = ('islands', 'keys', 'area', 'buckets')
+
+	@utilities_profile.timed('fingerprints')
+	def __init__(self, las, island_lists):
+		self.islands = [(index, faces) for index, faces_list in enumerate(island_lists) for faces in faces_list]
+		n = len(self.islands)
+		columns = []
+		areas = []
+		for la, faces_list in zip(las, island_lists):
+			m = len(faces_list)
+			if not m:
+				continue
+			face_island = np.full(len(la.faces), -1, dtype=np.int64)
+			face_island[np.concatenate(faces_list)] = np.repeat(np.arange(m), [len(faces) for faces in faces_list])
+			in_island = face_island >= 0
+			faces = np.flatnonzero(in_island)
+			face_size = la.face_size[faces].astype(np.int64)
+
+			# Distinct (island, vertex) pairs
+			loop_island = face_island[la.face]
+			in_loops = loop_island >= 0
+			n_verts = len(la.bm.verts) if la.bm is not None else len(la.me.vertices)
+			pair = np.unique(loop_island[in_loops] * n_verts + la.vert[in_loops])
+			pair_island = pair // n_verts
+			pair_vert = pair % n_verts
+			degree = la.vert_edge_counts()[pair_vert]
+			vert_faces = np.bincount(la.vert, minlength=n_verts)[pair_vert]
+
+			island_of_face = face_island[faces]
+			columns.append(np.column_stack((
+				np.bincount(island_of_face, minlength=m),
+				np.bincount(pair_island, minlength=m),
+				np.bincount(pair_island, degree, minlength=m).astype(np.int64),
+				np.bincount(pair_island, vert_faces, minlength=m).astype(np.int64),
+				_sum_hash(pair_island, degree, m),
+				_sum_hash(island_of_face, face_size + (1 << 32), m),
+			)))
+			areas.append(np.bincount(island_of_face, la.face_areas()[faces], minlength=m))
+
+		self.keys = np.concatenate(columns) if columns else np.zeros((0, 6), dtype=np.int64)
+		self.area = np.concatenate(areas) if areas else np.zeros(0)
+		self.buckets = {}
+		for index, key in enumerate(map(tuple, self.keys.tolist())):
+			self.buckets.setdefault(key, []).append(index)
+
+	def __len__(self):
+		return len(self.islands)
+
+	def key(self, index):
+		return tuple(self.keys[index].tolist())
+
+	def matches(self, key, area, min_ratio=0.7):
+		"""Islands with the topology key and an area within min_ratio of the given one"""
+		candidates = np.array(self.buckets.get(key, ()), dtype=np.int64)
+		if not len(candidates) or area <= 0:
+			return candidates
+		other = self.area[candidates]
+		ratio = np.minimum(other, area) / np.maximum(np.maximum(other, area), 1e-30)
+		return candidates[ratio >= min_ratio]
+
+	def groups(self, min_ratio=0.7):
+		"""Sets of identical islands with more than one member. Inside a bucket, islands sorted by area are chained
+		while consecutive areas are within min_ratio of each other."""
+		groups = []
+		for members in self.buckets.values():
+			if len(members) < 2:
+				continue
+			members = np.array(members, dtype=np.int64)
+			order = np.argsort(self.area[members], kind='stable')
+			members = members[order]
+			area = self.area[members]
+			breaks = np.flatnonzero(area[:-1] < area[1:] * min_ratio) + 1
+			groups.extend(group for group in np.split(members, breaks) if len(group) > 1)
+		return groups
+
+	def object_faces(self, island_indices, obj_index):
+		"""Face indices of an object in the given islands"""
+		faces = [self.islands[i][1] for i in np.asarray(island_indices).tolist() if self.islands[i][0] == obj_index]
+		return np.concatenate(faces) if faces else np.zeros(0, dtype=np.int64)
+
+
+def _sum_hash(group, values, n):
+	"""Per group wrapping sum of the mixed values, equal for equal multisets"""
+	total = np.zeros(n, dtype=np.uint64)
+	np.add.at(total, group, _mix(values))
+	return total.view(np.int64)
+
+
+def loop_twins(la, face_mask, uv_linked=False):
+	"""For every loop of the faces of the mask, the loop of the other face along the same edge.
+	-1 for boundary loops, loops of non-manifold edges and loops outside of the mask.
+	With uv_linked, loops along a UV seam are boundary loops too, so twins never cross islands."""
+	twin = np.full(len(la.face), -1, dtype=np.int64)
+	loops = np.flatnonzero(face_mask[la.face])
+	if not len(loops):
+		return twin
+	order = np.argsort(la.edge[loops], kind='stable')
+	loops = loops[order]
+	edges = la.edge[loops]
+	first = np.ones(len(edges), dtype=bool)
+	first[1:] = edges[1:] != edges[:-1]
+	starts = np.flatnonzero(first)
+	counts = np.diff(np.append(starts, len(edges)))
+	pairs = starts[counts == 2]
+	twin[loops[pairs]] = loops[pairs + 1]
+	twin[loops[pairs + 1]] = loops[pairs]
+	if uv_linked:
+		twin[boundary_loops(la, face_mask)] = -1
+	return twin
+
+
+class IslandMatcher:
+	"""Loop correspondences between topologically identical islands of a LoopArrays and those of another one.
+	Matching walks the faces across shared edges from a seed face, so islands must be edge connected."""
+	__slots__ = ('la', 'twin', 'signature', 'edge_length')
+
+	def __init__(self, la, face_mask):
+		self.la = la
+		self.twin = loop_twins(la, face_mask, uv_linked=True)
+		# Per face: size, boundary loops and vertex degrees, to only try seeds that look alike
+		degree = np.bincount(la.vert, minlength=int(la.vert.max()) + 1 if len(la.vert) else 0)[la.vert]
+		boundary = (self.twin < 0).astype(np.int64)
+		if len(la.faces):
+			self.signature = la.face_size.astype(np.int64) * 1_000_003 + np.add.reduceat(boundary, la.face_start) * 1009 + np.add.reduceat(degree, la.face_start)
+		else:
+			self.signature = np.zeros(0, dtype=np.int64)
+		co = la.co[la.vert]
+		self.edge_length = np.linalg.norm(co[la.loop_next] - co, axis=1)
+
+	def match(self, faces, other, other_faces, tolerance=1e-3):
+		"""Loops of the island faces and the corresponding loops of the other island, None when they don't match.
+		Among the valid walks the first whose 3D edge lengths agree, relative to the island size, within tolerance wins."""
+		if len(faces) != len(other_faces):
+			return None
+		signature = self.signature[faces]
+		values, counts = np.unique(signature, return_counts=True)
+		rare = values[np.argmin(counts)]
+		seed = int(faces[np.flatnonzero(signature == rare)[0]])
+		candidates = other_faces[other.signature[other_faces] == rare].tolist()
+
+		lengths = self.edge_length
+		for candidate in candidates:
+			for rotation in range(int(self.la.face_size[seed])):
+				loops = self._walk(seed, other, candidate, rotation, len(faces))
+				if loops is None:
+					continue
+				src, dst = loops
+				a = lengths[src]
+				b = other.edge_length[dst]
+				scale = b.sum() / max(a.sum(), 1e-30)
+				error = np.abs(a * scale - b).max() / max(b.mean(), 1e-30)
+				if error <= tolerance:
+					return loops
+		# Same topology but another shape
+		return None
+
+	def _walk(self, seed, other, other_seed, rotation, n_faces):
+		la = self.la
+		la_other = other.la
+		start = la.face_start
+		size = la.face_size
+		face = la.face
+		twin = self.twin
+		start_other = la_other.face_start
+		size_other = la_other.face_size
+		face_other = la_other.face
+		twin_other = other.twin
+		if size[seed] != size_other[other_seed]:
+			return None
+
+		mapped = {seed: (other_seed, rotation)}
+		used = {other_seed}
+		queue = [seed]
+		src = []
+		dst = []
+		while queue:
+			f = queue.pop()
+			g, r = mapped[f]
+			n = int(size[f])
+			for k in range(n):
+				loop = int(start[f]) + k
+				loop_other = int(start_other[g]) + (k + r) % n
+				src.append(loop)
+				dst.append(loop_other)
+				t = int(twin[loop])
+				t_other = int(twin_other[loop_other])
+				if (t < 0) != (t_other < 0):
+					return None
+				if t < 0:
+					continue
+				nf = int(face[t])
+				ng = int(face_other[t_other])
+				n_next = int(size[nf])
+				if n_next != size_other[ng]:
+					return None
+				r_next = (t_other - int(start_other[ng]) - (t - int(start[nf]))) % n_next
+				known = mapped.get(nf)
+				if known is None:
+					if ng in used:
+						return None
+					mapped[nf] = (ng, r_next)
+					used.add(ng)
+					queue.append(nf)
+				elif known != (ng, r_next):
+					return None
+		if len(mapped) != n_faces:
+			return None
+		return np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64)
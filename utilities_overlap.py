@@ -0,0 +1,274 @@
+import numpy as np
+
+from . import utilities_islands
+from . import utilities_profile
+
+
+class OverlapGraph:
+	"""Islands of one or more LoopArrays and the pairs of them whose UVs overlap.
+	islands: (object index, face index array) per island
+	pairs: (P, 2) island indices, the first one always the lower
+	area: UV area shared by every pair"""
+	__slots__ = ('islands', 'pairs', 'area')
+
+	def __init__(self, islands, pairs, area):
+		self.islands = islands
+		self.pairs = pairs
+		self.area = area
+
+	def __len__(self):
+		return len(self.pairs)
+
+	def components(self):
+		"""Component of every island in the overlap graph, the lowest island index of the component"""
+		return utilities_islands.connected_components(len(self.islands), self.pairs[:, 0], self.pairs[:, 1])
+
+	def overlapping(self):
+		"""Islands that overlap another one"""
+		mask = np.zeros(len(self.islands), dtype=bool)
+		mask[self.pairs.ravel()] = True
+		return mask
+
+	def all_but_one(self):
+		"""Overlapping islands except the first of every group of islands stacked onto each other"""
+		mask = self.overlapping()
+		mask[self.components()] = False
+		return mask
+
+	def object_faces(self, island_mask, obj_index):
+		"""Face indices of an object in the islands of the mask"""
+		faces = [faces for (index, faces), selected in zip(self.islands, island_mask.tolist()) if selected and index == obj_index]
+		return np.concatenate(faces) if faces else np.zeros(0, dtype=np.int64)
+
+
+
+def fan_triangles(la, face_mask):
+	"""Loop index triples of the faces of the mask, fanned from the first loop of every face, and their face"""
+	faces = np.flatnonzero(face_mask & (la.face_size >= 3))
+	n_tris = la.face_size[faces] - 2
+	face = np.repeat(faces, n_tris)
+	corner = np.arange(len(face)) - np.repeat(np.cumsum(n_tris) - n_tris, n_tris) + 1
+	first = la.face_start[face].astype(np.int64)
+	return np.column_stack((first, first + corner, first + corner + 1)), face
+
+
+def candidate_pairs(bmin, bmax):
+	"""Index pairs of the boxes that overlap, with a sweep and prune along U"""
+	if not len(bmin):
+		return np.zeros((0, 2), dtype=np.int64)
+	order = np.argsort(bmin[:, 0], kind='stable')
+	xmin = bmin[order, 0]
+	# Every box is paired with the following ones that start before it ends
+	end = np.searchsorted(xmin, bmax[order, 0], 'right')
+	position = np.arange(len(order))
+	counts = np.maximum(end - position - 1, 0)
+	src = np.repeat(position, counts)
+	dst = src + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+	a = order[src]
+	b = order[dst]
+	keep = (bmin[a, 1] <= bmax[b, 1]) & (bmin[b, 1] <= bmax[a, 1])
+	pairs = np.column_stack((a[keep], b[keep]))
+	pairs.sort(axis=1)
+	return pairs
+
+
+def grid_pairs(bmin, bmax, group, group_pairs, max_span=32, crowded=64, _cell=None):
+	"""Pairs of boxes from different groups that share a cell of a uniform grid and overlap,
+	restricted to the group pairs given. The cell size follows the typical box size.
+	Boxes of the same group are never expanded into pairs. Boxes spanning more than max_span cells along
+	an axis are tested against all boxes directly, and cells holding more than crowded boxes are gridded again
+	at the size of their own boxes while that makes the cells smaller."""
+	empty = np.zeros((0, 2), dtype=np.int64)
+	if not len(bmin) or not len(group_pairs):
+		return empty
+	size = bmax - bmin
+	cell = max(float(np.median(size.max(axis=1))) * 2, 1e-6)
+	if _cell is not None and cell > _cell * 0.5:
+		# Crowded at their own scale too, finer cells wouldn't split them
+		crowded = None
+	lo = np.floor(bmin / cell).astype(np.int64)
+	hi = np.floor(bmax / cell).astype(np.int64)
+	span = hi - lo + 1
+	large = (span > max_span).any(axis=1)
+	small = np.flatnonzero(~large)
+	found = []
+
+	# Every box against the boxes that span too many cells
+	for index in np.flatnonzero(large).tolist():
+		other = np.flatnonzero((group != group[index]) & (bmin[:, 0] <= bmax[index, 0]) & (bmin[index, 0] <= bmax[:, 0])
+			& (bmin[:, 1] <= bmax[index, 1]) & (bmin[index, 1] <= bmax[:, 1]))
+		found.append(np.column_stack((np.full(len(other), index), other)))
+
+	# Box and cell key of every covered cell
+	n_cells = span[small, 0] * span[small, 1]
+	box = np.repeat(small, n_cells)
+	offset = np.arange(n_cells.sum()) - np.repeat(np.cumsum(n_cells) - n_cells, n_cells)
+	cx = lo[box, 0] + offset // span[box, 1]
+	cy = lo[box, 1] + offset % span[box, 1]
+	key = (cx << 32) + cy
+	order = np.lexsort((group[box], key))
+	key = key[order]
+	box = box[order]
+	box_group = group[box]
+
+	if crowded is not None and len(key):
+		cell_size = _run_sizes(key)
+		if (cell_size > crowded).any():
+			dense = np.repeat(cell_size > crowded, cell_size)
+			sub = np.unique(box[dense])
+			sub_pairs = grid_pairs(bmin[sub], bmax[sub], group[sub], group_pairs, max_span, crowded, cell)
+			found.append(sub[sub_pairs])
+			# Only the other cells are expanded here
+			key, box, box_group = key[~dense], box[~dense], box_group[~dense]
+
+	if len(key):
+		cell_size = _run_sizes(key)
+		cell_end = np.repeat(np.cumsum(cell_size), cell_size)
+
+		# Every box is paired with the boxes of the following groups of its cell
+		run_size = _run_sizes(key, box_group)
+		run_end = np.repeat(np.cumsum(run_size), run_size)
+		counts = cell_end - run_end
+		src = np.repeat(np.arange(len(key)), counts)
+		dst = np.repeat(run_end, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+		found.append(np.column_stack((box[src], box[dst])))
+
+	pairs = np.concatenate(found) if found else empty
+	if not len(pairs):
+		return empty
+	a = pairs[:, 0]
+	b = pairs[:, 1]
+	n_groups = int(group.max()) + 1
+	allowed = np.unique(group_pairs[:, 0] * n_groups + group_pairs[:, 1])
+	ga = np.minimum(group[a], group[b])
+	gb = np.maximum(group[a], group[b])
+	keep = np.isin(ga * n_groups + gb, allowed)
+	keep &= (bmin[a, 0] <= bmax[b, 0]) & (bmin[b, 0] <= bmax[a, 0]) & (bmin[a, 1] <= bmax[b, 1]) & (bmin[b, 1] <= bmax[a, 1])
+	pairs = pairs[keep]
+	pairs.sort(axis=1)
+	return np.unique(pairs, axis=0)
+
+
+def _run_sizes(*keys):
+	"""Lengths of the runs of equal rows of sorted keys"""
+	first = np.zeros(len(keys[0]), dtype=bool)
+	first[:1] = True
+	for key in keys:
+		first[1:] |= key[1:] != key[:-1]
+	return np.diff(np.append(np.flatnonzero(first), len(first)))
+
+
+def triangle_overlap_areas(tri_a, tri_b):
+	"""Intersection area of the triangle pairs (M, 3, 2), by clipping the first triangles with the edges of the second ones"""
+	m = len(tri_a)
+	if not m:
+		return np.zeros(0)
+	tri_a = _counterclockwise(tri_a)
+	tri_b = _counterclockwise(tri_b)
+
+	# Convex polygons, only the first count points of each are used
+	poly = tri_a
+	count = np.full(m, 3)
+	for edge in range(3):
+		p = tri_b[:, None, edge]
+		d = tri_b[:, None, (edge + 1) % 3] - p
+		width = poly.shape[1]
+		nxt_index = np.where(np.arange(width) + 1 < count[:, None], np.arange(width) + 1, 0)
+		nxt = np.take_along_axis(poly, nxt_index[:, :, None], axis=1)
+		side = d[:, :, 0] * (poly[:, :, 1] - p[:, :, 1]) - d[:, :, 1] * (poly[:, :, 0] - p[:, :, 0])
+		side_nxt = np.take_along_axis(side, nxt_index, axis=1)
+		valid = np.arange(width) < count[:, None]
+		inside = side >= 0
+
+		# Every point gives itself when inside and the crossing towards the next point when the side changes
+		candidates = np.empty((m, width, 2, 2))
+		candidates[:, :, 0] = poly
+		change = side - side_nxt
+		t = np.divide(side, change, out=np.zeros_like(side), where=change != 0)
+		candidates[:, :, 1] = poly + t[:, :, None] * (nxt - poly)
+		keep = np.stack((valid & inside, valid & (inside != (side_nxt >= 0))), axis=2).reshape(m, -1)
+		candidates = candidates.reshape(m, -1, 2)
+
+		count = keep.sum(axis=1)
+		width = max(int(count.max()), 1)
+		order = np.argsort(~keep, axis=1, kind='stable')[:, :width]
+		poly = np.take_along_axis(candidates, order[:, :, None], axis=1)
+
+	# Shoelace area of the clipped polygons
+	width = poly.shape[1]
+	nxt_index = np.where(np.arange(width) + 1 < count[:, None], np.arange(width) + 1, 0)
+	nxt = np.take_along_axis(poly, nxt_index[:, :, None], axis=1)
+	cross = poly[:, :, 0] * nxt[:, :, 1] - nxt[:, :, 0] * poly[:, :, 1]
+	cross[np.arange(width) >= count[:, None]] = 0
+	return np.abs(cross.sum(axis=1)) * 0.5
+
+
+def _counterclockwise(tri):
+	e1 = tri[:, 1] - tri[:, 0]
+	e2 = tri[:, 2] - tri[:, 0]
+	flipped = e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0] < 0
+	tri = tri.copy()
+	tri[flipped] = tri[flipped][:, ::-1]
+	return tri
+
+
+@utilities_profile.timed('overlap')
+def find_overlaps(las, island_lists, min_area=1e-8):
+	"""Overlap graph of the islands of several LoopArrays.
+	island_lists holds the face index arrays of the islands of every LoopArrays, as given by utilities_islands.split_islands.
+	Islands are paired by their bounds first, then only triangles of those pairs that share a grid cell are clipped."""
+	islands = [(index, faces) for index, faces_list in enumerate(island_lists) for faces in faces_list]
+	empty = OverlapGraph(islands, np.zeros((0, 2), dtype=np.int64), np.zeros(0))
+	if len(islands) < 2:
+		return empty
+
+	tris = []
+	tri_island = []
+	first_island = 0
+	for la, faces_list in zip(las, island_lists):
+		face_island = np.full(len(la.faces), -1, dtype=np.int64)
+		if faces_list:
+			face_island[np.concatenate(faces_list)] = first_island + np.repeat(np.arange(len(faces_list)), [len(faces) for faces in faces_list])
+		corners, face = fan_triangles(la, face_island >= 0)
+		uv = la.uv[corners].astype(np.float64)
+		# Zero area triangles can't overlap anything, collapsed faces would only crowd the grid
+		e1 = uv[:, 1] - uv[:, 0]
+		e2 = uv[:, 2] - uv[:, 0]
+		keep = e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0] != 0
+		tris.append(uv[keep])
+		tri_island.append(face_island[face[keep]])
+		first_island += len(faces_list)
+	tris = np.concatenate(tris)
+	tri_island = np.concatenate(tri_island)
+
+	tri_min = tris.min(axis=1)
+	tri_max = tris.max(axis=1)
+	island_min = np.full((len(islands), 2), np.inf)
+	island_max = np.full((len(islands), 2), -np.inf)
+	np.minimum.at(island_min, tri_island, tri_min)
+	np.maximum.at(island_max, tri_island, tri_max)
+
+	# Islands left without triangles have no bounds
+	bounded = np.flatnonzero(np.isfinite(island_min[:, 0]))
+	island_pairs = bounded[candidate_pairs(island_min[bounded], island_max[bounded])]
+	if not len(island_pairs):
+		return empty
+
+	# Only the triangles of islands that have a candidate are gridded
+	involved = np.zeros(len(islands), dtype=bool)
+	involved[island_pairs.ravel()] = True
+	tri_index = np.flatnonzero(involved[tri_island])
+	tri_pairs = tri_index[grid_pairs(tri_min[tri_index], tri_max[tri_index], tri_island[tri_index], island_pairs)]
+	if not len(tri_pairs):
+		return empty
+
+	area = triangle_overlap_areas(tris[tri_pairs[:, 0]], tris[tri_pairs[:, 1]])
+	a = tri_island[tri_pairs[:, 0]]
+	b = tri_island[tri_pairs[:, 1]]
+	pair_key = np.minimum(a, b) * len(islands) + np.maximum(a, b)
+	keys, inverse = np.unique(pair_key, return_inverse=True)
+	pair_area = np.bincount(inverse, area, minlength=len(keys))
+	keep = pair_area > min_area
+	keys = keys[keep]
+	pairs = np.column_stack((keys // len(islands), keys % len(islands)))
+	return OverlapGraph(islands, pairs, pair_area[keep])
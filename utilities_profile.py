@@ -0,0 +1,173 @@
+import bpy
+import bmesh
+import json
+import os
+import time
+
+from collections import deque
+from functools import wraps
+from .settings import prefs
+
+
+# Opt-in timing of TexTools operators: wall time of every execute, split into the phases marked with
+# @timed plus every bpy.ops and bmesh.update_edit_mesh call made while it runs
+history = deque(maxlen=100)
+log_name = 'textools_profile.jsonl'
+
+_run = None
+_patched = {}
+
+
+
+def enabled():
+	try:
+		return prefs().bool_profiling
+	except (AttributeError, KeyError):
+		return False
+
+
+def log_path():
+	return os.path.join(bpy.utils.user_resource('CONFIG'), log_name)
+
+
+def add(name, seconds):
+	entry = _run['phases'].get(name)
+	if entry is None:
+		_run['phases'][name] = [1, seconds]
+	else:
+		entry[0] += 1
+		entry[1] += seconds
+
+
+def timed(name):
+	"""Decorator adding the calls of a helper to the phase name of the running profile"""
+	def decorator(func):
+		@wraps(func)
+		def wrapper(*args, **kwargs):
+			if _run is None:
+				return func(*args, **kwargs)
+			start = time.perf_counter()
+			try:
+				return func(*args, **kwargs)
+			finally:
+				add(name, time.perf_counter() - start)
+		return wrapper
+	return decorator
+
+
+
+def instrument(cls):
+	"""Wrap the execute of an operator class, the wrapper only measures while profiling is enabled"""
+	execute = getattr(cls, 'execute', None)
+	if execute is None or getattr(execute, 'tt_profiled', False):
+		return
+
+	@wraps(execute)
+	def profiled_execute(self, context):
+		# Operators called from another one are timed as its bpy.ops phases
+		if _run is not None or not enabled():
+			return execute(self, context)
+		begin(cls.bl_idname, context)
+		result = None
+		try:
+			result = execute(self, context)
+			return result
+		finally:
+			end(result)
+
+	profiled_execute.tt_profiled = True
+	cls.execute = profiled_execute
+
+
+
+def begin(operator, context):
+	global _run
+	meshes = {obj.data for obj in (context.selected_objects or ()) if obj.type == 'MESH'}
+	if context.active_object and context.active_object.type == 'MESH':
+		meshes.add(context.active_object.data)
+	_run = {
+		'operator': operator,
+		'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+		'objects': len(meshes),
+		'faces': sum(len(me.polygons) for me in meshes),
+		'loops': sum(len(me.loops) for me in meshes),
+		'phases': {},
+		'start': time.perf_counter(),
+	}
+	_patch()
+
+
+def end(result):
+	global _run
+	_unpatch()
+	run = _run
+	_run = None
+	run['seconds'] = time.perf_counter() - run.pop('start')
+	run['result'] = sorted(result) if isinstance(result, (set, frozenset)) else None
+	run['phases'] = {name: {'calls': calls, 'seconds': seconds} for name, (calls, seconds) in
+					sorted(run['phases'].items(), key=lambda item: item[1][1], reverse=True)}
+	history.appendleft(run)
+	write_log(run)
+
+
+def write_log(run):
+	"""Append a run to the JSONL log, moving a full log to .1 first"""
+	path = log_path()
+	try:
+		os.makedirs(os.path.dirname(path), exist_ok=True)
+		if os.path.exists(path) and os.path.getsize(path) > prefs().profile_log_size * 1024:
+			os.replace(path, path + '.1')
+		with open(path, 'a') as file:
+			file.write(json.dumps(run) + '\n')
+	except OSError as error:
+		print(f"TexTools profiling log could not be written: {error}")
+
+
+
+def _patch():
+	op_type = type(bpy.ops.uv.select_all)
+	call = op_type.__call__
+
+	def timed_call(op, *args, **kwargs):
+		start = time.perf_counter()
+		try:
+			return call(op, *args, **kwargs)
+		finally:
+			if _run is not None:
+				add(f"bpy.ops.{op.idname_py()}", time.perf_counter() - start)
+
+	update_edit_mesh = bmesh.update_edit_mesh
+
+	def timed_update_edit_mesh(*args, **kwargs):
+		start = time.perf_counter()
+		try:
+			return update_edit_mesh(*args, **kwargs)
+		finally:
+			if _run is not None:
+				add('bmesh.update_edit_mesh', time.perf_counter() - start)
+
+	_patched[op_type] = call
+	_patched[bmesh] = update_edit_mesh
+	op_type.__call__ = timed_call
+	bmesh.update_edit_mesh = timed_update_edit_mesh
+
+
+def _unpatch():
+	for owner, original in _patched.items():
+		if owner is bmesh:
+			bmesh.update_edit_mesh = original
+		else:
+			owner.__call__ = original
+	_patched.clear()
+
+
+
+def draw_history(layout, count):
+	if not history:
+		layout.label(text="No operator has been profiled yet.")
+	for run in list(history)[:count]:
+		col = layout.column(align=True)
+		col.label(text=f"{run['operator']}   {run['seconds'] * 1000:.1f} ms   {run['faces']} faces, {run['loops']} loops   {run['time']}", icon='TIME')
+		for name, phase in run['phases'].items():
+			col.label(text=f"      {name}   {phase['seconds'] * 1000:.1f} ms   x{phase['calls']}")
+	layout.label(text=f"Log: {log_path()}")
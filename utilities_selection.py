@@ -0,0 +1,100 @@
+import numpy as np
+
+from . import utilities_profile
+
+
+class SelectionSnapshot:
+	"""Vertex, edge, face and UV selection, UV pins and seams of a BMesh, stored as packed boolean arrays"""
+	__slots__ = ('counts', 'face_size', 'vert', 'edge', 'face', 'uv_select', 'uv_select_edge', 'pin', 'seam')
+
+	@utilities_profile.timed('selection store')
+	def __init__(self, bm, uv_layer):
+		verts, edges, faces = bm.verts, bm.edges, bm.faces
+		luvs = [loop[uv_layer] for face in faces for loop in face.loops]
+		n_loops = len(luvs)
+		self.counts = (len(verts), len(edges), len(faces), n_loops)
+
+		self.face_size = np.fromiter((len(face.loops) for face in faces), dtype=np.int32, count=len(faces))
+		self.vert = np.packbits(np.fromiter((v.select for v in verts), dtype=bool, count=len(verts)))
+		self.edge = np.packbits(np.fromiter((e.select for e in edges), dtype=bool, count=len(edges)))
+		self.seam = np.packbits(np.fromiter((e.seam for e in edges), dtype=bool, count=len(edges)))
+		self.face = np.packbits(np.fromiter((f.select for f in faces), dtype=bool, count=len(faces)))
+		self.uv_select = np.packbits(np.fromiter((luv.select for luv in luvs), dtype=bool, count=n_loops))
+		self.uv_select_edge = np.packbits(np.fromiter((luv.select_edge for luv in luvs), dtype=bool, count=n_loops))
+		self.pin = np.packbits(np.fromiter((luv.pin_uv for luv in luvs), dtype=bool, count=n_loops))
+
+	def unpack(self, name):
+		"""Boolean array of one of the stored states: vert, edge, seam, face, uv_select, uv_select_edge or pin"""
+		count = {'vert': 0, 'edge': 1, 'seam': 1, 'face': 2}.get(name, 3)
+		return np.unpackbits(getattr(self, name), count=self.counts[count]).astype(bool)
+
+	def face_counts(self, name='uv_select'):
+		"""Number of loops per face with the given UV state: uv_select, uv_select_edge or pin"""
+		if not len(self.face_size):
+			return np.zeros(0, dtype=np.int64)
+		face_start = np.zeros(len(self.face_size), dtype=np.int64)
+		np.cumsum(self.face_size[:-1], out=face_start[1:])
+		return np.add.reduceat(self.unpack(name).astype(np.int64), face_start)
+
+	def selected_faces_mask(self):
+		"""Faces selected in the mesh and with all of their UVs selected"""
+		return self.unpack('face') & (self.face_counts() == self.face_size)
+
+	def diff(self, other):
+		"""Indices of the elements whose state differs between two snapshots of the same topology"""
+		if self.counts != other.counts:
+			raise ValueError("Selection snapshots of different topology can't be compared")
+		return {name: np.flatnonzero(self.unpack(name) != other.unpack(name)) for name in self.__slots__[2:]}
+
+	@utilities_profile.timed('selection restore')
+	def restore(self, bm, uv_layer, mesh=True, uv=True, pins=True, seams=True):
+		"""Write the stored states back; elements created after the snapshot keep their current state"""
+		if mesh:
+			# Only the elements of the lowest select mode and below are written, select_flush_mode()
+			# derives the others. Top down, since (de)selecting a face or edge also changes its verts.
+			select_mode = bm.select_mode
+			if 'VERT' in select_mode:
+				levels = ((bm.verts, 'vert'),)
+			elif 'EDGE' in select_mode:
+				levels = ((bm.edges, 'edge'), (bm.verts, 'vert'))
+			else:
+				levels = ((bm.faces, 'face'), (bm.edges, 'edge'), (bm.verts, 'vert'))
+			for seq, name in levels:
+				seq.ensure_lookup_table()
+				_write_changed(seq, 'select', self.unpack(name))
+			bm.select_flush_mode()
+		if seams:
+			bm.edges.ensure_lookup_table()
+			_write_changed(bm.edges, 'seam', self.unpack('seam'))
+
+		if not (uv or pins):
+			return
+		luvs = self._stored_luvs(bm, uv_layer)
+		if uv:
+			_write_changed(luvs, 'select', self.unpack('uv_select'))
+			_write_changed(luvs, 'select_edge', self.unpack('uv_select_edge'))
+		if pins:
+			_write_changed(luvs, 'pin_uv', self.unpack('pin'))
+
+	def _stored_luvs(self, bm, uv_layer):
+		"""Current loop UVs in snapshot order, None where a face has changed its number of loops"""
+		luvs = []
+		face_size = self.face_size.tolist()
+		for face, size in zip(bm.faces, face_size):
+			loops = face.loops
+			if len(loops) == size:
+				luvs.extend(loop[uv_layer] for loop in loops)
+			else:
+				luvs.extend([None] * size)
+		return luvs
+
+
+
+def _write_changed(elements, attr, stored):
+	"""Set attr on the elements whose current value differs from the stored one,
+	the ones past the stored count or None are left as they are"""
+	n = min(len(elements), len(stored))
+	current = np.fromiter((stored[i] if element is None else getattr(element, attr) for i, element in zip(range(n), elements)), dtype=bool, count=n)
+	stored = stored[:n]
+	for index in np.flatnonzero(current != stored).tolist():
+		setattr(elements[index], attr, bool(stored[index]))
@@ -0,0 +1,123 @@
+import numpy as np
+
+from itertools import chain
+from . import utilities_islands
+
+
+class UVHash:
+	"""Coincident UV lookup. Coordinates are quantized to integer cells of epsilon size and kept sorted by cell,
+	so queries check the 3x3 neighbour cells and never miss a match that straddles a cell border."""
+	__slots__ = ('epsilon', 'uv', 'items', 'keys', 'order', '_cells', '_labels', '_rows')
+
+	def __init__(self, uv, epsilon=1e-5, items=None):
+		self.epsilon = epsilon
+		self.uv = np.asarray(uv, dtype=np.float64).reshape(-1, 2)
+		self.items = items
+		self.keys = self._keys(self.uv)
+		self.order = np.argsort(self.keys, kind='stable')
+		self._cells = None
+		self._labels = None
+		self._rows = None
+
+	@classmethod
+	def from_loops(cls, loops, uv_layer, epsilon=1e-5):
+		loops = list(loops)
+		uv = np.fromiter(chain.from_iterable(loop[uv_layer].uv for loop in loops), dtype=np.float64, count=len(loops)*2)
+		return cls(uv, epsilon, loops)
+
+	@classmethod
+	def from_luvs(cls, luvs, epsilon=1e-5):
+		luvs = list(luvs)
+		uv = np.fromiter(chain.from_iterable(luv.uv for luv in luvs), dtype=np.float64, count=len(luvs)*2)
+		return cls(uv, epsilon, luvs)
+
+	def _keys(self, uv, dx=0, dy=0):
+		cells = np.floor(uv / self.epsilon).astype(np.int64)
+		return ((cells[:, 0] + dx) << 32) + (cells[:, 1] + dy)
+
+	def __len__(self):
+		return len(self.uv)
+
+	def query(self, co):
+		"""Rows whose UV is within epsilon of co on both axes"""
+		if self._cells is None:
+			sorted_keys = self.keys[self.order]
+			first = np.ones(len(sorted_keys), dtype=bool)
+			first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+			starts = np.flatnonzero(first)
+			bounds = np.append(starts, len(sorted_keys)).tolist()
+			self._cells = dict(zip(sorted_keys[starts].tolist(), zip(bounds, bounds[1:])))
+
+		eps = self.epsilon
+		x, y = float(co[0]), float(co[1])
+		cx = int(np.floor(x / eps))
+		cy = int(np.floor(y / eps))
+		uv = self.uv
+		order = self.order
+		rows = []
+		for dx in (-1, 0, 1):
+			for dy in (-1, 0, 1):
+				cell = self._cells.get(((cx + dx) << 32) + cy + dy)
+				if cell is None:
+					continue
+				for row in order[cell[0]:cell[1]].tolist():
+					u, v = uv[row].tolist()
+					if abs(u - x) <= eps and abs(v - y) <= eps:
+						rows.append(row)
+		rows.sort()
+		return rows
+
+	def query_items(self, co):
+		items = self.items
+		return [items[row] for row in self.query(co)]
+
+	@property
+	def labels(self):
+		"""Cluster id of every row, where UVs within epsilon of each other are chained into the same cluster"""
+		if self._labels is None:
+			n = len(self.uv)
+			order = self.order
+			sorted_keys = self.keys[order]
+			sorted_uv = self.uv[order]
+			positions = np.arange(n)
+			a = []
+			b = []
+			# The own cell and the half of the neighbours above it cover every pair once
+			for dx, dy in ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1)):
+				target = sorted_keys + ((dx << 32) + dy)
+				lo = np.searchsorted(sorted_keys, target, 'left')
+				hi = np.searchsorted(sorted_keys, target, 'right')
+				if dx == dy == 0:
+					lo = np.maximum(lo, positions + 1)
+				counts = np.maximum(hi - lo, 0)
+				total = counts.sum()
+				if not total:
+					continue
+				src = np.repeat(positions, counts)
+				first = np.repeat(np.cumsum(counts) - counts, counts)
+				dst = np.repeat(lo, counts) + np.arange(total) - first
+				close = np.all(np.abs(sorted_uv[src] - sorted_uv[dst]) <= self.epsilon, axis=1)
+				a.append(src[close])
+				b.append(dst[close])
+
+			if a:
+				roots = utilities_islands.connected_components(n, np.concatenate(a), np.concatenate(b))
+			else:
+				roots = positions
+			self._labels = np.empty(n, dtype=np.int64)
+			self._labels[order] = order[roots]
+		return self._labels
+
+	def label(self, item):
+		"""Cluster id of a stored item, -1 when it is not in the hash"""
+		if self._rows is None:
+			self._rows = {item: row for row, item in enumerate(self.items)}
+		row = self._rows.get(item)
+		if row is None:
+			return -1
+		return int(self.labels[row])
+
+	def same(self, a, b):
+		"""True when two stored items lie at the same UV within epsilon"""
+		label = self.label(a)
+		return label != -1 and label == self.label(b)
@@ -3,9 +3,18 @@ import bmesh
 import math
 import re
 import os
+import struct
+import numpy as np
+
+from . import utilities_uv
+from . import utilities_islands
+from . import utilities_cache
 
 image_material_prefix = "TT_checker_"
 
+# Image sizes read from file headers, by path: (mtime, size)
+_image_sizes = {}
+
 
 
 def get_object_texture_image(obj):
@@ -137,23 +146,214 @@ def restore_materials(objs):
 
 def get_tile_size(self, image, udim_tile):
 	tile_name = f"{image.name}.{udim_tile}.{image.file_format.lower()}"
-	purge = False
-	if tile_name not in bpy.data.images:
-		base_image_location = bpy.path.abspath(image.filepath)
+	if tile_name in bpy.data.images:
+		return min(*bpy.data.images[tile_name].size)
+
+	base_image_location = bpy.path.abspath(image.filepath)
+	if '<UDIM>' in base_image_location:
+		image_location = base_image_location.replace('<UDIM>', str(udim_tile))
+	else:
 		base_tile = re.findall('\d{4}', base_image_location)[-1]
 		image_location = base_image_location.replace(base_tile, str(udim_tile))
-		if not os.path.isfile(image_location):
-			self.report({'INFO'}, f"Missing tile image {tile_name}")
-			return 0
-		else:
-			bpy.data.images.load(image_location, check_existing=False)
-			#bpy.ops.image.open(filepath=image_location, relative_path=False, use_udim_detecting=False)
-			purge = True
-
-	tile = bpy.data.images[tile_name]
-	size = min(*tile.size)
-	if purge:
-		#bpy.data.batch_remove([tile])
+	if not os.path.isfile(image_location):
+		self.report({'INFO'}, f"Missing tile image {tile_name}")
+		return 0
+
+	size = get_image_file_size(image_location)
+	if size is None:
+		# Formats without a header reader are loaded in full
+		tile = bpy.data.images.load(image_location, check_existing=False)
+		size = tuple(tile.size)
 		bpy.data.images.remove(tile, do_unlink=True)
-
+		_image_sizes[image_location] = (os.path.getmtime(image_location), size)
+
+	return min(*size)
+
+
+
+def get_image_file_size(path):
+	"""Width and height of an image file read from its header (PNG, JPEG, TGA, BMP, OpenEXR),
+	cached by path and modification time. None for other formats or unreadable files."""
+	try:
+		mtime = os.path.getmtime(path)
+	except OSError:
+		return None
+	cached = _image_sizes.get(path)
+	if cached is not None and cached[0] == mtime:
+		return cached[1]
+
+	try:
+		with open(path, 'rb') as file:
+			size = read_image_header(file, os.path.splitext(path)[1].lower())
+	except (OSError, struct.error, ValueError):
+		size = None
+	if size is not None:
+		_image_sizes[path] = (mtime, size)
 	return size
+
+
+def read_image_header(file, extension):
+	head = file.read(32)
+	if head[:8] == b'\x89PNG\r\n\x1a\n' and head[12:16] == b'IHDR':
+		return struct.unpack('>II', head[16:24])
+
+	if head[:4] == b'\x76\x2f\x31\x01':
+		return read_exr_header(file)
+
+	if head[:2] == b'\xff\xd8':
+		return read_jpeg_header(file)
+
+	if head[:2] == b'BM' and len(head) >= 26:
+		width, height = struct.unpack('<ii', head[18:26])
+		return width, abs(height)
+
+	# TGA has no signature, trust the extension and check the image type
+	if extension == '.tga' and len(head) >= 18 and head[2] in (1, 2, 3, 9, 10, 11):
+		return struct.unpack('<HH', head[12:16])
+
+	return None
+
+
+def read_exr_header(file):
+	"""Size of the data window, the first attribute list of the file is enough for multi-part files too"""
+	file.seek(8)
+	data = file.read(1 << 16)
+	offset = 0
+	while True:
+		end = data.index(b'\0', offset)
+		name = data[offset:end]
+		if not name:
+			return None
+		end_type = data.index(b'\0', end + 1)
+		attribute_type = data[end + 1:end_type]
+		length, = struct.unpack('<i', data[end_type + 1:end_type + 5])
+		value = end_type + 5
+		if name == b'dataWindow' and attribute_type == b'box2i':
+			xmin, ymin, xmax, ymax = struct.unpack('<iiii', data[value:value + 16])
+			return xmax - xmin + 1, ymax - ymin + 1
+		offset = value + length
+
+
+def read_jpeg_header(file):
+	"""Size of the first start of frame segment"""
+	file.seek(2)
+	while True:
+		marker = file.read(2)
+		if len(marker) < 2 or marker[0] != 0xFF:
+			return None
+		code = marker[1]
+		# Fill bytes and markers without a length
+		if code == 0xFF:
+			file.seek(-1, 1)
+			continue
+		if code == 0x01 or 0xD0 <= code <= 0xD9:
+			continue
+		length, = struct.unpack('>H', file.read(2))
+		if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+			height, width = struct.unpack('>xHH', file.read(5))
+			return width, height
+		file.seek(length - 2, 1)
+
+
+
+def face_texel_areas(la):
+	"""Square roots of the UV and 3D areas of every face of a utilities_islands.LoopArrays,
+	the per face terms that texel density sums"""
+	return np.sqrt(la.face_uv_fan_areas()), np.sqrt(la.face_areas())
+
+
+def group_texel_sums(la, face_group, n_groups, size):
+	"""Per group sums of the face terms, the UV ones in pixels of a size texture; faces in group -1 are left out"""
+	sqrt_area_uv, sqrt_area_vt = face_texel_areas(la)
+	in_group = face_group >= 0
+	sum_area_uv = np.bincount(face_group[in_group], sqrt_area_uv[in_group] * size, minlength=n_groups)
+	sum_area_vt = np.bincount(face_group[in_group], sqrt_area_vt[in_group], minlength=n_groups)
+	return sum_area_uv, sum_area_vt
+
+
+def get_texture_size(self, obj, getmode):
+	"""Texture size texel density is measured against, 0 when it can't be found"""
+	if getmode == 'IMAGE':
+		# Collect image/texture
+		image = get_object_texture_image(obj)
+		if not image:
+			self.report({'INFO'}, "No Texture found, assign Checker map or texture first" )
+			return 0
+		if image.source =='TILED':
+			udim_tile, column, row = utilities_uv.get_UDIM_tile_coords(obj)
+			if udim_tile != 1001:
+				return get_tile_size(self, image, udim_tile)
+		return min(image.size[0], image.size[1])
+
+	elif getmode == 'SIZE':
+		return min(bpy.context.scene.texToolsSettings.size[0], bpy.context.scene.texToolsSettings.size[1])
+	return int(getmode)
+
+
+def object_loop_arrays(obj):
+	"""LoopArrays of an object, from its BMesh in Edit Mode and from the mesh data otherwise"""
+	if obj.mode == 'EDIT':
+		bm = bmesh.from_edit_mesh(obj.data)
+		return utilities_cache.get_loop_arrays(bm, bm.loops.layers.uv.verify())
+	return utilities_islands.LoopArrays.from_mesh(obj.data)
+
+
+def analyze_texel_density(self, obj, per='ISLAND', bins=12):
+	"""Texel density of every island or face of the visible faces of an object, with its distribution.
+	The report is kept per mesh and reused while the mesh, its UVs and the texture size are unchanged."""
+	getmode = bpy.context.scene.texToolsSettings.texel_get_mode
+	density_scale = bpy.context.preferences.addons[__package__].preferences.texel_density_scale
+	size = get_texture_size(self, obj, getmode)
+	if not size:
+		return None
+
+	la = object_loop_arrays(obj)
+	# The faces shown in the UV editor
+	visible = ~la.face_hide
+	if obj.mode == 'EDIT' and not bpy.context.scene.tool_settings.use_uv_select_sync:
+		visible &= la.face_select
+	key = utilities_cache.fingerprint(la, visible, per) + (size, density_scale)
+	report = utilities_cache.texel_reports.get(obj.data.name_full)
+	if report is not None and report['key'] == key:
+		return report
+
+	face_group = np.full(len(la.faces), -1, dtype=np.int64)
+	if per == 'ISLAND':
+		groups = utilities_islands.split_islands(utilities_cache.get_island_roots(la, visible, connectivity='VERT'), visible)
+		if groups:
+			face_group[np.concatenate(groups)] = np.repeat(np.arange(len(groups)), [len(faces) for faces in groups])
+		n_groups = len(groups)
+	else:
+		n_groups = int(visible.sum())
+		face_group[visible] = np.arange(n_groups)
+
+	sum_area_uv, sum_area_vt = group_texel_sums(la, face_group, n_groups, size)
+	# Groups without 3D or UV area have no density
+	valid = (sum_area_uv > 0) & (sum_area_vt > 0)
+	densities = sum_area_uv[valid] / sum_area_vt[valid] * density_scale
+	row = np.full(n_groups + 1, -1, dtype=np.int64)
+	row[:-1][valid] = np.arange(len(densities))
+
+	report = {
+		'key': key,
+		'object': obj.name,
+		'per': per,
+		'size': size,
+		# Report row of every face, -1 for the hidden ones and those without density
+		'face_row': row[face_group],
+		'densities': densities,
+		'count': len(densities),
+		'skipped': n_groups - len(densities),
+	}
+	if len(densities):
+		report['min'], report['p5'], report['median'], report['p95'], report['max'] = np.percentile(densities, (0, 5, 50, 95, 100)).tolist()
+		report['histogram'], report['edges'] = np.histogram(densities, bins=bins)
+	utilities_cache.texel_reports[obj.data.name_full] = report
+	return report
+
+
+def get_texel_report(obj):
+	"""Last analysis of the mesh of an object, None when it wasn't analyzed"""
+	if obj is None or obj.type != 'MESH':
+		return None
+	return utilities_cache.texel_reports.get(obj.data.name_full)
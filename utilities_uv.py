@@ -2,17 +2,32 @@ import bpy
 import bmesh
 import math
 import mathutils
+import numpy as np
 
+from itertools import chain
 from mathutils import Vector
 from . import settings
 from . import utilities_ui
+from . import utilities_islands
+from . import utilities_cache
+from . import utilities_selection
+from . import utilities_profile
 
 
 precision = 5
 multi_object_loop_stop = False
+mode_switches_avoided = 0
 
 
-def multi_object_loop(func, *args, need_results=False, **kwargs):
+def multi_object_loop(func, *args, need_results=False, edit_session=False, **kwargs):
+	"""Run func for every selected mesh object, each one made active and alone in Edit Mode.
+	With edit_session, functions that don't depend on the active object or on operators run
+	for all the objects in the current edit session instead, see multi_object_edit_session"""
+	global mode_switches_avoided
+	mode_switches_avoided = 0
+	if edit_session and bpy.context.mode == 'EDIT_MESH':
+		return multi_object_edit_session(func, *args, need_results=need_results, **kwargs)
+
 	selected_obs = [ob for ob in bpy.context.selected_objects if ob.type == 'MESH']
 	preactiv_name = None
 	if bpy.context.view_layer.objects.active:
@@ -75,6 +90,42 @@ def multi_object_loop(func, *args, need_results=False, **kwargs):
 			return results
 
 
+def multi_object_edit_session(func, *args, need_results=False, **kwargs):
+	"""Run func once per selected object with unique mesh data without leaving Edit Mode.
+	func receives the me, bm and uv_layers of the object as keyword arguments."""
+	global multi_object_loop_stop, mode_switches_avoided
+	multi_object_loop_stop = False
+
+	active = bpy.context.active_object
+	obs = [ob for ob in bpy.context.objects_in_mode_unique_data if ob.type == 'MESH' and (ob.select_get() or ob == active)]
+	if len(obs) > 1:
+		# Initial EDIT and OBJECT switches, one EDIT and OBJECT pair per object and the final restore
+		mode_switches_avoided = 2 * len(obs) + 3
+
+	results = []
+	for ob in obs:
+		if multi_object_loop_stop:
+			break
+		me = ob.data
+		bm = bmesh.from_edit_mesh(me)
+		uv_layers = bm.loops.layers.uv.verify()
+		if "ob_num" in kwargs:
+			print("Operating on object " + str(kwargs["ob_num"]))
+		result = func(*args, me=me, bm=bm, uv_layers=uv_layers, **kwargs)
+		if need_results:
+			results.append(result)
+		if "ob_num" in kwargs:
+			kwargs["ob_num"] += 1
+
+	if need_results:
+		return results
+
+
+def report_mode_switches_avoided(operator):
+	if mode_switches_avoided:
+		operator.report({'INFO'}, f"{mode_switches_avoided} mode switches avoided")
+
+
 def selection_store(bm=None, uv_layers=None, return_selected_UV_faces=False, return_selected_faces_edges=False, return_selected_faces_loops=False):
 	if bm is None:
 		bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
@@ -88,56 +139,25 @@ def selection_store(bm=None, uv_layers=None, return_selected_UV_faces=False, ret
 		settings.selection_uv_pivot = contextViewUV['area'].spaces[0].pivot_point
 		settings.selection_uv_pivot_pos = contextViewUV['area'].spaces[0].cursor_location.copy()
 
-	# Clear previous selection
-	settings.selection_vert_indexies.clear()
-	settings.selection_edge_indexies.clear()
-	settings.selection_face_indexies.clear()
-	settings.seam_edges.clear()
-
 	settings.selection_mode = tuple(bpy.context.scene.tool_settings.mesh_select_mode)
 
-	if settings.selection_mode[0]:
-		for vert in bm.verts:
-			if vert.select:
-				settings.selection_vert_indexies.add(vert.index)
-	if settings.selection_mode[1]:
-		for edge in bm.edges:
-			if edge.select:
-				settings.selection_edge_indexies.add(edge.index)
-
-	# Face selections (Loops)
-	settings.selection_uv_loops.clear()
-	if return_selected_UV_faces:
-		selected_faces = set()
-	elif return_selected_faces_edges or return_selected_faces_loops:
-		selected_faces_loops = {}
-
-	for face in bm.faces:
-		if face.select:
-			settings.selection_face_indexies.add(face.index)
-		n_selected_loops = 0
-		if return_selected_faces_edges or return_selected_faces_loops:
-			face_selected_loops = []
-		
-		for loop in face.loops:
-			if loop.edge.seam:
-				settings.seam_edges.add(loop.edge)
-			if loop[uv_layers].select:
-				n_selected_loops += 1
-				settings.selection_uv_loops.add((face.index, loop.vert.index))
-				if return_selected_faces_edges or return_selected_faces_loops:
-					face_selected_loops.append(loop)
-		
-		if return_selected_UV_faces and n_selected_loops == len(face.loops) and face.select:
-			selected_faces.add(face)
-		elif return_selected_faces_edges and n_selected_loops == 2 and face.select:
-			selected_faces_loops.update({face: face_selected_loops})
-		elif return_selected_faces_loops and n_selected_loops > 0 and face.select:
-			selected_faces_loops.update({face: face_selected_loops})
+	# Mesh and UV selection, pins and seams in packed arrays
+	snapshot = settings.selection_snapshot = utilities_selection.SelectionSnapshot(bm, uv_layers)
 
 	if return_selected_UV_faces:
-		return selected_faces
+		bm.faces.ensure_lookup_table()
+		return {bm.faces[index] for index in np.flatnonzero(snapshot.selected_faces_mask()).tolist()}
 	elif return_selected_faces_edges or return_selected_faces_loops:
+		n_selected_loops = snapshot.face_counts('uv_select')
+		if return_selected_faces_edges:
+			mask = n_selected_loops == 2
+		else:
+			mask = n_selected_loops > 0
+		bm.faces.ensure_lookup_table()
+		selected_faces_loops = {}
+		for index in np.flatnonzero(mask & snapshot.unpack('face')).tolist():
+			face = bm.faces[index]
+			selected_faces_loops[face] = [loop for loop in face.loops if loop[uv_layers].select]
 		return selected_faces_loops
 
 
@@ -161,49 +181,12 @@ def selection_restore(bm=None, uv_layers=None, restore_seams=False):
 		else:
 			bpy.ops.uv.cursor_set(contextViewUV, location=settings.selection_uv_pivot_pos)
 
-	# Restore seams
-	if restore_seams:
-		bpy.ops.mesh.select_all(action='SELECT')
-		bpy.ops.mesh.mark_seam(clear=True)
-		for edge in settings.seam_edges:
-			edge.seam = True
-
-	bpy.ops.mesh.select_all(action='DESELECT')
-
 	# Selection Mode
 	bpy.context.scene.tool_settings.mesh_select_mode = settings.selection_mode
-	
-	if settings.selection_mode[0]:
-		bm.verts.ensure_lookup_table()
-		for index in settings.selection_vert_indexies:
-			if index < len(bm.verts):
-				bm.verts[index].select = True
-	if settings.selection_mode[1]:
-		bm.edges.ensure_lookup_table()
-		for index in settings.selection_edge_indexies:
-			if index < len(bm.edges):
-				bm.edges[index].select = True
-	bm.faces.ensure_lookup_table()
-	for index in settings.selection_face_indexies:
-		if index < len(bm.faces):
-			bm.faces[index].select = True
-
-	# UV Face-UV Selections (Loops)
-	if contextViewUV:
-		if settings.bversion >= 3.2:
-			with bpy.context.temp_override(**contextViewUV):
-				bpy.ops.uv.select_all(action='DESELECT')
-		else:
-			bpy.ops.uv.select_all(contextViewUV, action='DESELECT')
-	else:
-		for face in bm.faces:
-			for loop in face.loops:
-				loop[uv_layers].select = False
-	for uv_set in settings.selection_uv_loops:
-		for loop in bm.faces[uv_set[0]].loops:
-			if loop.vert.index == uv_set[1]:
-				loop[uv_layers].select = True
-				break
+
+	# Mesh and UV selection in one write, seams only when asked
+	if settings.selection_snapshot is not None:
+		settings.selection_snapshot.restore(bm, uv_layers, pins=False, seams=restore_seams)
 
 	# Workaround for selection not flushing properly from loops in EDGE or FACE UV Selection Mode,
 	# apparently since UV edge selection support was added to the UV space
@@ -266,10 +249,21 @@ def get_UDIM_tiles(objs):
 	return tiles
 
 
+@utilities_profile.timed('transform')
+def transform_faces(faces, uv_layer, matrix):
+	"""Apply a 2x3 affine matrix to the UVs of a group of faces, with a single read and write of its loops"""
+	luvs = [loop[uv_layer] for face in faces for loop in face.loops]
+	uvs = np.fromiter(chain.from_iterable(luv.uv for luv in luvs), dtype=np.float64, count=len(luvs)*2).reshape(-1, 2)
+	utilities_islands.apply_affine(uvs, slice(None), matrix)
+	for luv, co in zip(luvs, uvs.tolist()):
+		luv.uv = co
+
+
 def translate_island(island, uv_layer, delta):
-	for face in island:
-		for loop in face.loops:
-			loop[uv_layer].uv += delta
+	if isinstance(island, utilities_islands.Island):
+		island.translate(delta)
+		return
+	transform_faces(island, uv_layer, utilities_islands.affine_matrices(translation=delta))
 
 
 def rotate_island(island, uv_layer=None, angle=0, pivot=None):
@@ -277,29 +271,26 @@ def rotate_island(island, uv_layer=None, angle=0, pivot=None):
 	if abs(angle) < 1e-05:
 		return False
 
-	rot_matrix = mathutils.Matrix.Rotation(-angle, 2)
+	if isinstance(island, utilities_islands.Island):
+		island.rotate(angle, pivot)
+		return True
+
 	if uv_layer is None:
 		me = bpy.context.active_object.data
 		bm = bmesh.from_edit_mesh(me)
 		uv_layer = bm.loops.layers.uv.verify()
 	if pivot:
-		for face in island:
-			for loop in face.loops:
-				uv = loop[uv_layer]
-				uv.uv = rot_matrix @ (uv.uv - pivot) + pivot
-		return True
-
-	for face in island:
-		for loop in face.loops:
-			uv = loop[uv_layer]
-			uv.uv = uv.uv @ rot_matrix
+		transform_faces(island, uv_layer, utilities_islands.affine_matrices(angle=-angle, pivot=pivot))
+	else:
+		transform_faces(island, uv_layer, utilities_islands.affine_matrices(angle=angle))
 	return True
 
 def scale_island(island, uv_layer, scale, pivot):
 	"""Scale a list of faces by 'scale_x, scale_y'. """
-	for face in island:
-		for loop in face.loops:
-			loop[uv_layer].uv = (loop[uv_layer].uv - pivot) * scale + pivot
+	if isinstance(island, utilities_islands.Island):
+		island.scale(scale, pivot)
+		return
+	transform_faces(island, uv_layer, utilities_islands.affine_matrices(scale=scale, pivot=pivot))
 
 
 def set_selected_faces(faces, bm, uv_layers):
@@ -362,28 +353,9 @@ def get_selected_uv_faces(bm, uv_layers, rtype: 'list | set | iter' = list):
 
 	raise NotImplementedError(f'{rtype} is an invalid keyword argument for get_selected_uv_faces(), expect: list, set, iter')
 
-def get_vert_to_uv(bm, uv_layers):
-	vert_to_uv = {}
-	for face in bm.faces:
-		for loop in face.loops:
-			vert = loop.vert
-			uv = loop[uv_layers]
-			if vert not in vert_to_uv:
-				vert_to_uv[vert] = [uv]
-			else:
-				vert_to_uv[vert].append(uv)
-	return vert_to_uv
-
-
-def get_uv_to_vert(bm, uv_layers):
-	uv_to_vert = {}
-	for face in bm.faces:
-		for loop in face.loops:
-			vert = loop.vert
-			uv = loop[uv_layers]
-			if uv not in uv_to_vert:
-				uv_to_vert[uv] = vert
-	return uv_to_vert
+def get_vert_uv_index(bm, uv_layers):
+	"""Vertex to loops and distinct UVs index, see utilities_islands.VertUVIndex"""
+	return utilities_islands.VertUVIndex.from_loop_arrays(utilities_cache.get_loop_arrays(bm, uv_layers))
 
 
 def get_center(group, bm, uv_layers, are_loops=False):
@@ -404,97 +376,83 @@ def get_center(group, bm, uv_layers, are_loops=False):
 
 
 def get_selected_islands(bm, uv_layers, selected=True, extend_selection_to_islands=False):
+	la = utilities_cache.get_loop_arrays(bm, uv_layers)
+	return [la.to_faces(island) for island in get_selected_islands_indices(la, selected, extend_selection_to_islands)]
+
+
+def get_selected_island_set(bm, uv_layers, selected=True, extend_selection_to_islands=False):
+	"""Same islands as get_selected_islands, as a utilities_islands.IslandSet"""
+	la = utilities_cache.get_loop_arrays(bm, uv_layers)
+	return utilities_islands.IslandSet(la, get_selected_islands_indices(la, selected, extend_selection_to_islands))
+
+
+def get_selected_face_set(bm, uv_layers):
+	"""Selected faces as a utilities_islands.IslandSet of one island per face"""
+	la = utilities_cache.get_loop_arrays(bm, uv_layers)
+	if bpy.context.scene.tool_settings.use_uv_select_sync:
+		faces_selected = la.face_select
+	else:
+		faces_selected = la.face_select & la.face_all(la.uv_select)
+	return utilities_islands.IslandSet(la, list(np.flatnonzero(faces_selected).reshape(-1, 1)))
+
+
+def get_selected_islands_indices(la, selected=True, extend_selection_to_islands=False):
+	"""Same islands as get_selected_islands, as face index arrays of a utilities_islands.LoopArrays"""
 	sync = bpy.context.scene.tool_settings.use_uv_select_sync
 
-	islands = []
-	island = set()
-	faces = bm.faces
+	if sync:
+		faces_selected = la.face_select
+	else:
+		faces_selected = la.face_select & la.face_all(la.uv_select)
+
 	if selected:
-		if sync:
-			for face in faces:
-				face.tag = face.select
-		else:
-			for face in faces:
-				if face.select:
-					face.tag = all(l[uv_layers].select for l in face.loops)
-					continue
-				face.tag = False
+		face_mask = faces_selected
+	elif sync:
+		face_mask = ~la.face_hide
 	else:
-		if sync:
-			for face in faces:
-				face.tag = not face.hide
-		else:
-			for face in faces:
-				face.tag = not face.hide and face.select
+		face_mask = ~la.face_hide & la.face_select
 
-	for face in faces:
-		if not face.tag:
-			continue
-
-		# Tag first element in island (don`t add again)
-		face.tag = False
-
-		# Container collector of island elements
-		parts_of_island = [face]
-
-		# Container for get elements from loop from parts_of_island
-		temp = []
-
-		# Blank list == all faces of the island taken
-		while parts_of_island:
-			for f in parts_of_island:
-				# Running through all the neighboring faces
-				for l in f.loops:
-					link_face = l.link_loop_radial_next.face
-					if not link_face.tag:  # Skip appended
-						continue
-
-					for ll in link_face.loops:
-						if not ll.face.tag:
-							continue
-						# If the coordinates of the vertices of adjacent faces on the uv match,
-						# then this is part of the island, and we append face to the list
-						if ll[uv_layers].uv != l[uv_layers].uv:
-							continue
-						if (l.link_loop_next[uv_layers].uv == ll.link_loop_prev[uv_layers].uv) or \
-							(ll.link_loop_next[uv_layers].uv == l.link_loop_prev[uv_layers].uv):  # Skip non-manifold
-							temp.append(ll.face)
-							ll.face.tag = False
-
-			island.update(parts_of_island)
-			parts_of_island = temp
-			temp = []
-
-		# Skip the islands that don't have a single selected face.
-		if selected is False and extend_selection_to_islands is True:
-			if sync:
-				for face in island:
-					if face.select:
-						break
-				else:
-					island = set()
-					continue
-			else:
-				for face in island:
-					if all(l[uv_layers].select for l in face.loops):
-						break
-				else:
-					island = set()
-					continue
+	islands = utilities_cache.get_islands(la, face_mask)
+
+	# Skip the islands that don't have a single selected face.
+	if selected is False and extend_selection_to_islands is True:
+		islands = [island for island in islands if faces_selected[island].any()]
 
-		islands.append(island)
-		island = set()
 	return islands
 
 
-def getFacesIslands(bm, uv_layers, faces, islands, disordered_island_faces):
+def get_linked_roots(la, extra_faces=None):
+	"""Island roots of the faces shown in the UV editor, linked like bpy.ops.uv.select_linked does.
+	Returns the mask of those faces and the root of every face."""
+	if bpy.context.scene.tool_settings.use_uv_select_sync:
+		visible = ~la.face_hide
+	else:
+		visible = ~la.face_hide & la.face_select
+	if extra_faces:
+		visible = visible.copy()
+		visible[[f.index for f in extra_faces]] = True
+	return visible, utilities_cache.get_island_roots(la, visible, connectivity='VERT')
+
+
+def get_linked_faces(visible, roots, seeds):
+	"""Faces mask of the islands that contain any of the seeds faces mask, like bpy.ops.uv.select_linked"""
+	return visible & np.isin(roots, roots[seeds & visible])
+
+
+def getFacesIslands(bm, uv_layers, faces, islands, disordered_island_faces, la=None, roots=None):
+	if la is None:
+		la = utilities_cache.get_loop_arrays(bm, uv_layers)
+	if roots is None:
+		_, roots = get_linked_roots(la, extra_faces=disordered_island_faces)
+
+	roots = roots.tolist()
+	faces_by_root = {}
+	for f in disordered_island_faces:
+		faces_by_root.setdefault(roots[f.index], set()).add(f)
+
 	for face in faces:
 		if face in disordered_island_faces:
-			bpy.ops.uv.select_all(action='DESELECT')
-			face.loops[0][uv_layers].select = True
-			bpy.ops.uv.select_linked()
-
-			islandFaces = {f for f in disordered_island_faces if f.loops[0][uv_layers].select}
+			islandFaces = faces_by_root.pop(roots[face.index])
 			disordered_island_faces.difference_update(islandFaces)
 
 			islands.append(islandFaces)
@@ -515,7 +473,7 @@ def getAllIslands(bm, uv_layers):
 	return islands
 
 
-def getSelectionIslands(bm, uv_layers, extend_selection_to_islands=False, selected_faces=None, need_faces_selected=True, restore_selected=True):
+def getSelectionIslands(bm, uv_layers, extend_selection_to_islands=False, selected_faces=None, need_faces_selected=True):
 	if selected_faces is None:
 		if need_faces_selected:
 			selected_faces = get_selected_uv_faces(bm, uv_layers, rtype=set)
@@ -524,36 +482,39 @@ def getSelectionIslands(bm, uv_layers, extend_selection_to_islands=False, select
 	if not selected_faces:
 		return []
 
-	# Select islands
+	la = utilities_cache.get_loop_arrays(bm, uv_layers)
+	visible, roots = get_linked_roots(la, extra_faces=selected_faces)
+
+	# Extend to islands
 	if extend_selection_to_islands:
-		bpy.ops.uv.select_linked()
-		disordered_island_faces = {f for f in bm.faces if f.loops[0][uv_layers].select and f.select}
+		seeds = la.faces_mask(selected_faces)
+		if not bpy.context.scene.tool_settings.use_uv_select_sync:
+			seeds |= la.face_any(la.uv_select)
+		disordered_island_faces = la.to_faces(np.flatnonzero(get_linked_faces(visible, roots, seeds)))
 	else:
 		disordered_island_faces = selected_faces.copy()
 
 	# Collect UV islands
 	islands = []
 
-	getFacesIslands(bm, uv_layers, selected_faces, islands, disordered_island_faces)
+	getFacesIslands(bm, uv_layers, selected_faces, islands, disordered_island_faces, la=la, roots=roots)
 
-	# Restore selection
-	if restore_selected:
-		bpy.ops.uv.select_all(action='DESELECT')
-		set_selected_faces(selected_faces, bm, uv_layers)
-	
 	return islands
 
 
-def getSelectedUnselectedIslands(bm, uv_layers, selected_faces=None, target_faces=None, restore_selected=False):
+def getSelectedUnselectedIslands(bm, uv_layers, selected_faces=None, target_faces=None):
 	if selected_faces is None:
 		return [], []
 
+	la = utilities_cache.get_loop_arrays(bm, uv_layers)
+	visible, roots = get_linked_roots(la, extra_faces=selected_faces)
+
 	# Collect selected UV islands
 	selected_islands = []
-	bpy.ops.uv.select_linked()
-	disordered_islands_selected = {f for f in bm.faces if f.loops[0][uv_layers].select and f.select}
+	seeds = la.face_any(la.uv_select) | la.faces_mask(selected_faces)
+	disordered_islands_selected = la.to_faces(np.flatnonzero(get_linked_faces(visible, roots, seeds)))
 
-	getFacesIslands(bm, uv_layers, selected_faces, selected_islands, disordered_islands_selected)
+	getFacesIslands(bm, uv_layers, selected_faces, selected_islands, disordered_islands_selected, la=la, roots=roots)
 
 	# Collect target UV islands
 	if target_faces is None:
@@ -561,39 +522,34 @@ def getSelectedUnselectedIslands(bm, uv_layers, selected_faces=None, target_face
 
 	target_islands = []
 	target_faces.difference_update(disordered_islands_selected)
-	bpy.ops.uv.select_all(action='DESELECT')
-	for f in target_faces:
-		f.loops[0][uv_layers].select = True
-	bpy.ops.uv.select_linked()
-	disordered_islands_targets = {f for f in bm.faces if f.loops[0][uv_layers].select and f.select}
-
-	getFacesIslands(bm, uv_layers, target_faces, target_islands, disordered_islands_targets)
+	disordered_islands_targets = la.to_faces(np.flatnonzero(get_linked_faces(visible, roots, la.faces_mask(target_faces))))
 
-	if restore_selected:
-		bpy.ops.uv.select_all(action='DESELECT')
-		set_selected_faces(selected_faces, bm, uv_layers)
+	getFacesIslands(bm, uv_layers, target_faces, target_islands, disordered_islands_targets, la=la, roots=roots)
 
 	return selected_islands, target_islands
 
 
 def getSelectionFacesIslands(bm, uv_layers, selected_faces_loops):
+	la = utilities_cache.get_loop_arrays(bm, uv_layers)
+	visible, roots = get_linked_roots(la)
+
 	# Select islands
-	bpy.ops.uv.select_linked()
-	disordered_island_faces = {f for f in bm.faces if f.loops[0][uv_layers].select and f.select}
+	seeds = la.face_any(la.uv_select)
+	disordered_island_faces = la.to_faces(np.flatnonzero(get_linked_faces(visible, roots, seeds)))
 
 	# Collect UV islands
 	selected_faces_islands = {}
 	to_remove = set()
+	faces_by_root = {}
+	roots = roots.tolist()
+	for f in disordered_island_faces:
+		faces_by_root.setdefault(roots[f.index], set()).add(f)
 
 	for face in selected_faces_loops.keys():
 		if face not in disordered_island_faces:
 			to_remove.add(face)
 		else:
-			bpy.ops.uv.select_all(action='DESELECT')
-			face.loops[0][uv_layers].select = True
-			bpy.ops.uv.select_linked()
-
-			face_island = {f for f in disordered_island_faces if f.loops[0][uv_layers].select}
+			face_island = faces_by_root.pop(roots[face.index])
 			disordered_island_faces.difference_update(face_island)
 
 			selected_faces_islands.update({face: face_island})
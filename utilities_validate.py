@@ -0,0 +1,87 @@
+import bmesh
+import numpy as np
+
+from . import utilities_islands
+from . import utilities_cache
+
+
+class UVChecks:
+	"""Per face UV validity measures of a LoopArrays, computed for all faces at once.
+	signed_area: shoelace UV area, negative for flipped faces
+	corner_ratio: smallest corner triangle area divided by the squared longest edge of that triangle
+	edge_ratio: shortest UV edge divided by the longest one"""
+	__slots__ = ('la', 'signed_area', 'corner_ratio', 'edge_ratio', '_degenerate_corner')
+
+	def __init__(self, la, precision=0.00005):
+		self.la = la
+		n_faces = len(la.faces)
+		self.signed_area = la.face_uv_signed_areas()
+		if not n_faces:
+			self.corner_ratio = self.edge_ratio = np.zeros(0)
+			self._degenerate_corner = np.zeros(0, dtype=bool)
+			return
+
+		uv = la.uv.astype(np.float64)
+		nxt = la.loop_next
+		prv = np.empty_like(nxt)
+		prv[nxt] = np.arange(len(nxt), dtype=nxt.dtype)
+		to_next = uv[nxt] - uv
+		to_prev = uv[prv] - uv
+		# Corner triangle of every loop, like mathutils.geometry.area_tri(uv, next, prev)
+		area = np.abs(to_next[:, 0] * to_prev[:, 1] - to_next[:, 1] * to_prev[:, 0]) * 0.5
+		edge_sq = np.einsum('ij,ij->i', to_next, to_next)
+		longest_sq = np.maximum(np.maximum(edge_sq, edge_sq[prv]), np.einsum('ij,ij->i', to_next - to_prev, to_next - to_prev))
+		self._degenerate_corner = area < longest_sq * precision
+
+		with np.errstate(divide='ignore', invalid='ignore'):
+			ratio = np.where(longest_sq > 0, area / longest_sq, np.inf)
+		self.corner_ratio = np.minimum.reduceat(ratio, la.face_start)
+		edge = np.sqrt(edge_sq)
+		longest = np.maximum.reduceat(edge, la.face_start)
+		with np.errstate(divide='ignore', invalid='ignore'):
+			self.edge_ratio = np.where(longest > 0, np.minimum.reduceat(edge, la.face_start) / longest, 0.0)
+
+	@property
+	def flipped(self):
+		"""Faces with a negative UV winding"""
+		return self.signed_area < 0
+
+	@property
+	def degenerate(self):
+		"""Faces with a corner triangle thinner than precision times its squared longest edge"""
+		return self.la.face_any(self._degenerate_corner)
+
+
+
+def check_objects(objs, precision=0.00005):
+	"""UVChecks of the active UV map of every object in the edit session, as (obj, checks) pairs"""
+	results = []
+	for obj in objs:
+		bm = bmesh.from_edit_mesh(obj.data)
+		la = utilities_cache.get_loop_arrays(bm, bm.loops.layers.uv.verify())
+		results.append((obj, UVChecks(la, precision)))
+	return results
+
+
+def select_faces(la, face_mask, sync):
+	"""Select the faces of the mask, in the mesh with UV Sync Selection and through their loop UVs otherwise"""
+	if sync:
+		faces = la.faces
+		for index in np.flatnonzero(face_mask).tolist():
+			faces[index].select_set(True)
+	else:
+		luvs = la.luvs
+		for index in np.flatnonzero(face_mask[la.face]).tolist():
+			luvs[index].select = True
+
+
+def select_checked(checks_list, name, sync):
+	"""Select the faces flagged by the named UVChecks mask (degenerate or flipped) on every object, returns their count"""
+	counter = 0
+	for obj, checks in checks_list:
+		mask = getattr(checks, name)
+		count = int(mask.sum())
+		if count:
+			select_faces(checks.la, mask, sync)
+			counter += count
+	return counter